@@ -1,6 +1,9 @@
-from typing import TypedDict
-import networkx as nx
-import plotly.graph_objects as go
+from typing import TYPE_CHECKING, Any, Callable, Literal, NotRequired, TypedDict
+
+# only needed for annotations. Type aliases are evaluated lazily, so importing app.classes stays cheap
+if TYPE_CHECKING:
+    import networkx as nx
+    import plotly.graph_objects as go
 
 type PartialOrder = list[tuple[int, int]]
 type CoverRelation = list[tuple[int, int]]
@@ -15,9 +18,20 @@ type AdjacentTranspositionGraph = nx.Graph
 type LinearExtensions = list[LinearOrder]
 
 
+type CoordinateDtype = Literal["float32", "float64"]
+
+# plotly attributes of a trace as a plain dict, e.g. {"type": "scatter3d", "x": ..., "mode": "lines"}
+type TraceDict = dict[str, Any]
+
+
 class FigureData(TypedDict):
-    data: list[go.Scatter3d]
-    layout: go.Layout
+    data: list["go.Scatter3d"]
+    layout: "go.Layout"
+
+
+class FigureDict(TypedDict):
+    data: list[TraceDict]
+    layout: dict[str, Any]
 
 
 class MarkerData(TypedDict):
@@ -54,3 +68,27 @@ class EdgeData(TypedDict):
     x: tuple[float, float]
     y: tuple[float, float]
     z: tuple[float, float]
+
+
+class KPosetCoverProgress(TypedDict):
+    k: int
+    anchor_sets_done: int
+    anchor_sets_total: int
+
+
+class SolveProgress(KPosetCoverProgress):
+    component: int
+    components: int
+    best_cover_size: int
+    best_cover: NotRequired[list[LinearExtensions]]
+
+
+class CoverVerification(TypedDict):
+    is_valid: bool
+    reason: str | None
+    poset_index: int | None
+    violating_order: LinearOrder | None
+
+
+type KPosetCoverProgressCallback = Callable[[KPosetCoverProgress], None]
+type SolveProgressCallback = Callable[[SolveProgress], None]
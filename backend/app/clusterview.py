@@ -0,0 +1,293 @@
+from typing import Literal, TypedDict
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+from numpy.typing import NDArray
+from app.classes import *
+from app.layoutstore import LayoutStore
+from app.permutationtables import PermutationTables
+from app.posetvisualizer import PosetVisualizer
+
+type ClusterBy = Literal["prefix", "component", "poset"]
+
+
+class Cluster(TypedDict):
+    id: int
+    label: str
+    size: int
+    # edges of the ATG between two members of the cluster
+    internalEdges: int
+
+
+class ClusterView:
+    """A quotient of an ATG that is too large to draw, where every cluster of linear orders is collapsed into one super-node
+
+    Linear orders are clustered by a fixed prefix, by the first poset of a cover they are a linear extension of,
+    or by the connected component of the ATG they are in. Two clusters are joined by an edge weighted by the number of
+    ATG edges between their members. A super-node is drawn at the centroid of the permutahedron coordinates of its members,
+    which are gathered from the LayoutStore instead of laid out, so that even the 9! linear orders of size 9 are clustered in seconds.
+    A cluster is then drawn on its own with expand, where only its members are laid out.
+    """
+
+    # drawn with the level of detail of a PosetVisualizer, i.e. one prefix cluster of size 9
+    MAX_EXPANDED_NODES = 40320
+
+    # line widths of the lightest to heaviest third of the cluster edges, by weight
+    EDGE_WIDTHS = (1, 3, 6)
+    # marker sizes of the smallest and largest cluster
+    MARKER_SIZES = (4, 20)
+
+    def __init__(
+        self,
+        size: int,
+        selected_nodes: list[LinearOrder] = [],
+        cluster_by: ClusterBy = "prefix",
+        prefix_length: int = 1,
+        posets: list[CoverRelation] = [],
+    ):
+        """Cluster the linear orders of an ATG
+
+        Args:
+            size: The length of a linear order.
+            selected_nodes: The linear orders to cluster. Defaults to [] which is interpreted as all linear orders of length 'size'.
+            cluster_by: "prefix" for the first prefix_length values, "poset" for the first of posets a linear order is a linear extension of,
+                "component" for the connected component of the ATG on selected_nodes.
+            prefix_length: The length of the prefix shared by the members of a cluster, if cluster_by is "prefix".
+            posets: Cover relations of the posets, if cluster_by is "poset". Linear orders of none of them form one more cluster.
+
+        Raises:
+            ValueError:
+        """
+        if size < 2 or size > PosetVisualizer.MAX_SIZE:
+            raise ValueError(
+                f"Invalid size. Size must have a value of at least 2 and at most {PosetVisualizer.MAX_SIZE}."
+            )
+        if cluster_by == "prefix" and not 1 <= prefix_length < size:
+            raise ValueError(
+                f"Invalid prefix length. Prefix length must be between 1 and {size - 1}."
+            )
+        if cluster_by == "poset" and not posets:
+            raise ValueError("Posets must not be empty when clustering by poset.")
+
+        self.size = size
+        self.cluster_by: ClusterBy = cluster_by
+        if selected_nodes:
+            nodes = sorted(set(selected_nodes))
+            if any(len(node) != size for node in nodes):
+                raise ValueError("Selected nodes must have length equal to size.")
+            self._digits = PermutationTables.to_digits(nodes)
+            self._ranks = PermutationTables.rank(self._digits)
+        else:
+            self._digits = LayoutStore.get_default().digits(size)
+            self._ranks = np.arange(len(self._digits))
+        self._atg_edges: tuple[NDArray[np.int64], NDArray[np.int64]] | None = None
+
+        if cluster_by == "prefix":
+            keys, names = self._prefix_keys(prefix_length)
+        elif cluster_by == "poset":
+            keys, names = self._poset_keys(posets)
+        elif cluster_by == "component":
+            keys, names = self._component_keys()
+        else:
+            raise ValueError("Invalid cluster_by value.")
+
+        # clusters are numbered in the order of their keys, leaving out keys without members
+        cluster_keys, self.labels = np.unique(keys, return_inverse=True)
+        self.sizes = np.bincount(self.labels, minlength=len(cluster_keys))
+        self.names: list[str] = [names[key] for key in cluster_keys]
+
+        self._cluster_edges: NDArray[np.int64] | None = None
+        self._weights: NDArray[np.int64] | None = None
+        self._internal_edges: NDArray[np.int64] | None = None
+        self._positions: NDArray[np.float64] | None = None
+
+    def _prefix_keys(self, prefix_length: int) -> tuple[NDArray[np.int64], dict]:
+        """Linear orders with the same first prefix_length values share a key"""
+        keys = self._digits[:, :prefix_length].astype(np.int64) @ (
+            10 ** np.arange(prefix_length - 1, -1, -1)
+        )
+        return keys, {key: f"{key}*" for key in np.unique(keys).tolist()}
+
+    def _poset_keys(
+        self, posets: list[CoverRelation]
+    ) -> tuple[NDArray[np.int64], dict]:
+        """The key of a linear order is the index of the first poset it is a linear extension of, len(posets) if there is none"""
+        keys = np.full(len(self._digits), len(posets), dtype=np.int64)
+        for index in range(len(posets) - 1, -1, -1):
+            keys[PermutationTables.extends(self._digits, posets[index])] = index
+        names = {index: f"Poset {index + 1}" for index in range(len(posets))}
+        names[len(posets)] = "Uncovered"
+        return keys, names
+
+    def _component_keys(self) -> tuple[NDArray[np.int64], dict]:
+        """Linear orders in the same connected component share a key, numbered by their first linear order"""
+        firsts, seconds = self._get_atg_edges()
+        n_nodes = len(self._digits)
+        adjacency = sp.csr_array(
+            (np.ones(len(firsts)), (firsts, seconds)), shape=(n_nodes, n_nodes)
+        )
+        n_components, keys = connected_components(adjacency, directed=False)
+        return keys.astype(np.int64), {
+            key: f"Component {key + 1}" for key in range(n_components)
+        }
+
+    def _get_atg_edges(self) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+        """The edges of the ATG on the clustered linear orders, computed once"""
+        if self._atg_edges is None:
+            firsts, seconds, _ = PermutationTables.adjacent_transpositions(self._digits)
+            self._atg_edges = (firsts, seconds)
+        return self._atg_edges
+
+    def _compute_quotient(self) -> None:
+        """Aggregate the ATG edges into weighted edges between clusters and edge counts within clusters"""
+        n_clusters = len(self.sizes)
+        firsts, seconds = self._get_atg_edges()
+        a = self.labels[firsts]
+        b = self.labels[seconds]
+        internal = a == b
+        self._internal_edges = np.bincount(a[internal], minlength=n_clusters)
+
+        pair_keys = (
+            np.minimum(a, b)[~internal] * n_clusters + np.maximum(a, b)[~internal]
+        )
+        pairs, self._weights = np.unique(pair_keys, return_counts=True)
+        self._cluster_edges = np.stack(
+            [pairs // n_clusters, pairs % n_clusters], axis=1
+        )
+
+    @property
+    def clusters(self) -> list[Cluster]:
+        if self._internal_edges is None:
+            self._compute_quotient()
+        return [
+            {
+                "id": index,
+                "label": name,
+                "size": int(size),
+                "internalEdges": int(internal_edges),
+            }
+            for index, (name, size, internal_edges) in enumerate(
+                zip(self.names, self.sizes, self._internal_edges)
+            )
+        ]
+
+    @property
+    def cluster_edges(self) -> list[tuple[int, int, int]]:
+        """Edges between clusters as (cluster, cluster, weight), the weight being the number of ATG edges between their members"""
+        if self._cluster_edges is None:
+            self._compute_quotient()
+        return [
+            (int(a), int(b), int(weight))
+            for (a, b), weight in zip(self._cluster_edges, self._weights)
+        ]
+
+    @property
+    def positions(self) -> NDArray[np.float64]:
+        """The centroid of the permutahedron coordinates of the members of every cluster"""
+        if self._positions is None:
+            member_positions = LayoutStore.get_default().positions(self.size)[
+                self._ranks
+            ]
+            self._positions = (
+                np.stack(
+                    [
+                        np.bincount(
+                            self.labels,
+                            weights=member_positions[:, axis],
+                            minlength=len(self.sizes),
+                        )
+                        for axis in range(3)
+                    ],
+                    axis=1,
+                )
+                / self.sizes[:, np.newaxis]
+            )
+        return self._positions
+
+    def members(self, cluster: int) -> list[LinearOrder]:
+        """The linear orders in a cluster, sorted"""
+        if not 0 <= cluster < len(self.sizes):
+            raise ValueError(
+                f"Invalid cluster. Cluster must be between 0 and {len(self.sizes) - 1}."
+            )
+        return PermutationTables.to_linear_orders(self._digits[self.labels == cluster])
+
+    def expand(self, cluster: int) -> list[LinearOrder]:
+        """The members of a cluster to draw on their own, which must be few enough to draw"""
+        if (
+            0 <= cluster < len(self.sizes)
+            and self.sizes[cluster] > self.MAX_EXPANDED_NODES
+        ):
+            raise ValueError(
+                f"Cluster {self.names[cluster]} has {self.sizes[cluster]} linear orders, more than {self.MAX_EXPANDED_NODES} can be drawn. "
+                "Use smaller clusters, e.g. a longer prefix."
+            )
+        return self.members(cluster)
+
+    def _make_edge_traces(self) -> list[TraceDict]:
+        """One trace per third of the cluster edges by weight, heavier edges being drawn wider"""
+        if self._cluster_edges is None:
+            self._compute_quotient()
+        if not len(self._weights):
+            return []
+        thirds = np.minimum(
+            (3 * self._weights - 1) // self._weights.max(), len(self.EDGE_WIDTHS) - 1
+        )
+        traces = []
+        for third, width in enumerate(self.EDGE_WIDTHS):
+            edges = self._cluster_edges[thirds == third]
+            if not len(edges):
+                continue
+            # every edge is a segment of its two ends followed by a NaN, which breaks the line
+            segments = np.full((3, len(edges), 3), np.nan)
+            segments[:, :, 0] = self.positions[edges[:, 0]].T
+            segments[:, :, 1] = self.positions[edges[:, 1]].T
+            edges_x, edges_y, edges_z = segments.reshape(3, -1)
+            traces.append(
+                dict(
+                    type="scatter3d",
+                    x=edges_x,
+                    y=edges_y,
+                    z=edges_z,
+                    mode="lines",
+                    line=dict(color="black", width=width),
+                    opacity=0.4,
+                    name="Cluster edges",
+                    hoverinfo="skip",
+                    showlegend=False,
+                )
+            )
+        return traces
+
+    def _make_node_trace(self) -> TraceDict:
+        """One marker per cluster, sized by the square root of its number of members"""
+        smallest, largest = self.MARKER_SIZES
+        marker_sizes = smallest + (largest - smallest) * np.sqrt(
+            self.sizes / self.sizes.max()
+        )
+        return dict(
+            type="scatter3d",
+            x=self.positions[:, 0],
+            y=self.positions[:, 1],
+            z=self.positions[:, 2],
+            mode="markers+text",
+            marker=dict(color="black", size=marker_sizes),
+            text=self.names,
+            textposition="top center",
+            hovertext=[
+                f"{name}: {size} linear orders"
+                for name, size in zip(self.names, self.sizes.tolist())
+            ],
+            hoverinfo="text",
+            name="Clusters",
+            showlegend=False,
+        )
+
+    def get_figure_dict(self) -> FigureDict:
+        """Gets the figure of the clusters as plain dicts and NumPy arrays, like PosetVisualizer.get_figure_dict"""
+        return {
+            "data": [*self._make_edge_traces(), self._make_node_trace()],
+            "layout": PosetVisualizer._get_layout_dict(),
+        }
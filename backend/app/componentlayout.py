@@ -0,0 +1,230 @@
+import hashlib
+import multiprocessing
+import multiprocessing.util
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Literal
+
+import numpy as np
+from scipy.sparse.csgraph import connected_components
+
+from numpy.typing import NDArray
+from app.classes import *
+from app.componentpacking import ComponentPacking
+from app.permutationtables import PermutationTables
+from app.posetlayout import PosetLayout
+
+
+def _layout_component(
+    engine: Literal["spring", "multilevel"],
+    nodes: list[LinearOrder],
+    seed: int,
+    time_budget: float | None,
+) -> tuple[NDArray[np.float64], int]:
+    """Lay out one connected component. Runs in a worker process of ComponentLayout."""
+    return PosetLayout.force_directed(engine, nodes, seed, time_budget)
+
+
+class ComponentLayout:
+    """Force-directed layout of an ATG one connected component at a time
+
+    Components do not interact, so laying them out as one system only wastes iterations pushing them apart.
+    Each component is laid out on its own, seeded by a hash of its content so that the result does not depend on the other components,
+    and the components are then packed side by side. Large components are laid out in parallel in a process pool,
+    and recent component layouts are cached by the same hash, so redrawing a changed upsilon only lays out the components that changed.
+    """
+
+    ENGINES = ("spring", "multilevel")
+
+    # smaller components are laid out in this process, where they are faster than the round trip to a worker
+    PARALLEL_MIN_SIZE = 1000
+
+    _default: "ComponentLayout | None" = None
+
+    def __init__(self, max_workers: int | None = None, cache_size: int = 256):
+        """
+        Args:
+            max_workers: The number of worker processes for large components. Defaults to default_max_workers(). 1 lays out everything in this process.
+            cache_size: The number of component layouts kept
+        """
+        self.max_workers: int = max_workers or self.default_max_workers()
+        self.cache_size = cache_size
+
+        if self.max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+
+        self._cache: OrderedDict[str, tuple[NDArray[np.float64], int]] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ComponentLayout":
+        """Create a component layout configured by ATG_LAYOUT_WORKERS and ATG_LAYOUT_CACHE_SIZE"""
+        max_workers = os.environ.get("ATG_LAYOUT_WORKERS")
+        cache_size = os.environ.get("ATG_LAYOUT_CACHE_SIZE", "256")
+        return cls(
+            max_workers=int(max_workers) if max_workers else None,
+            cache_size=int(cache_size),
+        )
+
+    @staticmethod
+    def default_max_workers() -> int:
+        """The number of cores, or inside a worker process, e.g. of a ComputeExecutor, its share of them
+
+        Every compute worker lays out its own graphs, so a pool of all cores in each of them would start cores^2 processes.
+        The cores are divided among the ATG_COMPUTE_WORKERS instead, which leaves 1, laying out in the worker itself, by default.
+        """
+        cores = os.cpu_count() or 1
+        if multiprocessing.parent_process() is None:
+            return cores
+        compute_workers = os.environ.get("ATG_COMPUTE_WORKERS")
+        return max(1, cores // (int(compute_workers) if compute_workers else cores))
+
+    @classmethod
+    def get_default(cls) -> "ComponentLayout":
+        """The component layout shared by everything in this process"""
+        if cls._default is None:
+            cls._default = cls.from_env()
+        return cls._default
+
+    @staticmethod
+    def content_hash(engine: str, nodes: list[LinearOrder]) -> str:
+        """A key identifying the layout of a component, independent of the order of its nodes"""
+        digest = hashlib.sha256(engine.encode())
+        for node in sorted(nodes):
+            digest.update(b"\0" + node.encode())
+        return digest.hexdigest()
+
+    def layout(
+        self,
+        engine: Literal["spring", "multilevel"],
+        nodes: list[LinearOrder],
+        time_budget: float | None = None,
+    ) -> tuple[NDArray[np.float64], int]:
+        """Lay out each connected component of the ATG on nodes and pack them
+
+        Args:
+            engine: "spring" or "multilevel"
+            nodes: Distinct linear orders of equal length
+            time_budget: Seconds the multilevel layout may spend refining, shared by the components laid out in this process. Defaults to None; MULTILEVEL_TIME_BUDGET.
+
+        Returns:
+            tuple[NDArray[np.float64], int]: A len(nodes) x 3 array of positions in the order of nodes, scaled to [-1, 1],
+                and the most iterations any component needed
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(
+                f"Invalid force-directed layout engine {engine!r}. Must be one of {self.ENGINES}."
+            )
+        if len(nodes) <= 1:
+            return np.zeros((len(nodes), 3)), 0
+        if time_budget is None and engine == "multilevel":
+            time_budget = PosetLayout.MULTILEVEL_TIME_BUDGET
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+
+        # Section: Split into connected components, each with its nodes sorted so that cached layouts line up
+        adjacency = PermutationTables.adjacency(PermutationTables.to_digits(nodes))
+        n_components, labels = connected_components(adjacency, directed=False)
+        components: list[list[int]] = [[] for _ in range(n_components)]
+        for index in sorted(range(len(nodes)), key=nodes.__getitem__):
+            components[labels[index]].append(index)
+        component_nodes = [
+            [nodes[index] for index in component] for component in components
+        ]
+        keys = [
+            self.content_hash(engine, member_nodes) for member_nodes in component_nodes
+        ]
+
+        # Section: Lay out the components missing from the cache, the large ones in parallel
+        layouts: dict[str, tuple[NDArray[np.float64], int]] = {}
+        with self._cache_lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    layouts[key] = self._cache[key]
+
+        missing = {
+            key: member_nodes
+            for key, member_nodes in zip(keys, component_nodes)
+            if key not in layouts
+        }
+        large = [
+            key
+            for key, member_nodes in missing.items()
+            if len(member_nodes) >= self.PARALLEL_MIN_SIZE
+        ]
+        futures: dict[str, Future] = {}
+        if self.max_workers > 1 and len(large) > 1:
+            pool = self._get_pool()
+            for key in large:
+                futures[key] = pool.submit(
+                    _layout_component,
+                    engine,
+                    missing[key],
+                    self._seed(key),
+                    time_budget,
+                )
+
+        for key, member_nodes in missing.items():
+            if key in futures:
+                continue
+            remaining = (
+                None if deadline is None else max(deadline - time.perf_counter(), 0)
+            )
+            layouts[key] = _layout_component(
+                engine, member_nodes, self._seed(key), remaining
+            )
+        for key, future in futures.items():
+            layouts[key] = future.result()
+
+        with self._cache_lock:
+            for key in missing:
+                self._cache[key] = layouts[key]
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        # Section: Pack
+        iterations = max(layouts[key][1] for key in keys)
+        pos = np.zeros((len(nodes), 3))
+        if n_components == 1:
+            pos[components[0]] = layouts[keys[0]][0]
+            return pos, iterations
+
+        # layouts are scaled to [-1, 1], so give every component a volume proportional to its size instead
+        scaled = [
+            layouts[key][0] * len(component) ** (1 / 3)
+            for key, component in zip(keys, components)
+        ]
+        for component, packed in zip(components, ComponentPacking.pack(scaled)):
+            pos[component] = packed
+        limit = np.abs(pos).max()
+        if limit > 0:
+            pos /= limit
+        return pos, iterations
+
+    @staticmethod
+    def _seed(key: str) -> int:
+        return int(key[:8], 16)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                # unlike atexit, also run when this is a worker process exiting, e.g. on ComputeExecutor.shutdown
+                multiprocessing.util.Finalize(None, self.shutdown, exitpriority=0)
+            return self._pool
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._pool_lock:
+            pool = self._pool
+            self._pool = None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,54 @@
+import numpy as np
+
+from numpy.typing import NDArray
+
+
+class ComponentPacking:
+    """Arrange separately computed layouts of connected components side by side in 3D without overlaps"""
+
+    @staticmethod
+    def pack(
+        layouts: list[NDArray[np.float64]], gap: float = 1.0
+    ) -> list[NDArray[np.float64]]:
+        """Translate component layouts so that their bounding boxes do not overlap
+
+        Boxes are placed largest first in rows along x, rows are stacked along y and full layers along z,
+        so that the arrangement stays roughly cubic. The result is deterministic and centered at the origin.
+
+        Args:
+            layouts: The k x 3 positions of each component, in their own coordinates
+            gap: The minimum distance between the bounding boxes of two components
+
+        Returns:
+            list[NDArray[np.float64]]: The translated positions, in the order of layouts
+        """
+        if not layouts:
+            return []
+
+        lows = np.array(
+            [layout.min(axis=0) if len(layout) else np.zeros(3) for layout in layouts]
+        )
+        highs = np.array(
+            [layout.max(axis=0) if len(layout) else np.zeros(3) for layout in layouts]
+        )
+        extents = highs - lows + gap
+        side = max(np.prod(extents, axis=1).sum() ** (1 / 3), extents[:, 0].max())
+
+        corners = np.zeros((len(layouts), 3))
+        x = y = z = row_height = layer_depth = 0.0
+        for index in np.argsort(-np.prod(extents, axis=1), kind="stable"):
+            width, height, depth = extents[index]
+            if x > 0 and x + width > side:
+                x, y, row_height = 0.0, y + row_height, 0.0
+            if y > 0 and y + height > side:
+                y, z, layer_depth = 0.0, z + layer_depth, 0.0
+            corners[index] = (x, y, z)
+            x += width
+            row_height = max(row_height, height)
+            layer_depth = max(layer_depth, depth)
+
+        packed = [
+            layout - low + corner for layout, low, corner in zip(layouts, lows, corners)
+        ]
+        center = (corners.min(axis=0) + (corners + extents - gap).max(axis=0)) / 2
+        return [layout - center for layout in packed]
@@ -0,0 +1,119 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+
+class ComputeExecutorSaturated(Exception):
+    """Raised when the compute executor has no free worker and its queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            f"Server is busy. Please retry in {retry_after} second{'s' if retry_after != 1 else ''}."
+        )
+        self.retry_after = retry_after
+
+
+class ComputeExecutor:
+    """A bounded process pool for CPU-bound work such as graph drawing and poset cover solving.
+
+    At most max_workers jobs run at the same time and at most max_queue jobs wait for a free worker.
+    Submitting while both are full fails fast with ComputeExecutorSaturated instead of piling up requests.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        max_queue: int | None = None,
+        retry_after: int = 1,
+    ):
+        """
+        Args:
+            max_workers: The number of worker processes. Defaults to the number of cores.
+            max_queue: The number of jobs allowed to wait for a worker. Defaults to twice max_workers.
+            retry_after: The number of seconds clients are told to wait when the executor is saturated.
+        """
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self.max_queue: int = self.max_workers * 2 if max_queue is None else max_queue
+        self.retry_after = retry_after
+
+        if self.max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        if self.max_queue < 0:
+            raise ValueError("max_queue must not be negative.")
+
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ComputeExecutor":
+        """Create an executor configured by ATG_COMPUTE_WORKERS, ATG_COMPUTE_QUEUE_SIZE and ATG_COMPUTE_RETRY_AFTER"""
+        max_workers = os.environ.get("ATG_COMPUTE_WORKERS")
+        max_queue = os.environ.get("ATG_COMPUTE_QUEUE_SIZE")
+        retry_after = os.environ.get("ATG_COMPUTE_RETRY_AFTER", "1")
+        return cls(
+            max_workers=int(max_workers) if max_workers else None,
+            max_queue=int(max_queue) if max_queue else None,
+            retry_after=int(retry_after),
+        )
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Forget a broken pool so that the next submission starts a fresh one"""
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Submit fn(*args) to a worker process.
+
+        Raises:
+            ComputeExecutorSaturated: All workers are busy and the queue is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise ComputeExecutorSaturated(self.retry_after)
+
+        try:
+            pool = self._get_pool()
+            try:
+                future = pool.submit(fn, *args)
+            except BrokenProcessPool:
+                self._discard_pool(pool)
+                pool = self._get_pool()
+                future = pool.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        # the slot is held until the job actually finishes, even if the caller stops waiting for it
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(*args) in a worker process without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    @property
+    def in_flight(self) -> int:
+        """The number of jobs currently running or waiting for a worker"""
+        return self.max_workers + self.max_queue - self._slots._value
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._pool_lock:
+            pool = self._pool
+            self._pool = None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
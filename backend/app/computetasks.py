@@ -0,0 +1,213 @@
+"""CPU-bound work run inside the worker processes of a ComputeExecutor.
+
+Everything here must be importable by a freshly spawned interpreter and must only take and return picklable values.
+"""
+
+from app.classes import *
+from app.clusterview import ClusterView
+from app.figurejson import FigureJson
+from app.linearextensionbudget import LinearExtensionBudget
+from app.posetsolver import PosetSolver
+from app.posetutils import PosetUtils
+from app.posetvisualizer import PosetVisualizer
+from app.schemas import ClusterExpandRequest, ClusterRequest, GraphRequest
+from app.visualizercache import VisualizerCache
+
+
+def build_graph_visualizer(graphRequest: GraphRequest) -> tuple[PosetVisualizer, bool]:
+    """Build the visualizer requested by a GraphRequest, reusing a cached one that only differs in its highlight
+
+    Returns:
+        tuple[PosetVisualizer, bool]: The visualizer and whether it came from the VisualizerCache of this process
+    """
+    level_of_detail = (
+        PosetVisualizer.DEFAULT_LEVEL_OF_DETAIL
+        if graphRequest.level_of_detail
+        else None
+    )
+    size = graphRequest.size
+    drawing_method = graphRequest.drawing_method
+    layout_engine = graphRequest.layout_engine
+    if size < 2 or size > PosetVisualizer.MAX_SIZE:
+        raise ValueError(f"Size must be between 2 and {PosetVisualizer.MAX_SIZE}.")
+
+    if graphRequest.input_mode == "Linear Orders":
+        selected_nodes = graphRequest.selected_nodes
+        highlighted_nodes = graphRequest.highlighted_nodes
+    elif graphRequest.input_mode == "Poset":
+        cover_relation = graphRequest.cover_relation
+
+        # count before enumerating, so that a sparse relation of a large size cannot take the worker down
+        budget = LinearExtensionBudget.get_default()
+        count = budget.check(cover_relation, size)
+        if budget.route(count) == "level_of_detail":
+            level_of_detail = PosetVisualizer.DEFAULT_LEVEL_OF_DETAIL
+            if graphRequest.layout_engine in (None, "spring"):
+                layout_engine = "permutahedron"
+        selected_nodes = budget.linear_extensions(cover_relation, size, count)
+        highlighted_nodes = []
+    else:
+        raise ValueError(f"Invalid input_mode value.")
+
+    key = VisualizerCache.key(
+        size,
+        selected_nodes,
+        drawing_method,
+        layout_engine,
+        level_of_detail,
+    )
+    visualizer, cache_hit = VisualizerCache.get_default().get_or_build(
+        key,
+        lambda: PosetVisualizer(
+            size,
+            selected_nodes,
+            highlighted_nodes,
+            drawing_method,
+            layout_engine,
+            level_of_detail,
+        ),
+    )
+    if cache_hit:
+        # no selected nodes means every linear order, which the cached visualizer already selects
+        visualizer.select_and_highlight_nodes(
+            selected_nodes or visualizer.selected_nodes, highlighted_nodes
+        )
+    return visualizer, cache_hit
+
+
+def graph_info(visualizer: PosetVisualizer) -> dict:
+    """How the figure of a visualizer was drawn, sent along with it as its "info" field"""
+    return {
+        "layoutEngine": visualizer.layout_info["engine"],
+        "layoutIterations": visualizer.layout_info["iterations"],
+        "levelOfDetail": visualizer.level_of_detail_info,
+    }
+
+
+def visualizer_cache_header(cache_hit: bool) -> str:
+    """The X-Visualizer-Cache header of a response drawn by this process, e.g. "hit; hits=1; misses=1; ..."
+
+    The statistics of the VisualizerCache of the worker are sent as a header rather than in the figure,
+    which the GraphCache keeps and replays long after they change.
+    """
+    stats = VisualizerCache.get_default().stats()
+    return "; ".join(
+        ["hit" if cache_hit else "miss"]
+        + [f"{name}={value}" for name, value in stats.items()]
+    )
+
+
+def build_graph_json(graphRequest: GraphRequest) -> tuple[str, str]:
+    """Build the figure requested by a GraphRequest and serialize it to JSON
+
+    Returns:
+        tuple[str, str]: The figure JSON and its X-Visualizer-Cache header
+    """
+    visualizer, cache_hit = build_graph_visualizer(graphRequest)
+    fig_json = FigureJson.dumps(
+        {
+            **visualizer.get_figure_dict(graphRequest.coordinate_dtype),
+            "info": graph_info(visualizer),
+        }
+    )
+    return fig_json, visualizer_cache_header(cache_hit)
+
+
+def build_cluster_view(clusterRequest: ClusterRequest) -> ClusterView:
+    return ClusterView(
+        clusterRequest.size,
+        clusterRequest.selected_nodes,
+        clusterRequest.cluster_by,
+        clusterRequest.prefix_length,
+        clusterRequest.posets,
+    )
+
+
+def build_cluster_json(clusterRequest: ClusterRequest) -> str:
+    """Build the figure of the clusters requested by a ClusterRequest and serialize it to JSON, along with the clusters and their edges"""
+    view = build_cluster_view(clusterRequest)
+    return FigureJson.dumps(
+        {
+            **view.get_figure_dict(),
+            "clusters": view.clusters,
+            "clusterEdges": view.cluster_edges,
+        }
+    )
+
+
+def build_cluster_expand_json(
+    clusterExpandRequest: ClusterExpandRequest,
+) -> tuple[str, str]:
+    """Build the figure of the linear orders of one cluster, laying out only them, and serialize it to JSON
+
+    Returns:
+        tuple[str, str]: The figure JSON and its X-Visualizer-Cache header
+    """
+    view = build_cluster_view(clusterExpandRequest)
+    members = view.expand(clusterExpandRequest.cluster)
+    member_set = set(members)
+    graphRequest = GraphRequest(
+        input_mode="Linear Orders",
+        drawing_method="Default",
+        size=clusterExpandRequest.size,
+        selected_nodes=members,
+        highlighted_nodes=[
+            node
+            for node in clusterExpandRequest.highlighted_nodes
+            if node in member_set
+        ],
+        layout_engine=clusterExpandRequest.layout_engine,
+        coordinate_dtype=clusterExpandRequest.coordinate_dtype,
+        level_of_detail=clusterExpandRequest.level_of_detail,
+    )
+    visualizer, cache_hit = build_graph_visualizer(graphRequest)
+    fig_json = FigureJson.dumps(
+        {
+            **visualizer.get_figure_dict(graphRequest.coordinate_dtype),
+            "info": {
+                **graph_info(visualizer),
+                "cluster": view.clusters[clusterExpandRequest.cluster],
+            },
+        }
+    )
+    return fig_json, visualizer_cache_header(cache_hit)
+
+
+def solve_poset_cover(
+    upsilon: list[LinearOrder],
+    k: int | None = None,
+    progress: SolveProgressCallback | None = None,
+) -> dict[str, list]:
+    """Find a minimum poset cover of upsilon, or a cover of at most k posets if k is given
+
+    Returns an empty dict if no cover of at most k posets exists.
+    """
+    if k is None:
+        result_linear_orders = PosetSolver.minimum_poset_cover(
+            upsilon, progress=progress
+        )
+    else:
+        result_linear_orders = PosetSolver.k_poset_cover(upsilon, k)
+        if result_linear_orders is None:
+            return {}
+
+    result_posets = [
+        PosetUtils.get_partial_order_of_convex(leg) for leg in result_linear_orders
+    ]
+    return {
+        "resultPosets": result_posets,
+        "resultLinearOrders": result_linear_orders,
+    }
+
+
+def verify_poset_cover(
+    upsilon: list[LinearOrder], posets: list[PartialOrder | CoverRelation]
+) -> dict[str, bool | str | int | None]:
+    """Check that posets form a poset cover of upsilon"""
+    verification = PosetSolver.verify_cover(upsilon, posets)
+    return {
+        "isValid": verification["is_valid"],
+        "reason": verification["reason"],
+        "posetIndex": verification["poset_index"],
+        "violatingOrder": verification["violating_order"],
+    }
@@ -0,0 +1,123 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import orjson
+
+from app.schemas import GraphRequest
+
+
+class GraphCacheEntry:
+    """A cached /graph response body, and its gzip encoding once a client has asked for it"""
+
+    def __init__(self, etag: str, body: bytes):
+        self.etag = etag
+        self.body = body
+        self.gzip_body: bytes | None = None
+
+
+class GraphCache:
+    """A small LRU cache of /graph responses keyed by a hash of the normalized request
+
+    The figure drawn for a GraphRequest only depends on the request, so the hash doubles as the ETag of the response.
+    Conditional requests with a matching If-None-Match are answered with 304 without drawing anything,
+    and repeated requests are served from the cache, already gzip-compressed for clients that accept it.
+    """
+
+    # bump when the figure drawn for a request changes, so that clients do not keep stale figures
+    VERSION = 1
+
+    # smaller bodies are sent uncompressed, where gzip saves too little to be worth it
+    GZIP_MIN_SIZE = 1000
+    GZIP_LEVEL = 6
+
+    def __init__(self, max_entries: int = 32):
+        """
+        Args:
+            max_entries: The number of responses kept. 0 disables the cache, but not the ETags.
+        """
+        if max_entries < 0:
+            raise ValueError("max_entries must not be negative.")
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, GraphCacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "GraphCache":
+        """Create a cache configured by ATG_GRAPH_CACHE_SIZE"""
+        return cls(max_entries=int(os.environ.get("ATG_GRAPH_CACHE_SIZE", "32")))
+
+    @staticmethod
+    def etag(graphRequest: GraphRequest) -> str:
+        """The ETag of the response to a request. Fields that the input mode ignores do not change it."""
+        request = graphRequest.model_dump()
+        if request["input_mode"] == "Linear Orders":
+            request.pop("cover_relation")
+        else:
+            request.pop("selected_nodes")
+            request.pop("highlighted_nodes")
+        request["version"] = GraphCache.VERSION
+        digest = hashlib.sha256(
+            json.dumps(request, sort_keys=True, separators=(",", ":")).encode()
+        )
+        return f'"{digest.hexdigest()[:32]}"'
+
+    @staticmethod
+    def matches(etag: str, if_none_match: str | None) -> bool:
+        """Whether an If-None-Match header matches the ETag, comparing weakly as RFC 9110 requires"""
+        if not if_none_match:
+            return False
+        candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+        return "*" in candidates or any(
+            candidate.removeprefix("W/") == etag for candidate in candidates
+        )
+
+    def get(self, etag: str) -> GraphCacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is not None:
+                self._entries.move_to_end(etag)
+            return entry
+
+    def put(self, etag: str, fig_json: str) -> GraphCacheEntry:
+        """Cache the figure JSON built for the request with this ETag, encoded as the response body"""
+        # the body is the figure JSON as a JSON string, like JSONResponse(content=fig_json)
+        entry = GraphCacheEntry(etag, orjson.dumps(fig_json))
+        if self.max_entries == 0:
+            return entry
+        with self._lock:
+            self._entries[etag] = entry
+            self._entries.move_to_end(etag)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def accepts_gzip(accept_encoding: str | None) -> bool:
+        if not accept_encoding:
+            return False
+        for coding in accept_encoding.split(","):
+            name, _, params = coding.partition(";")
+            if name.strip().lower() in ("gzip", "*"):
+                return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00")
+        return False
+
+    def encode(
+        self, entry: GraphCacheEntry, accept_encoding: str | None
+    ) -> tuple[bytes, str | None]:
+        """The body to send for the Accept-Encoding of a request, and its Content-Encoding if compressed
+
+        Compresses at most once per entry. Compression of large bodies takes a while, so call this off the event loop.
+        """
+        if len(entry.body) < self.GZIP_MIN_SIZE or not self.accepts_gzip(
+            accept_encoding
+        ):
+            return entry.body, None
+        if entry.gzip_body is None:
+            entry.gzip_body = gzip.compress(
+                entry.body, compresslevel=self.GZIP_LEVEL, mtime=0
+            )
+        return entry.gzip_body, "gzip"
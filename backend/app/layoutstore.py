@@ -0,0 +1,235 @@
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from numpy.typing import NDArray
+from app.classes import *
+from app.permutationtables import PermutationTables
+from app.posetlayout import PosetLayout
+
+
+class LayoutStore:
+    """Precomputed tables indexed by permutation rank, persisted as memory-mapped .npy files
+
+    Every table of size n, such as the permutahedron coordinates or the digits of every linear order, is computed once,
+    saved as an n! x k array indexed by permutation rank, and memory-mapped read-only. Drawing any set of nodes is then a gather of their rows.
+    Worker processes, including uvicorn workers, mapping the same file share its pages through the OS page cache,
+    so a table is held in memory once however many processes use it.
+    """
+
+    # bump when PosetLayout.permutahedron or a table changes so that stale files are not reused
+    VERSION = 1
+
+    # the largest size of a table, that of the largest ATG drawn. A table of size 10 would have 10! rows.
+    MAX_SIZE = 9
+
+    # table name to a function computing it from the digits of all linear orders of a size, in rank order
+    TABLES: dict[str, Callable[[NDArray[np.uint8]], NDArray]] = {
+        "permutahedron": lambda digits: PosetLayout.permutahedron_coordinates(
+            PermutationTables.to_linear_orders(digits)
+        ),
+        "digits": lambda digits: digits,
+        "neighbors": lambda digits: PermutationTables.neighbor_ranks(digits).astype(
+            np.int32
+        ),
+        # linear orders as fixed-width ASCII strings, e.g. b'2134'
+        "orders": lambda digits: np.ascontiguousarray(digits + ord("0")).view(
+            f"S{digits.shape[1]}"
+        )[:, 0],
+    }
+
+    _default: "LayoutStore | None" = None
+
+    def __init__(self, directory: str | None = None):
+        """
+        Args:
+            directory: Where the .npy files are kept. Defaults to ATG_LAYOUT_STORE_DIR, else a directory in the system's temporary directory.
+        """
+        self.directory = directory or os.environ.get(
+            "ATG_LAYOUT_STORE_DIR",
+            os.path.join(tempfile.gettempdir(), "atg-visualizer-layouts"),
+        )
+        self._tables: dict[tuple[str, int], NDArray] = {}
+        # reentrant, as a table may be computed from the digits table
+        self._lock = threading.RLock()
+
+    @classmethod
+    def get_default(cls) -> "LayoutStore":
+        """The store shared by everything in this process"""
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    def path(self, size: int, name: str = "permutahedron") -> str:
+        return os.path.join(self.directory, f"{name}-n{size}-v{self.VERSION}.npy")
+
+    def table(self, name: str, size: int) -> NDArray:
+        """The read-only table of every linear order of length size, indexed by rank. Computed and saved by the first process asking for it."""
+        table = self._tables.get((name, size))
+        if table is not None:
+            return table
+
+        with self._lock:
+            if (name, size) not in self._tables:
+                path = self.path(size, name)
+                if not os.path.exists(path):
+                    self._save(name, size, path)
+                self._tables[name, size] = np.load(path, mmap_mode="r")
+            return self._tables[name, size]
+
+    def positions(self, size: int) -> NDArray[np.float64]:
+        """The read-only n! x 3 positions of every linear order of length size, indexed by rank"""
+        return self.table("permutahedron", size)
+
+    def digits(self, size: int) -> NDArray[np.uint8]:
+        """The read-only n! x n digits of every linear order of length size, row i having rank i, see PermutationTables.all_digits"""
+        return self.table("digits", size)
+
+    def neighbors(self, size: int) -> NDArray[np.int32]:
+        """The read-only n! x (n-1) ranks of the adjacent transpositions of every linear order, see PermutationTables.neighbor_ranks"""
+        return self.table("neighbors", size)
+
+    def linear_orders(
+        self, size: int, ranks: NDArray[np.int64] | None = None
+    ) -> list[LinearOrder]:
+        """The linear orders of length size with the given ranks, by default all of them in rank order"""
+        orders = self.table("orders", size)
+        if ranks is not None:
+            orders = orders[ranks]
+        return orders.astype(str).tolist()
+
+    def swap(
+        self, linear_orders: list[LinearOrder], positions: list[int] | NDArray[np.int64]
+    ) -> list[LinearOrder]:
+        """The linear orders with positions i and i+1 swapped, for every linear order and its position i, looked up in the neighbors table"""
+        if not linear_orders:
+            return []
+        ranks = PermutationTables.rank_linear_orders(linear_orders)
+        size = len(linear_orders[0])
+        return self.linear_orders(size, self.neighbors(size)[ranks, positions])
+
+    def neighbors_of(self, linear_order: LinearOrder) -> list[LinearOrder]:
+        """The n-1 adjacent transpositions of a linear order, swapping positions 0 and 1 first"""
+        size = len(linear_order)
+        rank = PermutationTables.rank_linear_orders([linear_order])[0]
+        return self.linear_orders(size, self.neighbors(size)[rank])
+
+    def adjacent_transpositions(
+        self, digits: NDArray[np.uint8]
+    ) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.uint8]]:
+        """The edges of the ATG on the given distinct permutations, see PermutationTables.adjacent_transpositions,
+        with the neighbors looked up in the neighbors table instead of ranked. O(V*n^2 + V*n*log V) for the ranks only.
+        """
+        n_nodes = len(digits)
+        n = digits.shape[1] if digits.ndim == 2 else 0
+        if n_nodes == 0 or n < 2:
+            return (
+                np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.int64),
+                np.empty((0, 2), dtype=np.uint8),
+            )
+        ranks = PermutationTables.rank(digits)
+        order = np.argsort(ranks)
+        sorted_ranks = ranks[order]
+
+        neighbor_ranks = self.neighbors(n)[ranks]
+        found = np.minimum(np.searchsorted(sorted_ranks, neighbor_ranks), n_nodes - 1)
+        neighbors = order[found]
+        # every edge is found from both ends, keep it once
+        present = (sorted_ranks[found] == neighbor_ranks) & (
+            np.arange(n_nodes)[:, np.newaxis] < neighbors
+        )
+        firsts, positions = np.nonzero(present)
+        seconds = neighbors[firsts, positions]
+        swapped = np.sort(
+            np.stack(
+                [digits[firsts, positions], digits[firsts, positions + 1]], axis=1
+            ),
+            axis=1,
+        )
+        # np.nonzero already orders by first, then by position
+        edge_order = np.lexsort((seconds, firsts))
+        return firsts[edge_order], seconds[edge_order], swapped[edge_order]
+
+    def publish(self, max_size: int | None = None) -> None:
+        """Compute and save every table up to max_size that is missing, e.g. once at startup, so that workers only map them
+
+        Args:
+            max_size: The largest size published. Defaults to ATG_LAYOUT_STORE_MAX_SIZE, else MAX_SIZE.
+        """
+        if max_size is None:
+            max_size = int(
+                os.environ.get("ATG_LAYOUT_STORE_MAX_SIZE", str(self.MAX_SIZE))
+            )
+        for size in range(2, max_size + 1):
+            for name in self.TABLES:
+                self.table(name, size)
+
+    def _save(self, name: str, size: int, path: str) -> None:
+        """Compute a table and publish it atomically, so concurrent writers never expose a partial file"""
+        digits = (
+            PermutationTables.all_digits(size)
+            if name == "digits"
+            else self.digits(size)
+        )
+        table = self.TABLES[name](digits)
+
+        os.makedirs(self.directory, exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "wb") as f:
+            np.save(f, table)
+        os.replace(temporary_path, path)
+
+    def cleanup(self) -> list[str]:
+        """Delete the tables of other versions and the partial files of processes that died while writing, e.g. on a restart
+
+        Files that cannot be deleted are left alone.
+
+        Returns:
+            list[str]: The names of the deleted files
+        """
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+
+        current_suffix = f"-v{self.VERSION}.npy"
+        deleted = []
+        for name in names:
+            if name.endswith(".tmp"):
+                # {table}.{pid}.{thread}.tmp, see _save
+                pid = name.rsplit(".", 3)[-3]
+                stale = not pid.isdigit() or not self._is_running(int(pid))
+            else:
+                stale = (
+                    name.endswith(".npy")
+                    and "-v" in name
+                    and not name.endswith(current_suffix)
+                )
+            if stale:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    # already deleted by another worker, or owned by another user of a shared directory
+                    continue
+                deleted.append(name)
+        return deleted
+
+    @staticmethod
+    def _is_running(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def gather(self, nodes: list[LinearOrder]) -> NDArray[np.float64]:
+        """The positions of nodes, a len(nodes) x 3 array in the order of nodes"""
+        if not nodes:
+            return np.empty((0, 3))
+        ranks = PermutationTables.rank_linear_orders(nodes)
+        return self.positions(len(nodes[0]))[ranks]
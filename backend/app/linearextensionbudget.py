@@ -0,0 +1,103 @@
+import os
+from typing import Literal
+
+from app.classes import *
+from app.layoutstore import LayoutStore
+from app.permutationtables import PermutationTables
+from app.posetutils import PosetUtils
+
+type LinearExtensionRoute = Literal["full", "level_of_detail"]
+
+
+class LinearExtensionBudgetExceeded(ValueError):
+    """Raised when a poset has more linear extensions than may be drawn"""
+
+    def __init__(self, count: int, max_count: int):
+        super().__init__(
+            f"The poset has {count} linear extensions, more than the {max_count} that can be drawn. "
+            "Add relations, or draw it with /graph/clusters."
+        )
+        self.count = count
+        self.max_count = max_count
+
+    def __reduce__(self):
+        # raised in compute workers, so it has to survive pickling back to the server
+        return (type(self), (self.count, self.max_count))
+
+
+class LinearExtensionBudget:
+    """A pre-flight for drawing a poset, which counts its linear extensions before enumerating any of them
+
+    Counting takes a dynamic program over at most 2^9 subsets, see PosetUtils.count_linear_extensions, and also detects cycles.
+    Posets with more than max_count linear extensions are refused, posets with more than max_full are drawn with the
+    level of detail and permutahedron coordinates instead of a force-directed layout of every node and label.
+    """
+
+    _default: "LinearExtensionBudget | None" = None
+
+    # from this many linear extensions, filtering all permutations is faster than listing topological sorts
+    FILTER_MIN_COUNT = 5040
+
+    def __init__(self, max_full: int = 5040, max_count: int = 40320):
+        """
+        Args:
+            max_full: The most linear extensions drawn in full.
+            max_count: The most linear extensions drawn at all.
+        """
+        if max_full < 0 or max_count < 0:
+            raise ValueError("Budgets must not be negative.")
+        self.max_full = max_full
+        self.max_count = max_count
+
+    @classmethod
+    def from_env(cls) -> "LinearExtensionBudget":
+        """Create a budget configured by ATG_POSET_MAX_FULL and ATG_POSET_MAX_LINEAR_EXTENSIONS"""
+        return cls(
+            max_full=int(os.environ.get("ATG_POSET_MAX_FULL", "5040")),
+            max_count=int(os.environ.get("ATG_POSET_MAX_LINEAR_EXTENSIONS", "40320")),
+        )
+
+    @classmethod
+    def get_default(cls) -> "LinearExtensionBudget":
+        """The budget shared by everything in this process"""
+        if cls._default is None:
+            cls._default = cls.from_env()
+        return cls._default
+
+    def check(self, cover_relation: CoverRelation, size: int) -> int:
+        """The number of linear extensions of a poset, if it may be drawn
+
+        Raises:
+            ValueError: The relation contains a cycle or a node outside of 1 to size.
+            LinearExtensionBudgetExceeded: The poset has more than max_count linear extensions.
+        """
+        sequence = "".join(map(str, range(1, size + 1)))
+        count = PosetUtils.count_linear_extensions(cover_relation, sequence)
+        if count == 0:
+            raise ValueError("The cover relation contains a cycle.")
+        if count > self.max_count:
+            raise LinearExtensionBudgetExceeded(count, self.max_count)
+        return count
+
+    def route(self, count: int) -> LinearExtensionRoute:
+        """How a poset with count linear extensions is drawn"""
+        return "full" if count <= self.max_full else "level_of_detail"
+
+    @staticmethod
+    def linear_extensions(
+        cover_relation: CoverRelation, size: int, count: int
+    ) -> LinearExtensions:
+        """The linear extensions of a poset with count of them, sorted
+
+        Few extensions are listed as topological sorts. Many are found by filtering all size! permutations at once,
+        which are already sorted.
+        """
+        if count < LinearExtensionBudget.FILTER_MIN_COUNT:
+            sequence = "".join(map(str, range(1, size + 1)))
+            return PosetUtils.get_linear_extensions_from_relation(
+                cover_relation, sequence
+            )
+        digits = LayoutStore.get_default().digits(size)
+        return PermutationTables.to_linear_orders(
+            digits[PermutationTables.extends(digits, cover_relation)]
+        )
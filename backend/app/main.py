@@ -1,41 +1,75 @@
+import asyncio
+import importlib
 import json
-from fastapi import FastAPI, HTTPException, Query
+import os
+from contextlib import asynccontextmanager
+from fastapi import (
+    FastAPI,
+    HTTPException,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import Literal
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import ValidationError
+
+from app.computeexecutor import ComputeExecutor, ComputeExecutorSaturated
+from app.graphcache import GraphCache
+from app.schemas import (
+    ClusterExpandRequest,
+    ClusterRequest,
+    GraphRequest,
+    GraphData,
+    SessionUpdate,
+    SolveJobRequest,
+    VerifyRequest,
+)
+from app.solvejobs import SolveJobManager
 
-import plotly.graph_objects as go
-import plotly.io as pio
+# app.computetasks and app.visualizersession pull in NumPy, SciPy, networkx and plotly. They are imported on first use
+# and preloaded in the background once the server is up, so that a cold start does not wait for them.
+PRELOADED_MODULES = ("app.computetasks", "app.visualizersession")
 
-from app.posetvisualizer import PosetVisualizer
-from app.posetsolver import PosetSolver
-from app.posetutils import PosetUtils
 
+def preload() -> None:
+    """Import the drawing and solving code, and publish the tables of the LayoutStore once for every worker to map
 
-class GraphRequest(BaseModel):
-    input_mode: Literal["Linear Orders", "Poset"]
-    drawing_method: Literal[
-        "Default",
-        "Permutahedron",
-        "Supercover",
-        "SuperHex",
-    ]
-    size: int
-    selected_nodes: list[str] = []
-    highlighted_nodes: list[str] = []
-    cover_relation: list[tuple[int, int]] = []
+    Tables a previous version of the server left behind are deleted first. If the store cannot be written,
+    workers compute the tables they need themselves.
+    """
+    for name in PRELOADED_MODULES:
+        importlib.import_module(name)
+
+    from app.layoutstore import LayoutStore
+
+    store = LayoutStore.get_default()
+    store.cleanup()
+    try:
+        store.publish()
+    except OSError:
+        pass
 
 
-class GraphData(BaseModel):
-    data: list[go.Scatter3d]
-    layout: go.Layout
+compute_executor = ComputeExecutor.from_env()
+solve_job_manager = SolveJobManager.from_env()
+graph_cache = GraphCache.from_env()
+# every graph session keeps its PosetVisualizer in this process and updates it off the compute pool, so their number is bounded
+max_graph_sessions = int(os.environ.get("ATG_GRAPH_SESSIONS", "8"))
+graph_sessions = 0
 
-    class Config:
-        arbitrary_types_allowed = True
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    preloading = asyncio.create_task(asyncio.to_thread(preload))
+    yield
+    await preloading
+    compute_executor.shutdown(wait=False)
+    solve_job_manager.shutdown()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://127.0.0.1:3000",
@@ -50,72 +84,205 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Visualizer-Cache"],
 )
 
 
+@app.exception_handler(ComputeExecutorSaturated)
+async def compute_executor_saturated_handler(
+    request: Request, exc: ComputeExecutorSaturated
+):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.post("/graph", response_model=GraphData)
-async def get_graph(graphRequest: GraphRequest):
-    try:
-        if graphRequest.input_mode == "Linear Orders":
-            size = graphRequest.size
-            drawing_method = graphRequest.drawing_method
-            selected_nodes = graphRequest.selected_nodes
-            highlighted_nodes = graphRequest.highlighted_nodes
-
-            if size < 2 or size > PosetVisualizer.MAX_SIZE:
-                raise ValueError(
-                    f"Size must be between 2 and {PosetVisualizer.MAX_SIZE}."
-                )
-
-            visualizer = PosetVisualizer(
-                size, selected_nodes, highlighted_nodes, drawing_method
+async def get_graph(graphRequest: GraphRequest, request: Request):
+    etag = graph_cache.etag(graphRequest)
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if graph_cache.matches(etag, request.headers.get("If-None-Match")):
+        return Response(status_code=304, headers=headers)
+
+    entry = graph_cache.get(etag)
+    if entry is None:
+        from app.computetasks import build_graph_json
+
+        try:
+            fig_json, visualizer_cache = await compute_executor.run(
+                build_graph_json, graphRequest
             )
+        except ComputeExecutorSaturated:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        entry = graph_cache.put(etag, fig_json)
+        # only on the response that drew the figure, the cached body is replayed without it
+        headers["X-Visualizer-Cache"] = visualizer_cache
+
+    body, content_encoding = await asyncio.to_thread(
+        graph_cache.encode, entry, request.headers.get("Accept-Encoding")
+    )
+    if content_encoding:
+        headers["Content-Encoding"] = content_encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
-            fig_data = visualizer.get_figure_data()
+@app.websocket("/graph/session")
+async def graph_session(websocket: WebSocket):
+    """Draw a graph once and then apply selection and highlight changes to it, replying with deltas, see VisualizerSession
 
-            return JSONResponse(content=pio.to_json(fig_data))
-        elif graphRequest.input_mode == "Poset":
-            size = graphRequest.size
-            drawing_method = graphRequest.drawing_method
-            cover_relation = graphRequest.cover_relation
+    The first message is a GraphRequest, answered with a snapshot. Every later message is a SessionUpdate, answered with a delta.
+    Invalid messages are answered with an error message; the session stays open unless the graph could not be drawn.
+    Beyond ATG_GRAPH_SESSIONS open sessions, new ones are closed with code 1013, try again later.
+    """
+    global graph_sessions
+    from app.computetasks import build_graph_visualizer
+    from app.figurejson import FigureJson
+    from app.visualizersession import VisualizerSession
 
-            sequence = "".join(map(str, range(1, size + 1)))
-            linear_extensions = PosetUtils.get_linear_extensions_from_relation(
-                cover_relation, sequence
+    await websocket.accept()
+    if graph_sessions >= max_graph_sessions:
+        await websocket.send_json(
+            {
+                "type": "error",
+                "detail": f"Too many graph sessions, at most {max_graph_sessions} may be open. Try again later.",
+            }
+        )
+        await websocket.close(code=1013)
+        return
+
+    graph_sessions += 1
+    try:
+        try:
+            graphRequest = GraphRequest.model_validate(await websocket.receive_json())
+            visualizer, _ = await compute_executor.run(
+                build_graph_visualizer, graphRequest
             )
-            visualizer = PosetVisualizer(
-                size, linear_extensions, drawing_method=drawing_method
+        except Exception as e:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            await websocket.close(
+                code=1013 if isinstance(e, ComputeExecutorSaturated) else 1008
             )
+            return
 
-            fig_data = visualizer.get_figure_data()
-            return JSONResponse(content=pio.to_json(fig_data))
-        else:
-            raise ValueError(f"Invalid input_mode value.")
+        session = VisualizerSession(visualizer)
+        await websocket.send_text(FigureJson.dumps(session.snapshot()))
+        while True:
+            message = await websocket.receive_json()
+            try:
+                update = SessionUpdate.model_validate(message)
+                delta = await asyncio.to_thread(session.update, update)
+            except (ValidationError, ValueError) as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+            await websocket.send_text(FigureJson.dumps(delta))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        graph_sessions -= 1
+
+
+@app.post("/graph/clusters")
+async def get_graph_clusters(clusterRequest: ClusterRequest):
+    from app.computetasks import build_cluster_json
+
+    try:
+        fig_json = await compute_executor.run(build_cluster_json, clusterRequest)
+    except ComputeExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=fig_json, media_type="application/json")
+
+
+@app.post("/graph/clusters/expand")
+async def expand_graph_cluster(clusterExpandRequest: ClusterExpandRequest):
+    from app.computetasks import build_cluster_expand_json
+
+    try:
+        fig_json, visualizer_cache = await compute_executor.run(
+            build_cluster_expand_json, clusterExpandRequest
+        )
+    except ComputeExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(
+        content=fig_json,
+        media_type="application/json",
+        headers={"X-Visualizer-Cache": visualizer_cache},
+    )
 
 
 @app.get("/solve")
-def solve_optimal_k_poset_cover(k: int, upsilon: list[str] = Query([])):
+async def solve_optimal_k_poset_cover(
+    k: int | None = None, upsilon: list[str] = Query([])
+):
+    from app.computetasks import solve_poset_cover
+
     try:
-        print(f"{k = }. k is not handled yet.")
-        result_linear_orders = PosetSolver.minimum_poset_cover(upsilon)
-        result_posets = [
-            PosetUtils.get_partial_order_of_convex(leg) for leg in result_linear_orders
-        ]
-
-        return JSONResponse(
-            content=json.dumps(
-                {
-                    "resultPosets": result_posets,
-                    "resultLinearOrders": result_linear_orders,
-                }
-            )
+        result = await compute_executor.run(solve_poset_cover, upsilon, k)
+        return JSONResponse(content=json.dumps(result))
+    except ComputeExecutorSaturated:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/verify")
+async def verify_poset_cover_of_upsilon(verifyRequest: VerifyRequest):
+    from app.computetasks import verify_poset_cover
+
+    try:
+        result = await compute_executor.run(
+            verify_poset_cover, verifyRequest.upsilon, verifyRequest.posets
         )
+        return JSONResponse(content=result)
+    except ComputeExecutorSaturated:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/solve/jobs", status_code=202)
+def create_solve_job(solveJobRequest: SolveJobRequest):
+    if not solveJobRequest.upsilon:
+        raise HTTPException(status_code=400, detail="Upsilon must not be empty.")
+    job = solve_job_manager.submit(solveJobRequest.upsilon)
+    return JSONResponse(
+        status_code=202,
+        content=job.to_dict(),
+        headers={"Location": f"/solve/jobs/{job.id}"},
+    )
+
+
+@app.get("/solve/jobs/{job_id}")
+def get_solve_job(job_id: str):
+    job = solve_job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return JSONResponse(content=job.to_dict())
+
+
+@app.get("/solve/jobs/{job_id}/events")
+def stream_solve_job_events(job_id: str, request: Request):
+    job = solve_job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+
+    last_event_id = request.headers.get("Last-Event-ID", "-1")
+    return StreamingResponse(
+        solve_job_manager.stream_events(
+            job, last_event_id=int(last_event_id) if last_event_id.isdigit() else -1
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.get("/health")
 def test_health():
     return JSONResponse(content={"message": "good"})
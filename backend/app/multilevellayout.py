@@ -0,0 +1,334 @@
+import time
+from itertools import product
+from math import ceil, log
+
+import numpy as np
+import scipy.sparse as sp
+
+from numpy.typing import NDArray
+
+
+class MultilevelLayout:
+    """Multilevel force-directed layout for large graphs
+
+    The graph is repeatedly coarsened by collapsing matched neighbors. The coarsest graph is laid out from scratch,
+    then its positions are prolonged level by level to the original graph and refined with Fruchterman-Reingold forces.
+    Repulsion is approximated Barnes-Hut style on a hierarchy of grids: far away nodes are replaced by the centers of mass of
+    grid cells, and only nodes in neighboring cells of the finest grid interact exactly. One iteration costs about O(V log V).
+    """
+
+    # stop coarsening at this many nodes
+    COARSEST_SIZE = 50
+    # stop coarsening when a level keeps more than this fraction of the nodes of the previous one
+    MIN_SHRINK = 0.8
+    MATCHING_ROUNDS = 8
+    COARSEST_ITERATIONS = 100
+    REFINEMENT_ITERATIONS = 20
+    # stop refining a level once the mean node displacement is below this fraction of the ideal edge length
+    TOLERANCE = 0.02
+    # up to this many nodes, repulsion is computed exactly
+    EXACT_REPULSION_MAX_SIZE = 500
+    # the finest grid of the repulsion approximation has about this many nodes per cell
+    NODES_PER_CELL = 4
+    MAX_GRID_LEVEL = 6
+    # bounds the number of interactions evaluated at once, and so the memory used
+    BLOCK_SIZE = 1_000_000
+
+    @staticmethod
+    def layout(
+        adjacency: sp.sparray | sp.spmatrix,
+        time_budget: float | None = None,
+        seed: int = 42,
+    ) -> tuple[NDArray[np.float64], int]:
+        """Lay out a graph given its sparse adjacency matrix
+
+        Args:
+            adjacency: The V x V symmetric adjacency matrix. Weights are used as edge strengths.
+            time_budget: Seconds after which refinement stops. The remaining levels are only prolonged, so every node still gets a position. Defaults to None; no limit.
+            seed: Seed of the random initial layout and of the matching
+
+        Returns:
+            tuple[NDArray[np.float64], int]: The V x 3 positions scaled to [-1, 1], and the number of iterations run over all levels
+        """
+        started_at = time.perf_counter()
+        rng = np.random.default_rng(seed)
+
+        def out_of_time() -> bool:
+            return (
+                time_budget is not None
+                and time.perf_counter() - started_at >= time_budget
+            )
+
+        n_nodes = adjacency.shape[0]
+        if n_nodes <= 1:
+            return np.zeros((n_nodes, 3)), 0
+
+        # Section: Coarsen
+        levels = [sp.csr_matrix(adjacency, dtype=np.float64)]
+        # the number of original nodes each node stands for
+        masses = [np.ones(n_nodes)]
+        prolongations: list[sp.csr_matrix] = []
+        while levels[-1].shape[0] > MultilevelLayout.COARSEST_SIZE:
+            prolongation = MultilevelLayout._coarsen(levels[-1], rng)
+            if prolongation is None:
+                break
+            coarse = (prolongation.T @ levels[-1] @ prolongation).tocsr()
+            coarse.setdiag(0)
+            coarse.eliminate_zeros()
+            prolongations.append(prolongation)
+            levels.append(coarse)
+            masses.append(prolongation.T @ masses[-1])
+
+        # Section: Lay out the coarsest graph from scratch
+        coarsest = levels[-1]
+        n_coarsest = coarsest.shape[0]
+        pos = rng.random((n_coarsest, 3)) * n_coarsest ** (1 / 3)
+        pos, iterations = MultilevelLayout._refine(
+            coarsest,
+            masses[-1],
+            pos,
+            MultilevelLayout.COARSEST_ITERATIONS,
+            n_coarsest ** (1 / 3) / 2,
+            out_of_time,
+        )
+
+        # Section: Prolong and refine
+        for level in range(len(levels) - 2, -1, -1):
+            prolongation = prolongations[level]
+            n_fine, n_coarse = prolongation.shape
+            # the same density in 3D needs a volume proportional to the number of nodes
+            pos = (prolongation @ pos) * (n_fine / n_coarse) ** (1 / 3)
+            pos += rng.normal(scale=0.1, size=pos.shape)
+            pos, level_iterations = MultilevelLayout._refine(
+                levels[level],
+                masses[level],
+                pos,
+                MultilevelLayout.REFINEMENT_ITERATIONS,
+                1.0,
+                out_of_time,
+            )
+            iterations += level_iterations
+
+        pos -= pos.mean(axis=0)
+        limit = np.abs(pos).max()
+        if limit > 0:
+            pos /= limit
+        return pos, iterations
+
+    @staticmethod
+    def _coarsen(
+        adjacency: sp.csr_matrix, rng: np.random.Generator
+    ) -> sp.csr_matrix | None:
+        """Match neighbors and return the V x Vc matrix mapping each node to its coarse node, or None if the graph barely shrinks
+
+        Each round, every unmatched node picks its heaviest unmatched neighbor (ties broken randomly) and pairs that picked each other are matched.
+        """
+        n_nodes = adjacency.shape[0]
+        nodes = np.arange(n_nodes)
+        partner = np.full(n_nodes, -1)
+
+        # entries of a CSR matrix are sorted by row, and stay sorted while unmatched ones are filtered out
+        coo = adjacency.tocoo()
+        off_diagonal = coo.row != coo.col
+        rows, cols = coo.row[off_diagonal], coo.col[off_diagonal]
+        weights = coo.data[off_diagonal]
+        for _ in range(MultilevelLayout.MATCHING_ROUNDS):
+            free = (partner[rows] < 0) & (partner[cols] < 0)
+            rows, cols, weights = rows[free], cols[free], weights[free]
+            if len(rows) == 0:
+                break
+            keys = weights + rng.random(len(rows)) * 1e-6
+
+            row_starts = np.flatnonzero(np.diff(rows, prepend=-1))
+            row_max = np.maximum.reduceat(keys, row_starts)
+            heaviest = keys == np.repeat(row_max, np.diff(row_starts, append=len(rows)))
+            choice = np.full(n_nodes, -1)
+            choice[rows[heaviest]] = cols[heaviest]
+
+            chosen = choice >= 0
+            mutual = chosen & (choice[np.where(chosen, choice, 0)] == nodes)
+            if not mutual.any():
+                break
+            partner[mutual] = choice[mutual]
+
+        leader = np.where(partner >= 0, np.minimum(nodes, partner), nodes)
+        _, coarse_node = np.unique(leader, return_inverse=True)
+        n_coarse = coarse_node.max() + 1
+        if n_coarse > MultilevelLayout.MIN_SHRINK * n_nodes:
+            return None
+        return sp.csr_matrix(
+            (np.ones(n_nodes), (nodes, coarse_node)), shape=(n_nodes, n_coarse)
+        )
+
+    @staticmethod
+    def _refine(
+        adjacency: sp.csr_matrix,
+        mass: NDArray[np.float64],
+        pos: NDArray[np.float64],
+        max_iterations: int,
+        temperature: float,
+        out_of_time,
+    ) -> tuple[NDArray[np.float64], int]:
+        """Run Fruchterman-Reingold iterations with an ideal edge length of 1 and a cooling temperature
+
+        Repulsion between two nodes grows with the product of their masses, so that coarse nodes standing for many original nodes
+        keep room for them instead of collapsing under the summed weights of the edges between them.
+        """
+        upper = sp.triu(adjacency, k=1).tocoo()
+        iterations = 0
+        while iterations < max_iterations and not out_of_time():
+            displacement = MultilevelLayout._repulsion(pos, mass) * mass[:, None]
+
+            # attraction along edges, d^2 per unit of weight
+            delta = pos[upper.row] - pos[upper.col]
+            distance = np.linalg.norm(delta, axis=1, keepdims=True)
+            attraction = delta * (distance * upper.data[:, None])
+            for dimension in range(3):
+                displacement[:, dimension] -= np.bincount(
+                    upper.row, attraction[:, dimension], minlength=len(pos)
+                )
+                displacement[:, dimension] += np.bincount(
+                    upper.col, attraction[:, dimension], minlength=len(pos)
+                )
+
+            length = np.maximum(np.linalg.norm(displacement, axis=1), 1e-9)
+            step = np.minimum(length, temperature)
+            pos = pos + displacement * (step / length)[:, None]
+            temperature *= 0.9
+            iterations += 1
+
+            if step.mean() < MultilevelLayout.TOLERANCE:
+                break
+        return pos, iterations
+
+    @staticmethod
+    def _repulsion(
+        pos: NDArray[np.float64], mass: NDArray[np.float64] | None = None
+    ) -> NDArray[np.float64]:
+        """Approximate the repulsion m/d on every node from every other node of mass m, in the direction away from it
+
+        Space is divided into grids of 4^3, 8^3, ... cells. On each grid, a cell is pushed by the centers of mass of the cells that are
+        children of its parent cell's neighbors but not neighbors of itself, i.e. cells that are far relative to their size, and passes
+        that force on to its nodes. Together with the exact interactions with the nodes in neighboring cells of the finest grid,
+        this counts every other node once. Small graphs are computed exactly.
+        """
+        n_nodes = len(pos)
+        if mass is None:
+            mass = np.ones(n_nodes)
+        if n_nodes <= MultilevelLayout.EXACT_REPULSION_MAX_SIZE:
+            delta = pos[:, None, :] - pos[None, :, :]
+            distance_squared = np.sum(delta**2, axis=2)
+            np.fill_diagonal(distance_squared, np.inf)
+            return np.einsum(
+                "ijk,ij->ik", delta, mass / np.maximum(distance_squared, 1e-18)
+            )
+
+        force = np.zeros_like(pos)
+        lowest = pos.min(axis=0)
+        extent = max(float((pos.max(axis=0) - lowest).max()), 1e-9) * (1 + 1e-9)
+        unit = (pos - lowest) / extent
+
+        finest_level = ceil(log(max(n_nodes / MultilevelLayout.NODES_PER_CELL, 64), 8))
+        finest_level = min(max(finest_level, 2), MultilevelLayout.MAX_GRID_LEVEL)
+
+        neighbor_offsets = np.array(list(product(range(-1, 2), repeat=3)))
+        far_offsets = MultilevelLayout._far_offsets()
+        for level in range(2, finest_level + 1):
+            grid_size = 2**level
+            cell = np.minimum((unit * grid_size).astype(np.int64), grid_size - 1)
+            flat = MultilevelLayout._flat_cell(cell, grid_size)
+            cell_mass = np.bincount(flat, mass, minlength=grid_size**3)
+            occupied = np.flatnonzero(cell_mass)
+            center = np.stack(
+                [
+                    np.bincount(flat, mass * pos[:, d], minlength=grid_size**3)
+                    for d in range(3)
+                ],
+                axis=1,
+            )
+            center[occupied] /= cell_mass[occupied, None]
+
+            # cells interact with cells, and every node of a cell receives the force on its center of mass
+            occupied_cell = np.stack(
+                np.unravel_index(occupied, (grid_size,) * 3), axis=1
+            )
+            cell_force = np.zeros((grid_size**3, 3))
+
+            # which cells are far depends on the position of a cell within its parent cell
+            parity = occupied_cell % 2
+            parity_flat = parity[:, 0] * 4 + parity[:, 1] * 2 + parity[:, 2]
+            for parity_index in range(8):
+                members = np.flatnonzero(parity_flat == parity_index)
+                if len(members) == 0:
+                    continue
+                offsets = far_offsets[parity_index]
+                block_size = max(1, MultilevelLayout.BLOCK_SIZE // len(offsets))
+                for start in range(0, len(members), block_size):
+                    receivers = members[start : start + block_size]
+                    target = occupied_cell[receivers][:, None, :] + offsets[None, :, :]
+                    inside = np.all((target >= 0) & (target < grid_size), axis=2)
+                    target_flat = np.where(
+                        inside, MultilevelLayout._flat_cell(target, grid_size), 0
+                    )
+                    target_mass = np.where(inside, cell_mass[target_flat], 0)
+                    delta = (
+                        center[occupied[receivers]][:, None, :] - center[target_flat]
+                    )
+                    distance_squared = np.maximum(np.sum(delta**2, axis=2), 1e-18)
+                    cell_force[occupied[receivers]] = np.einsum(
+                        "ijk,ij->ik", delta, target_mass / distance_squared
+                    )
+            force += cell_force[flat]
+
+        # exact interactions with the nodes in the neighboring cells of the finest grid
+        grid_size = 2**finest_level
+        cell = np.minimum((unit * grid_size).astype(np.int64), grid_size - 1)
+        flat = MultilevelLayout._flat_cell(cell, grid_size)
+        order = np.argsort(flat, kind="stable")
+        cell_count = np.bincount(flat, minlength=grid_size**3)
+        cell_start = np.concatenate([[0], np.cumsum(cell_count)[:-1]])
+        max_count = int(cell_count.max())
+        slots = np.arange(max_count)
+
+        block_size = max(1, MultilevelLayout.BLOCK_SIZE // (27 * max_count))
+        for start in range(0, n_nodes, block_size):
+            receivers = np.arange(start, min(start + block_size, n_nodes))
+            target = cell[receivers][:, None, :] + neighbor_offsets[None, :, :]
+            inside = np.all((target >= 0) & (target < grid_size), axis=2)
+            target_flat = np.where(
+                inside, MultilevelLayout._flat_cell(target, grid_size), 0
+            )
+            count = np.where(inside, cell_count[target_flat], 0)
+            # slot s of a neighboring cell holds its s-th node, if it has that many
+            valid = slots < count[:, :, None]
+            others = order[
+                np.minimum(cell_start[target_flat][:, :, None] + slots, n_nodes - 1)
+            ]
+            valid &= others != receivers[:, None, None]
+            delta = pos[receivers][:, None, None, :] - pos[others]
+            distance_squared = np.maximum(np.sum(delta**2, axis=3), 1e-18)
+            weight = np.where(valid, mass[others] / distance_squared, 0)
+            force[receivers] += np.einsum("ijsk,ijs->ik", delta, weight)
+
+        return force
+
+    @staticmethod
+    def _far_offsets() -> list[NDArray[np.int64]]:
+        """For each parity of a cell within its parent, the offsets of the children of the parent's neighbors that are not neighbors of the cell"""
+        far_offsets = []
+        for bits in product(range(2), repeat=3):
+            ranges = [range(-2 - bit, 4 - bit) for bit in bits]
+            far_offsets.append(
+                np.array(
+                    [
+                        offset
+                        for offset in product(*ranges)
+                        if max(abs(o) for o in offset) > 1
+                    ]
+                )
+            )
+        return far_offsets
+
+    @staticmethod
+    def _flat_cell(cell: NDArray[np.int64], grid_size: int) -> NDArray[np.int64]:
+        return (cell[..., 0] * grid_size + cell[..., 1]) * grid_size + cell[..., 2]
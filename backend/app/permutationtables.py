@@ -0,0 +1,192 @@
+from itertools import permutations
+from math import factorial
+
+import numpy as np
+import scipy.sparse as sp
+
+from numpy.typing import NDArray
+from app.classes import *
+
+
+class PermutationTables:
+    """Vectorized conversions between linear orders, digit arrays and lexicographic ranks
+
+    The rank of a linear order of length n is its index among all n! linear orders sorted lexicographically,
+    e.g. '123' has rank 0 and '321' has rank 5. Ranks index the precomputed per-permutation tables.
+    """
+
+    @staticmethod
+    def to_digits(linear_orders: list[LinearOrder]) -> NDArray[np.uint8]:
+        """Convert linear orders like '2134' into a len(linear_orders) x n array of their digits"""
+        if not linear_orders:
+            return np.empty((0, 0), dtype=np.uint8)
+        n = len(linear_orders[0])
+        buffer = "".join(linear_orders).encode("ascii")
+        if len(buffer) != n * len(linear_orders):
+            raise ValueError("Linear orders must have equal lengths.")
+        return np.frombuffer(buffer, dtype=np.uint8).reshape(-1, n) - ord("0")
+
+    @staticmethod
+    def to_linear_orders(digits: NDArray[np.uint8]) -> list[LinearOrder]:
+        """Convert an array of digits back into linear orders"""
+        if len(digits) == 0:
+            return []
+        n = digits.shape[1]
+        buffer = (
+            (np.asarray(digits, dtype=np.uint8) + ord("0")).tobytes().decode("ascii")
+        )
+        return [buffer[i : i + n] for i in range(0, len(buffer), n)]
+
+    @staticmethod
+    def lehmer_code(digits: NDArray[np.uint8]) -> NDArray[np.int64]:
+        """Lehmer codes of permutations given as a digit array: entry i counts the later digits smaller than digit i. O(V*n^2)."""
+        n = digits.shape[1] if digits.ndim == 2 else 0
+        code = np.zeros((len(digits), n), dtype=np.int64)
+        for i in range(n - 1):
+            code[:, i] = np.count_nonzero(
+                digits[:, i + 1 :] < digits[:, i : i + 1], axis=1
+            )
+        return code
+
+    @staticmethod
+    def rank(digits: NDArray[np.uint8]) -> NDArray[np.int64]:
+        """Lexicographic ranks of permutations given as a digit array, via their Lehmer codes. O(V*n^2)."""
+        n = digits.shape[1] if digits.ndim == 2 else 0
+        weights = np.array([factorial(n - 1 - i) for i in range(n)], dtype=np.int64)
+        return PermutationTables.lehmer_code(digits) @ weights
+
+    @staticmethod
+    def rank_linear_orders(linear_orders: list[LinearOrder]) -> NDArray[np.int64]:
+        """Lexicographic ranks of linear orders"""
+        return PermutationTables.rank(PermutationTables.to_digits(linear_orders))
+
+    @staticmethod
+    def all_digits(n: int) -> NDArray[np.uint8]:
+        """All n! permutations of 1..n as an n! x n digit array, row i having rank i"""
+        return np.array(list(permutations(range(1, n + 1))), dtype=np.uint8).reshape(
+            -1, n
+        )
+
+    @staticmethod
+    def extends(
+        digits: NDArray[np.uint8], relation: PartialOrder | CoverRelation
+    ) -> NDArray[np.bool_]:
+        """Which permutations are linear extensions of a relation, i.e. have x before y for every pair (x, y). O(V*n + V*|relation|)."""
+        n = digits.shape[1] if digits.ndim == 2 else 0
+        # position_of[i, v - 1] is the position of v in permutation i
+        position_of = np.argsort(digits, axis=1)
+        extends = np.ones(len(digits), dtype=bool)
+        for x, y in relation:
+            if not (1 <= x <= n and 1 <= y <= n):
+                raise ValueError(
+                    f"Relation {(x, y)} has a node outside of 1 to {n}. relation={relation}"
+                )
+            extends &= position_of[:, x - 1] < position_of[:, y - 1]
+        return extends
+
+    @staticmethod
+    def _ranks_and_neighbor_ranks(
+        digits: NDArray[np.uint8],
+    ) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+        """Ranks of permutations and of their n-1 adjacent transpositions, see neighbor_ranks"""
+        n = digits.shape[1] if digits.ndim == 2 else 0
+        code = PermutationTables.lehmer_code(digits)
+        weights = np.array([factorial(n - 1 - i) for i in range(n)], dtype=np.int64)
+        ranks = code @ weights
+        neighbor_ranks = np.empty((len(digits), max(n - 1, 0)), dtype=np.int64)
+        for i in range(n - 1):
+            ascending = digits[:, i] < digits[:, i + 1]
+            # the smaller digit moving right stops counting the larger one, or the larger one moving left starts counting it
+            new_code_i = code[:, i + 1] + ascending
+            new_code_next = code[:, i] - ~ascending
+            neighbor_ranks[:, i] = (
+                ranks
+                + (new_code_i - code[:, i]) * weights[i]
+                + (new_code_next - code[:, i + 1]) * weights[i + 1]
+            )
+        return ranks, neighbor_ranks
+
+    @staticmethod
+    def neighbor_ranks(digits: NDArray[np.uint8]) -> NDArray[np.int64]:
+        """Ranks of the adjacent transpositions of permutations: entry (v, i) is the rank of permutation v with positions i and i+1 swapped
+
+        Swapping positions i and i+1 only changes the Lehmer code at i and i+1, so every neighbor rank is updated in O(1). O(V*n^2).
+        """
+        return PermutationTables._ranks_and_neighbor_ranks(digits)[1]
+
+    @staticmethod
+    def adjacent_transpositions(
+        digits: NDArray[np.uint8],
+    ) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.uint8]]:
+        """The edges of the ATG on the given permutations, i.e. the pairs that differ by one adjacent transposition
+
+        Instead of comparing all pairs, the n-1 adjacent transpositions of every permutation are looked up among the given ranks.
+        Up to LayoutStore.MAX_SIZE they are read from the memory-mapped neighbors table of the LayoutStore, see LayoutStore.adjacent_transpositions.
+        Beyond it, or if the table cannot be saved, they are ranked instead, see neighbor_ranks. O(V*n^2 + V*n*log V).
+
+        Args:
+            digits: A V x n array of distinct permutations
+
+        Returns:
+            tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.uint8]]: firsts, seconds and swapped, where edge k joins
+                permutations firsts[k] < seconds[k] by swapping the values swapped[k] = (smaller, larger). Edges are sorted by (first, second).
+        """
+        # imported here, as the LayoutStore computes its tables with PermutationTables
+        from app.layoutstore import LayoutStore
+
+        n = digits.shape[1] if digits.ndim == 2 else 0
+        if len(digits) and 2 <= n <= LayoutStore.MAX_SIZE:
+            try:
+                return LayoutStore.get_default().adjacent_transpositions(digits)
+            except OSError:
+                pass
+        return PermutationTables.ranked_adjacent_transpositions(digits)
+
+    @staticmethod
+    def ranked_adjacent_transpositions(
+        digits: NDArray[np.uint8],
+    ) -> tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.uint8]]:
+        """adjacent_transpositions without the neighbors table: the n-1 adjacent transpositions of every permutation are ranked, see neighbor_ranks"""
+        n_nodes = len(digits)
+        n = digits.shape[1] if digits.ndim == 2 else 0
+        ranks, all_neighbor_ranks = PermutationTables._ranks_and_neighbor_ranks(digits)
+        order = np.argsort(ranks)
+        sorted_ranks = ranks[order]
+
+        firsts, seconds, swapped = [], [], []
+        nodes = np.arange(n_nodes)
+        for i in range(n - 1):
+            neighbor_ranks = all_neighbor_ranks[:, i]
+            found = np.minimum(
+                np.searchsorted(sorted_ranks, neighbor_ranks), n_nodes - 1
+            )
+            neighbors = order[found]
+            # every edge is found from both ends, keep it once
+            present = (sorted_ranks[found] == neighbor_ranks) & (nodes < neighbors)
+            firsts.append(nodes[present])
+            seconds.append(neighbors[present])
+            pair = digits[present][:, i : i + 2]
+            swapped.append(np.sort(pair, axis=1))
+
+        if not firsts:
+            return (
+                np.empty(0, dtype=np.int64),
+                np.empty(0, dtype=np.int64),
+                np.empty((0, 2), dtype=np.uint8),
+            )
+        firsts = np.concatenate(firsts)
+        seconds = np.concatenate(seconds)
+        swapped = np.concatenate(swapped)
+        edge_order = np.lexsort((seconds, firsts))
+        return firsts[edge_order], seconds[edge_order], swapped[edge_order]
+
+    @staticmethod
+    def adjacency(digits: NDArray[np.uint8]) -> sp.csr_array:
+        """The symmetric V x V adjacency matrix of the ATG on the given distinct permutations, in their order, see adjacent_transpositions"""
+        n_nodes = len(digits)
+        firsts, seconds, _ = PermutationTables.adjacent_transpositions(digits)
+        rows = np.concatenate([firsts, seconds])
+        cols = np.concatenate([seconds, firsts])
+        return sp.csr_array(
+            (np.ones(len(rows)), (rows, cols)), shape=(n_nodes, n_nodes)
+        )
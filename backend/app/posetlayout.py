@@ -0,0 +1,275 @@
+import os
+from typing import Literal, TypedDict
+
+import networkx as nx
+import numpy as np
+
+from numpy.typing import NDArray
+from app.classes import *
+from app.multilevellayout import MultilevelLayout
+from app.permutationtables import PermutationTables
+from app.spectrallayout import SpectralLayout
+
+type LayoutEngine = Literal["spring", "permutahedron", "multilevel", "spectral"]
+
+
+class LayoutInfo(TypedDict):
+    engine: LayoutEngine
+    # the number of force-directed iterations actually run, None for engines without iterations
+    iterations: int | None
+
+
+class PosetLayout:
+    """Layout engines computing 3D node positions for an Adjacent Transposition Graph"""
+
+    ENGINES: tuple[LayoutEngine, ...] = (
+        "spring",
+        "permutahedron",
+        "multilevel",
+        "spectral",
+    )
+
+    # sizes from which the permutahedron engine is used unless another engine is requested
+    PERMUTAHEDRON_DEFAULT_MIN_SIZE = 7
+
+    # the spring layout starts from the permutahedron embedding, so it only needs a short refinement
+    SPRING_MAX_ITERATIONS = 30
+    # stop once the mean displacement per iteration is below this fraction of the ideal edge length
+    SPRING_TOLERANCE = 0.02
+
+    # seconds after which the multilevel layout stops refining
+    MULTILEVEL_TIME_BUDGET = float(os.environ.get("ATG_LAYOUT_TIME_BUDGET", "10"))
+
+    @staticmethod
+    def default_engine(size: int) -> LayoutEngine:
+        """The layout engine used when none is requested"""
+        if size >= PosetLayout.PERMUTAHEDRON_DEFAULT_MIN_SIZE:
+            return "permutahedron"
+        return "spring"
+
+    @staticmethod
+    def layout(
+        graph: nx.Graph | list[LinearOrder],
+        engine: LayoutEngine = "spring",
+        time_budget: float | None = None,
+    ) -> tuple[dict[LinearOrder, NDArray[np.float64]], LayoutInfo]:
+        """Compute the positions of the nodes of an ATG
+
+        Args:
+            graph: The ATG, or just its nodes. Its nodes are linear orders of equal length.
+            engine: "spring" for a force-directed layout, "permutahedron" for the exact permutahedron coordinates, "multilevel" for a force-directed layout of large graphs, "spectral" for Laplacian eigenvectors
+            time_budget: Seconds the multilevel layout may spend refining. Defaults to None; MULTILEVEL_TIME_BUDGET.
+
+        Returns:
+            tuple[dict[LinearOrder, NDArray[np.float64]], LayoutInfo]: The 3D position of each node, and how it was computed.
+                Force-directed engines lay out each connected component separately, see ComponentLayout, and report the most iterations any component needed.
+        """
+        nodes: list[LinearOrder] = list(graph)
+        if engine in ("spring", "multilevel"):
+            from app.componentlayout import ComponentLayout
+
+            positions, iterations = ComponentLayout.get_default().layout(
+                engine, nodes, time_budget
+            )
+            pos = dict(zip(nodes, positions))
+            return pos, LayoutInfo(engine=engine, iterations=iterations)
+        if engine == "permutahedron":
+            pos = dict(zip(nodes, PosetLayout.permutahedron(nodes)))
+            return pos, LayoutInfo(engine=engine, iterations=None)
+        if engine == "spectral":
+            pos = dict(zip(nodes, PosetLayout.spectral(nodes)))
+            return pos, LayoutInfo(engine=engine, iterations=None)
+        raise ValueError(
+            f"Invalid layout engine {engine!r}. Must be one of {PosetLayout.ENGINES}."
+        )
+
+    @staticmethod
+    def force_directed(
+        engine: Literal["spring", "multilevel"],
+        nodes: list[LinearOrder],
+        seed: int = 42,
+        time_budget: float | None = None,
+    ) -> tuple[NDArray[np.float64], int]:
+        """Spring or multilevel layout of the ATG on the given nodes, as one system
+
+        Args:
+            engine: "spring" or "multilevel"
+            nodes: Distinct linear orders of equal length
+            seed: Seed of the multilevel layout. Spring layout is deterministic without one.
+            time_budget: Seconds the multilevel layout may spend refining. Defaults to None; MULTILEVEL_TIME_BUDGET.
+
+        Returns:
+            tuple[NDArray[np.float64], int]: A len(nodes) x 3 array of positions in the order of nodes, and the number of iterations used
+        """
+        if len(nodes) <= 1:
+            return np.zeros((len(nodes), 3)), 0
+
+        adjacency = PermutationTables.adjacency(PermutationTables.to_digits(nodes))
+        if engine == "spring":
+            return PosetLayout._fruchterman_reingold(
+                adjacency,
+                PosetLayout.permutahedron(nodes),
+                PosetLayout.SPRING_MAX_ITERATIONS,
+                PosetLayout.SPRING_TOLERANCE,
+            )
+        if engine == "multilevel":
+            if time_budget is None:
+                time_budget = PosetLayout.MULTILEVEL_TIME_BUDGET
+            return MultilevelLayout.layout(adjacency, time_budget, seed)
+        raise ValueError(f"Invalid force-directed layout engine {engine!r}.")
+
+    @staticmethod
+    def spectral(nodes: list[LinearOrder]) -> NDArray[np.float64]:
+        """Spectral layout of the ATG on the given nodes, see SpectralLayout
+
+        The Laplacian is built directly from the adjacent transpositions of the nodes, without a networkx graph.
+        On a full ATG the permutahedron coordinates are exact eigenvectors, so they are the starting point of the eigensolver.
+
+        Args:
+            nodes: Distinct linear orders of equal length
+
+        Returns:
+            NDArray[np.float64]: A len(nodes) x 3 array of positions, in the order of nodes
+        """
+        if not nodes:
+            return np.empty((0, 3))
+
+        adjacency = PermutationTables.adjacency(PermutationTables.to_digits(nodes))
+        return SpectralLayout.layout(
+            adjacency, PosetLayout.permutahedron_coordinates(nodes)
+        )
+
+    @staticmethod
+    def _fruchterman_reingold(
+        adjacency,
+        pos: NDArray[np.float64],
+        max_iterations: int,
+        tolerance: float,
+    ) -> tuple[NDArray[np.float64], int]:
+        """Refine positions with the Fruchterman-Reingold model used by nx.spring_layout
+
+        Forces are computed in blocks of rows to bound memory. The result is centered and scaled like nx.spring_layout, to [-1, 1].
+
+        Args:
+            adjacency: The V x V scipy.sparse adjacency matrix
+            pos: The V x 3 initial positions
+            max_iterations: The maximum number of iterations
+            tolerance: Stop early once the mean node displacement falls below this fraction of the ideal edge length
+
+        Returns:
+            tuple[NDArray[np.float64], int]: The V x 3 positions and the number of iterations used
+        """
+        n_nodes = len(pos)
+        k = np.sqrt(1.0 / n_nodes)
+        min_distance = 0.01 * k
+
+        # scale the initial positions to where attraction and repulsion balance, which minimizes
+        # sum(d^3 / 3k) over edges - sum(k^2 ln d) over pairs for uniform scaling
+        rows, cols = adjacency.nonzero()
+        pos = np.array(pos, dtype=np.float64)
+        edge_lengths_cubed = np.sum(np.linalg.norm(pos[rows] - pos[cols], axis=1) ** 3)
+        if edge_lengths_cubed > 0:
+            # rows and cols list every edge twice
+            n_pairs = n_nodes * (n_nodes - 1) / 2
+            pos *= (k**3 * n_pairs / (edge_lengths_cubed / 2)) ** (1 / 3)
+
+        # the embedding is already untangled, so the temperature starts low and cools quickly
+        temperature = 0.5 * k
+        block_size = max(1, 2_000_000 // n_nodes)
+
+        iterations = 0
+        for iterations in range(1, max_iterations + 1):
+            displacement = np.empty_like(pos)
+            for start in range(0, n_nodes, block_size):
+                stop = min(start + block_size, n_nodes)
+                delta = pos[start:stop, None, :] - pos[None, :, :]
+                distance = np.maximum(np.linalg.norm(delta, axis=-1), min_distance)
+                attraction = adjacency[start:stop].toarray()
+                force = k * k / distance**2 - attraction * distance / k
+                displacement[start:stop] = np.einsum("ijk,ij->ik", delta, force)
+
+            # nodes close to equilibrium move less than the temperature, which lets the layout settle early
+            length = np.maximum(np.linalg.norm(displacement, axis=1), min_distance)
+            delta_pos = displacement * np.minimum(1.0, temperature / length)[:, None]
+            pos += delta_pos
+            temperature *= 0.85
+
+            if np.linalg.norm(delta_pos, axis=1).mean() < tolerance * k:
+                break
+
+        pos -= pos.mean(axis=0)
+        limit = np.abs(pos).max()
+        if limit > 0:
+            pos /= limit
+        return pos, iterations
+
+    @staticmethod
+    def permutahedron(nodes: list[LinearOrder]) -> NDArray[np.float64]:
+        """Exact permutahedron coordinates projected to 3D, gathered from the default LayoutStore
+
+        Args:
+            nodes: Linear orders of equal length
+
+        Returns:
+            NDArray[np.float64]: A len(nodes) x 3 array of positions, in the order of nodes
+        """
+        from app.layoutstore import LayoutStore
+
+        return LayoutStore.get_default().gather(nodes)
+
+    @staticmethod
+    def permutahedron_coordinates(nodes: list[LinearOrder]) -> NDArray[np.float64]:
+        """Exact permutahedron coordinates projected to 3D, computed in closed form
+
+        The ATG is the 1-skeleton of the permutahedron. The vertex of a linear order is its position vector,
+        i.e. coordinate v is the position of v in the linear order, so every edge (adjacent transposition) has the same length.
+        The vertices lie on a sphere within a hyperplane and are projected to 3D by a fixed orthonormal basis of that hyperplane,
+        then scaled to the unit ball. Positions do not depend on which other nodes are drawn. O(V*n).
+
+        Args:
+            nodes: Linear orders of equal length
+
+        Returns:
+            NDArray[np.float64]: A len(nodes) x 3 array of positions, in the order of nodes
+        """
+        if not nodes:
+            return np.empty((0, 3))
+
+        n = len(nodes[0])
+        digits = PermutationTables.to_digits(nodes)
+        positions = np.argsort(digits, axis=1).astype(np.float64)
+
+        centered = positions - (n - 1) / 2
+        radius = np.sqrt(np.sum(centered[0] ** 2))
+        return centered @ PosetLayout._projection_basis(n) / radius
+
+    @staticmethod
+    def _projection_basis(n: int) -> NDArray[np.float64]:
+        """An n x 3 orthonormal basis of (part of) the hyperplane orthogonal to (1, ..., 1)
+
+        The first two directions project the permutahedron like a Coxeter plane, the third is generic so that no two vertices coincide.
+        Directions that vanish for small n (the permutahedron of n=3 is flat) are left as zero columns.
+        """
+        k = np.arange(1, n + 1)
+        golden_ratio = (1 + 5**0.5) / 2
+        candidates = np.stack(
+            [
+                np.cos(2 * np.pi * k / n),
+                np.sin(2 * np.pi * k / n),
+                np.cos(np.pi * golden_ratio * k),
+            ],
+            axis=1,
+        )
+        candidates -= candidates.mean(axis=0)
+
+        basis = np.zeros((n, 3))
+        dimension = 0
+        for candidate in candidates.T:
+            candidate = candidate - basis[:, :dimension] @ (
+                basis[:, :dimension].T @ candidate
+            )
+            norm = np.linalg.norm(candidate)
+            if norm > 1e-9:
+                basis[:, dimension] = candidate / norm
+                dimension += 1
+        return basis
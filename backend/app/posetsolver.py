@@ -1,6 +1,9 @@
 from itertools import combinations, product, chain
+from math import comb
 import copy
+import networkx as nx
 
+from app.layoutstore import LayoutStore
 from app.posetutils import PosetUtils
 from app.classes import *
 
@@ -8,7 +11,9 @@ from app.classes import *
 class PosetSolver:
     @staticmethod
     def minimum_poset_cover(
-        upsilon: list[LinearOrder], verbose=False
+        upsilon: list[LinearOrder],
+        verbose=False,
+        progress: SolveProgressCallback | None = None,
     ) -> list[LinearExtensions]:
         """A parameterized algorithm which finds the minimum poset cover
 
@@ -17,21 +22,64 @@ class PosetSolver:
         Args:
             upsilon: A list of linear orders of equal length
             verbose: Print information while the function executes. Defaults to False.
+            progress: Called with the current component, k, anchor sets done out of total, and the size of the best cover found so far. The best cover itself is included whenever a component is solved.
 
         Returns:
             list[LinearExtensions]: A list of linear extensions each corresponding to a poset in the poset cover
         """
         atg: AdjacentTranspositionGraph = PosetUtils.get_atg_from_upsilon(upsilon)
+        connected_components = list(nx.connected_components(atg))
 
         solutions: dict[frozenset[LinearOrder], list[LinearExtensions]] = {}
-        for connected_component in nx.connected_components(atg):
+        for i, connected_component in enumerate(connected_components):
             upsilon1: list[LinearOrder] = list(connected_component)
+
+            component_progress: KPosetCoverProgressCallback | None = None
+            if progress:
+                # an unsolved component can always be covered by one poset per linear order
+                best_cover_size = sum(len(s) for s in solutions.values()) + sum(
+                    len(c) for c in connected_components[i:]
+                )
+
+                def component_progress(
+                    k_progress: KPosetCoverProgress,
+                    component=i + 1,
+                    best_cover_size=best_cover_size,
+                ) -> None:
+                    progress(
+                        SolveProgress(
+                            component=component,
+                            components=len(connected_components),
+                            best_cover_size=best_cover_size,
+                            **k_progress,
+                        )
+                    )
+
             solutions[frozenset(connected_component)] = (
                 PosetSolver._minimum_poset_cover_of_connected_component(
-                    upsilon1, verbose
+                    upsilon1, verbose, component_progress
                 )
             )
 
+            if progress:
+                best_cover = list(chain.from_iterable(solutions.values())) + [
+                    [linear_order]
+                    for c in connected_components[i + 1 :]
+                    for linear_order in c
+                ]
+                k = len(solutions[frozenset(connected_component)])
+                progress(
+                    SolveProgress(
+                        component=i + 1,
+                        components=len(connected_components),
+                        k=k,
+                        anchor_sets_done=0,
+                        anchor_sets_total=0,
+                        best_cover_size=len(best_cover),
+                        best_cover=best_cover,
+                    )
+                )
+
             if verbose:
                 print(f'\n{"-"*40}\n')
 
@@ -49,7 +97,9 @@ class PosetSolver:
 
     @staticmethod
     def _minimum_poset_cover_of_connected_component(
-        upsilon: list[LinearOrder], verbose=False
+        upsilon: list[LinearOrder],
+        verbose=False,
+        progress: KPosetCoverProgressCallback | None = None,
     ) -> list[LinearExtensions]:
         """A parameterized algorithm which finds the minimum poset cover (connected)
 
@@ -58,6 +108,7 @@ class PosetSolver:
         Args:
             upsilon: A list of linear orders of equal length
             verbose: Print information while the function executes. Defaults to False.
+            progress: Called with k and the number of anchor sets done out of total while each k is attempted.
 
         Returns:
             list[LinearExtensions]: A list of linear extensions each corresponding to a poset in the poset cover
@@ -65,6 +116,11 @@ class PosetSolver:
         n = len(upsilon)
         result: list[LinearExtensions] | None = None
         for k in range(1, n + 1):
+            if progress and (k == 1 or k == n):
+                progress(
+                    KPosetCoverProgress(k=k, anchor_sets_done=0, anchor_sets_total=0)
+                )
+
             if k == 1:
                 convex = PosetUtils.generate_convex(upsilon)
                 if set(convex) == set(upsilon):
@@ -72,7 +128,7 @@ class PosetSolver:
             elif k == n:
                 result = [[linear_order] for linear_order in upsilon]
             else:
-                result = PosetSolver.exact_k_poset_cover(upsilon, k)
+                result = PosetSolver.exact_k_poset_cover(upsilon, k, progress=progress)
 
             if verbose and result:
                 print(f"Found a {k}-poset cover")
@@ -88,31 +144,40 @@ class PosetSolver:
 
     @staticmethod
     def exact_k_poset_cover(
-        upsilon: list[LinearOrder], k: int, verbose=False
+        upsilon: list[LinearOrder],
+        k: int,
+        verbose=False,
+        progress: KPosetCoverProgressCallback | None = None,
+        at_most=False,
     ) -> list[LinearExtensions] | None:
         """Find k posets which cover the given linear orders
 
         The adjacent transposition graph of the input upsilon must be connected.
         Restrictions on k. The behavior is set to be undefined if k is not minimal. This includes cases when k-1 is greater than the number of edge classes in the input upsilon.
+        With at_most=True, any k is allowed: anchor sets of 1, 2, ... up to k-1 pairs are tried, and after s pairs the legs found so far are combined
+        into covers of at most s+1 posets, so the search ends with a minimum cover where the search for a minimum cover would, however large k is.
 
         Args:
             upsilon: A list of linear orders of equal length
             k: The number of posets to find
             verbose: Print information while the function executes. Defaults to False.
+            progress: Called with the number of anchor sets done out of total, about a hundred times per call.
+            at_most: Find a minimum cover if it has at most k posets, instead of exactly k posets. Defaults to False.
 
         Returns:
-            list[LinearExtensions] | None: A length-k list of linear extensions each corresponding to a poset in the poset cover, if any exists, else returns None
+            list[LinearExtensions] | None: A length-k (at most k if at_most) list of linear extensions each corresponding to a poset in the poset cover, if any exists, else returns None
         """
 
         if verbose:
             print(f"Input k = {k}")
             print(f"Upsilon={upsilon}\n")
 
-        if k == 1:
+        if k == 1 or at_most:
             convex = PosetUtils.generate_convex(upsilon)
             if set(convex) == set(upsilon):
                 return [convex]
-            return None
+            if k == 1:
+                return None
 
         directed_atg_edges: set[tuple[int, int]] = set()
 
@@ -127,67 +192,284 @@ class PosetSolver:
         if verbose:
             print(f"ATG Edges (directed): {directed_atg_edges}\n")
 
-        A_star = combinations(directed_atg_edges, k - 1)
+        # a minimum cover smaller than len(upsilon) needs at most len(upsilon)-2 anchor pairs per poset
+        max_k = min(k, len(upsilon) - 1) if at_most else k
+        # at_most tries the smallest anchor sets first and stops at the first size whose legs form a cover
+        anchor_set_sizes = range(1, max_k) if at_most else [k - 1]
+        anchor_sets_total = sum(
+            comb(len(directed_atg_edges), size) for size in anchor_set_sizes
+        )
+        report_every = max(1, anchor_sets_total // 100)
+        anchor_sets_done = 0
         legs: set[frozenset[LinearOrder]] = set()
-        for anchor_pairs in A_star:
-            upsilon_A: set[LinearOrder] = set()
-            for linear_order in upsilon:
-                linear_order_follows_anchor_pairs = all(
-                    [
-                        PosetUtils.x_is_less_than_y_in_L(linear_order, a, b)
-                        for a, b in anchor_pairs
-                    ]
-                )
-                if linear_order_follows_anchor_pairs:
-                    upsilon_A.add(linear_order)
-
-            A_is_a_poset = False
-            partial_order_A = None
-            if upsilon_A:
-                partial_order_A = PosetUtils.get_partial_order_of_convex(upsilon_A)
-                A_is_a_poset = (
-                    set(
-                        PosetUtils.get_linear_extensions_from_relation(
-                            partial_order_A, upsilon[0]
+        solution: list[LinearExtensions] | None = None
+        for anchor_set_size in anchor_set_sizes:
+            new_legs: set[frozenset[LinearOrder]] = set()
+            any_upsilon_A = False
+            for anchor_pairs in combinations(directed_atg_edges, anchor_set_size):
+                if progress and anchor_sets_done % report_every == 0:
+                    progress(
+                        KPosetCoverProgress(
+                            k=k,
+                            anchor_sets_done=anchor_sets_done,
+                            anchor_sets_total=anchor_sets_total,
                         )
                     )
-                    == upsilon_A
-                )
+                anchor_sets_done += 1
+
+                upsilon_A: set[LinearOrder] = set()
+                for linear_order in upsilon:
+                    linear_order_follows_anchor_pairs = all(
+                        [
+                            PosetUtils.x_is_less_than_y_in_L(linear_order, a, b)
+                            for a, b in anchor_pairs
+                        ]
+                    )
+                    if linear_order_follows_anchor_pairs:
+                        upsilon_A.add(linear_order)
 
-            if verbose:
-                print(f"anchors: {anchor_pairs}")
-                print(f"upsilon_A: {upsilon_A}")
+                A_is_a_poset = False
+                partial_order_A = None
                 if upsilon_A:
-                    print(f"is_poset: {A_is_a_poset}")
+                    any_upsilon_A = True
+                    partial_order_A = PosetUtils.get_partial_order_of_convex(upsilon_A)
+                    A_is_a_poset = (
+                        set(
+                            PosetUtils.get_linear_extensions_from_relation(
+                                partial_order_A, upsilon[0]
+                            )
+                        )
+                        == upsilon_A
+                    )
+
+                if verbose:
+                    print(f"anchors: {anchor_pairs}")
+                    print(f"upsilon_A: {upsilon_A}")
+                    if upsilon_A:
+                        print(f"is_poset: {A_is_a_poset}")
+
+                if A_is_a_poset:
+                    maximal_supercover_linear_extensions = PosetSolver.maximal_poset(
+                        upsilon, list(anchor_pairs), partial_order_A
+                    )
+                    if verbose:
+                        print(f"my_super: {maximal_supercover_linear_extensions}")
+                    leg = frozenset(maximal_supercover_linear_extensions)
+                    if leg not in legs:
+                        new_legs.add(leg)
 
-            if A_is_a_poset:
-                maximal_supercover_linear_extensions = PosetSolver.maximal_poset(
-                    upsilon, list(anchor_pairs), partial_order_A
-                )
                 if verbose:
-                    print(f"my_super: {maximal_supercover_linear_extensions}")
-                legs.add(frozenset(maximal_supercover_linear_extensions))
+                    print("")
 
             if verbose:
-                print("")
+                print(
+                    f"------------------[LEGs Collected with {anchor_set_size} anchor pairs]------------------"
+                )
+                for leg in new_legs:
+                    print(set(leg))
+                print(
+                    "-------------------------------------------------------------------"
+                )
 
-        if verbose:
-            print("------------------------[LEGs Collected]---------------------------")
-            for leg in legs:
-                print(set(leg))
-        if verbose:
-            print("-------------------------------------------------------------------")
+            # a minimum cover of c posets is found among the legs of anchor sets of c-1 pairs, so covers of more than
+            # anchor_set_size+1 legs wait for the next size, which may find fewer. Smaller combinations of old legs failed before.
+            if at_most:
+                solution_sizes = range(1, anchor_set_size + 2)
+                all_legs_from = anchor_set_size + 1
+            else:
+                solution_sizes, all_legs_from = [k], k
+            solution = PosetSolver._find_cover_among_legs(
+                upsilon, legs, new_legs, solution_sizes, all_legs_from
+            )
+            legs |= new_legs
+            if solution is not None:
+                break
+            # more anchor pairs only select subsets of the linear orders selected by fewer
+            if not any_upsilon_A:
+                solution = PosetSolver._find_cover_among_legs(
+                    upsilon,
+                    legs,
+                    set(),
+                    range(anchor_set_size + 2, max_k + 1),
+                    anchor_set_size + 2,
+                )
+                break
 
-        for solution in combinations(legs, k):
-            if frozenset.union(*solution) == set(upsilon):
-                list_of_linear_extensions: list[LinearExtensions] = [
-                    list(frozen) for frozen in solution
-                ]
-                if verbose:
-                    print(f"\n[RESULT]: {list_of_linear_extensions}")
-                return list_of_linear_extensions
+        if progress:
+            progress(
+                KPosetCoverProgress(
+                    k=k,
+                    anchor_sets_done=anchor_sets_total,
+                    anchor_sets_total=anchor_sets_total,
+                )
+            )
+
+        if solution is not None:
+            if verbose:
+                print(f"\n[RESULT]: {solution}")
+            return solution
+        if at_most and k >= len(upsilon):
+            return [[linear_order] for linear_order in upsilon]
         return None
 
+    @staticmethod
+    def _find_cover_among_legs(
+        upsilon: list[LinearOrder],
+        legs: set[frozenset[LinearOrder]],
+        new_legs: set[frozenset[LinearOrder]],
+        solution_sizes: range | list[int],
+        all_legs_from: int,
+    ) -> list[LinearExtensions] | None:
+        """Find the fewest legs covering upsilon among combinations of solution_sizes legs
+
+        Combinations of fewer than all_legs_from legs must contain one of new_legs, the others having been tried before.
+
+        Args:
+            upsilon: A list of linear orders of equal length
+            legs: Legs found before
+            new_legs: Legs not yet tried, disjoint from legs
+            solution_sizes: The numbers of legs to combine, smallest first
+            all_legs_from: The smallest number of legs combined without one of new_legs
+
+        Returns:
+            list[LinearExtensions] | None: The linear extensions of each leg in the cover, if any
+        """
+        upsilon_as_set = set(upsilon)
+        new_legs_list = list(new_legs)
+        for size in solution_sizes:
+            if size >= all_legs_from:
+                for solution in combinations(new_legs_list + list(legs), size):
+                    if frozenset.union(*solution) == upsilon_as_set:
+                        return [list(frozen) for frozen in solution]
+                continue
+            for i, new_leg in enumerate(new_legs_list):
+                # the first new leg of a combination is new_leg, so every combination is tried once
+                others = new_legs_list[i + 1 :] + list(legs)
+                for rest in combinations(others, size - 1):
+                    if new_leg.union(*rest) == upsilon_as_set:
+                        return [list(frozen) for frozen in (new_leg, *rest)]
+        return None
+
+    @staticmethod
+    def k_poset_cover(
+        upsilon: list[LinearOrder], k: int, verbose=False
+    ) -> list[LinearExtensions] | None:
+        """Decide whether at most k posets can cover the given linear orders, and find such posets
+
+        Unlike minimum_poset_cover, smaller k are not attempted first. Each connected component is solved once by exact_k_poset_cover with at_most=True,
+        which finds its minimum cover, with a k of what the components before it left, less one poset for every component after it.
+
+        Args:
+            upsilon: A list of linear orders of equal length
+            k: The maximum number of posets. Must be at least 1.
+            verbose: Print information while the function executes. Defaults to False.
+
+        Returns:
+            list[LinearExtensions] | None: A list of at most k linear extensions each corresponding to a poset in the poset cover, if any exists, else returns None
+        """
+        if k < 1:
+            raise ValueError(f"k must be at least 1. Received {k=}")
+
+        atg: AdjacentTranspositionGraph = PosetUtils.get_atg_from_upsilon(upsilon)
+        connected_components = list(nx.connected_components(atg))
+        if len(connected_components) > k:
+            if verbose:
+                print(
+                    f"Input graph has {len(connected_components)} connected components, more than {k=}."
+                )
+            return None
+
+        poset_cover: list[LinearExtensions] = []
+        for i, connected_component in enumerate(connected_components):
+            # every component after this one needs at least one poset
+            unsolved_components = len(connected_components) - (i + 1)
+            k_for_component = k - len(poset_cover) - unsolved_components
+            component_cover = PosetSolver.exact_k_poset_cover(
+                list(connected_component), k_for_component, verbose, at_most=True
+            )
+            if component_cover is None:
+                if verbose:
+                    print(
+                        f"Component {i} needs more than {k_for_component} posets after {len(poset_cover)} for the components before it."
+                    )
+                return None
+            poset_cover.extend(component_cover)
+
+        if verbose:
+            print(f"Combined solution: {poset_cover}")
+
+        return poset_cover
+
+    @staticmethod
+    def verify_cover(
+        upsilon: list[LinearOrder], posets: list[PartialOrder | CoverRelation]
+    ) -> CoverVerification:
+        """Check that the given posets form a poset cover of upsilon
+
+        Every poset's linear extensions must lie inside upsilon and their union must be upsilon.
+        Only membership checks and extension counting are used; linear extensions are enumerated only to name the violating order of a failed poset.
+
+        Args:
+            upsilon: A list of linear orders of equal length
+            posets: Each poset as its cover relation or partial order, e.g. [(1, 2), (2, 3)]
+
+        Returns:
+            CoverVerification: Whether the posets cover upsilon. On failure, the reason, the index of the failing poset if any, and the first violating linear order.
+        """
+        if not upsilon:
+            raise ValueError("Upsilon must not be empty.")
+        sequence = upsilon[0]
+        if any(len(linear_order) != len(sequence) for linear_order in upsilon):
+            raise ValueError("Linear orders must have equal lengths.")
+
+        upsilon_as_set: set[LinearOrder] = set(upsilon)
+        covered: set[LinearOrder] = set()
+        for i, relation in enumerate(posets):
+            linear_extension_count = PosetUtils.count_linear_extensions(
+                relation, sequence
+            )
+            if linear_extension_count == 0:
+                return CoverVerification(
+                    is_valid=False,
+                    reason=f"Poset {i} has a cycle in its relation.",
+                    poset_index=i,
+                    violating_order=None,
+                )
+
+            linear_extensions_in_upsilon = {
+                linear_order
+                for linear_order in upsilon_as_set
+                if PosetUtils.linear_order_satisfies_relation(linear_order, relation)
+            }
+            if len(linear_extensions_in_upsilon) != linear_extension_count:
+                G = PosetUtils.get_graph_from_relation(relation, sequence)
+                violating_order = next(
+                    linear_order
+                    for sorting in nx.all_topological_sorts(G)
+                    if (linear_order := "".join(map(str, sorting)))
+                    not in upsilon_as_set
+                )
+                return CoverVerification(
+                    is_valid=False,
+                    reason=f"Poset {i} has a linear extension outside of upsilon.",
+                    poset_index=i,
+                    violating_order=violating_order,
+                )
+            covered |= linear_extensions_in_upsilon
+
+        for linear_order in upsilon:
+            if linear_order not in covered:
+                return CoverVerification(
+                    is_valid=False,
+                    reason="A linear order of upsilon is not covered by any poset.",
+                    poset_index=None,
+                    violating_order=linear_order,
+                )
+
+        return CoverVerification(
+            is_valid=True, reason=None, poset_index=None, violating_order=None
+        )
+
     @staticmethod
     def maximal_poset(
         upsilon: list[LinearOrder],
@@ -221,6 +503,9 @@ class PosetSolver:
             print(f"partial_order: {partial_order}\n")
 
         upsilon_as_set: set[LinearOrder] = set(upsilon)
+        # adjacent transpositions are looked up in the neighbors table where it covers upsilon
+        upsilon_are_permutations = PosetUtils._are_permutations(upsilon)
+        store = LayoutStore.get_default()
         partial_order_as_set: set[tuple[int, int]] = set(partial_order)
 
         Y_covered: set[LinearOrder] = set(
@@ -259,9 +544,19 @@ class PosetSolver:
                 for linear_order in Y_covered
                 if PosetUtils.x_is_covered_by_y_in_L(linear_order, x=x, y=y)
             }
-            L_yx: set[LinearOrder] = {
-                PosetUtils.swap_xy_in_L(linear_order, x, y) for linear_order in L_xy
-            }
+            if upsilon_are_permutations:
+                # x immediately precedes y, so swapping x with its successor swaps x and y
+                L_xy_list = list(L_xy)
+                L_yx: set[LinearOrder] = set(
+                    store.swap(
+                        L_xy_list,
+                        [linear_order.find(str(x)) for linear_order in L_xy_list],
+                    )
+                )
+            else:
+                L_yx: set[LinearOrder] = {
+                    PosetUtils.swap_xy_in_L(linear_order, x, y) for linear_order in L_xy
+                }
             L_yx: set[LinearOrder] = {
                 linear_order for linear_order in L_yx if linear_order in Y_uncovered
             }
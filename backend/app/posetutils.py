@@ -1,3 +1,5 @@
+import networkx as nx
+
 from app.classes import *
 
 
@@ -14,13 +16,40 @@ class PosetUtils:
         """
         G = nx.Graph()
         G.add_nodes_from(upsilon)
-        for i in range(len(upsilon)):
-            for j in range(i + 1, len(upsilon)):
-                swapped_nums = PosetUtils.edge_label(upsilon[i], upsilon[j])
-                if swapped_nums:
-                    G.add_edge(upsilon[i], upsilon[j])
+        nodes = list(G)
+        if not PosetUtils._are_permutations(nodes):
+            for i in range(len(upsilon)):
+                for j in range(i + 1, len(upsilon)):
+                    swapped_nums = PosetUtils.edge_label(upsilon[i], upsilon[j])
+                    if swapped_nums:
+                        G.add_edge(upsilon[i], upsilon[j])
+            return G
+
+        # neighbors are looked up in the tables shared by every worker, see LayoutStore
+        from app.layoutstore import LayoutStore
+        from app.permutationtables import PermutationTables
+
+        firsts, seconds, _ = LayoutStore.get_default().adjacent_transpositions(
+            PermutationTables.to_digits(nodes)
+        )
+        G.add_edges_from(
+            (nodes[first], nodes[second])
+            for first, second in zip(firsts.tolist(), seconds.tolist())
+        )
         return G
 
+    @staticmethod
+    def _are_permutations(linear_orders: list[LinearOrder]) -> bool:
+        """Whether linear orders are permutations of 1..n of one length n, which the tables of the LayoutStore cover"""
+        if not linear_orders:
+            return False
+        n = len(linear_orders[0])
+        digits = "".join(map(str, range(1, n + 1)))
+        return n <= 9 and all(
+            len(linear_order) == n and "".join(sorted(linear_order)) == digits
+            for linear_order in linear_orders
+        )
+
     @staticmethod
     def get_linear_extensions_from_graph(
         G: AcyclicDiGraph | HasseDiagram,
@@ -61,6 +90,59 @@ class PosetUtils:
         sortings = list(nx.all_topological_sorts(G))
         return sorted(["".join(map(str, sorting)) for sorting in sortings])
 
+    @staticmethod
+    def count_linear_extensions(
+        relation: PartialOrder | CoverRelation, sequence: str
+    ) -> int:
+        """Count the linear extensions of a poset without enumerating them.
+
+        Uses a dynamic program over the subsets of nodes that can be placed first, which is at most 2^9 subsets for our sizes. \\
+        Returns 0 if the relation contains a cycle, i.e. it does not describe a poset.
+
+        Parameters \\
+        relation (required) -- the partial order or cover relation of a poset, e.g. [(1,2),(2,3)] \\
+        sequence (required) -- a sample linear order like '1234', used for the number of nodes
+
+        Returns \\
+        int
+        """
+        n = len(sequence)
+        predecessors_mask = [0] * n
+        for a, b in relation:
+            if not (1 <= a <= n and 1 <= b <= n):
+                raise ValueError(
+                    f"Relation {(a, b)} has a node outside of 1 to {n}. relation={relation}"
+                )
+            predecessors_mask[b - 1] |= 1 << (a - 1)
+
+        counts = [0] * (1 << n)
+        counts[0] = 1
+        for placed in range(1 << n):
+            count = counts[placed]
+            if count == 0:
+                continue
+            for node in range(n):
+                bit = 1 << node
+                if not placed & bit and predecessors_mask[node] & ~placed == 0:
+                    counts[placed | bit] += count
+        return counts[-1]
+
+    @staticmethod
+    def linear_order_satisfies_relation(
+        linear_order: LinearOrder, relation: PartialOrder | CoverRelation
+    ) -> bool:
+        """Return true if every pair (x, y) of the relation has x before y in the linear order, i.e. it is a linear extension of the poset.
+
+        Parameters \\
+        linear_order (required) -- \\
+        relation (required) -- the partial order or cover relation of a poset
+
+        Returns \\
+        bool
+        """
+        index = {int(node): i for i, node in enumerate(linear_order)}
+        return all(index[x] < index[y] for x, y in relation)
+
     @staticmethod
     def get_graph_from_relation(
         relation: PartialOrder | CoverRelation, sequence: str
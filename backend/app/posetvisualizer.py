@@ -1,13 +1,19 @@
-from typing import TypedDict, Literal
+import colorsys
+import sys
+from functools import cache
+from typing import Any, TypedDict, Literal
 from itertools import permutations, combinations, chain
-import networkx as nx
 import plotly.graph_objects as go
-import seaborn as sns
 import numpy as np
+import scipy.sparse as sp
 
 from numpy.typing import NDArray
 from app.classes import *
+from app.figurejson import FigureJson
+from app.layoutstore import LayoutStore
+from app.permutationtables import PermutationTables
 from app.posetutils import PosetUtils
+from app.posetlayout import LayoutEngine, LayoutInfo, PosetLayout
 
 
 class NodeRenderSpecification(TypedDict):
@@ -46,6 +52,24 @@ class RenderTypeSpecs(TypedDict):
 
 type RenderType = Literal["selected", "highlighted", "other"]
 
+
+class LevelOfDetail(TypedDict):
+    # labels are drawn for the highlighted nodes and at most this many other nodes, the ones nearest to the highlighted nodes
+    max_labels: int
+    # at most this many edges that are not highlighted are drawn, sampled evenly within every swap class
+    max_edges: int
+    # with more nodes than this, only highlighted nodes are labeled
+    marker_only_min_nodes: int
+
+
+class LevelOfDetailInfo(TypedDict):
+    labeledNodes: int
+    totalNodes: int
+    drawnEdges: int
+    totalEdges: int
+    markerOnly: bool
+
+
 type DrawingMethod = Literal[
     "Default",
     "Permutahedron",
@@ -57,8 +81,31 @@ type DrawingMethod = Literal[
 ]
 
 
+def _hls_palette(n_colors: int) -> list[str]:
+    """The colors of seaborn's color_palette("hls", n_colors).as_hex(): evenly spaced hues starting at 0.01 with lightness 0.6 and saturation 0.65"""
+    return [
+        "#"
+        + "".join(
+            format(round(value * 255), "02x")
+            for value in colorsys.hls_to_rgb((i / n_colors + 0.01) % 1, 0.6, 0.65)
+        )
+        for i in range(n_colors)
+    ]
+
+
+# the palette of every number of swap classes up to the C(9, 2) = 36 of PosetVisualizer.MAX_SIZE, so that seaborn is not needed
+SWAP_PALETTES: tuple[tuple[str, ...], ...] = tuple(
+    tuple(_hls_palette(n_colors)) for n_colors in range(36 + 1)
+)
+
+
 class PosetVisualizer:
     MAX_SIZE = 9
+    DEFAULT_LEVEL_OF_DETAIL: LevelOfDetail = {
+        "max_labels": 200,
+        "max_edges": 20000,
+        "marker_only_min_nodes": 5000,
+    }
     PERMUTAHEDRON_MAX = 6
 
     RENDER_TYPE_SPECS: RenderTypeSpecs = {
@@ -91,6 +138,8 @@ class PosetVisualizer:
         upsilon: list[LinearOrder] = [],
         highlighted_poset: LinearExtensions = [],
         drawing_method: DrawingMethod = "Default",
+        layout_engine: LayoutEngine | None = None,
+        level_of_detail: LevelOfDetail | None = None,
     ):
         """Draw an Adjacent Transposition Graph optionally with highlighted portion
 
@@ -98,6 +147,8 @@ class PosetVisualizer:
             size: The length of a linear order. Convetionally indicated as 'n' in our main references.
             upsilon: The set of linear orders to draw. Defaults to [] which is interpreted as all possible linear orders of length 'size'.
             highlighted_poset: The set of linear extensions to highlight. Can be any subset of upsilon. Defaults to []; nothing to highlight.
+            layout_engine: How node positions are computed, see PosetLayout. Defaults to None; spring layout for small sizes, permutahedron coordinates for large ones.
+            level_of_detail: Limits on labels and edges that keep large graphs responsive in the browser, see DEFAULT_LEVEL_OF_DETAIL. Defaults to None; everything is drawn.
 
         Raises:
             TypeError:
@@ -123,32 +174,59 @@ class PosetVisualizer:
         if upsilon:
             self.selected_nodes: list[LinearOrder] = upsilon
         else:
-            sequence: str = "".join(map(str, range(1, size + 1)))
-            perm_strings = ["".join(p) for p in permutations(sequence)]
-            self.selected_nodes: list[LinearOrder] = perm_strings
+            self.selected_nodes: list[LinearOrder] = (
+                LayoutStore.get_default().linear_orders(size)
+            )
 
         graph_plus_info = self._get_graph_and_additional_info()
-        self._graph: nx.Graph = graph_plus_info["graph"]
+        # every node, selected or support, indexed by position. Edges refer to nodes by index
+        self._nodes: list[LinearOrder] = graph_plus_info["nodes"]
+        self._node_index: dict[LinearOrder, int] = {
+            node: index for index, node in enumerate(self._nodes)
+        }
+        # indices of the nodes of the graph: the selected nodes and the support nodes with an edge
+        self._graph_nodes: NDArray[np.int64] = graph_plus_info["graph_nodes"]
+        self._adjacency: sp.csr_array = graph_plus_info["adjacency"]
         # for the next properties, str means '1', '2', '3', etc. except for the values of _pair_to_color which are of course colors
-        self._edges_by_swap: dict[
-            tuple[str, str], list[tuple[LinearOrder, LinearOrder]]
-        ] = graph_plus_info["edges_by_swap"]
+        # each swap class maps to a k x 2 array of node indices, one row per edge
+        self._edges_by_swap: dict[tuple[str, str], NDArray[np.int64]] = graph_plus_info[
+            "edges_by_swap"
+        ]
         self._pair_to_color: dict[tuple[str, str], str] = graph_plus_info[
             "pair_to_color"
         ]
+        # every drawn edge, swap class after swap class, so that an edge is identified by its row
+        self._edges: NDArray[np.int64] = np.concatenate(
+            [np.empty((0, 2), dtype=np.int64), *self._edges_by_swap.values()]
+        )
 
         # Section: Compute coordinates
-        self._pos: dict[LinearOrder, NDArray[np.float64]] = nx.spring_layout(
-            self._graph, dim=3, seed=42, iterations=70
+        self.layout_engine: LayoutEngine = layout_engine or PosetLayout.default_engine(
+            size
         )
+        pos: dict[LinearOrder, NDArray[np.float64]]
+        self.layout_info: LayoutInfo
+        pos, self.layout_info = PosetLayout.layout(
+            [self._nodes[index] for index in self._graph_nodes], self.layout_engine
+        )
+        # row i is the position of self._nodes[i], NaN for nodes outside the graph
+        self._positions: NDArray[np.float64] = np.full((len(self._nodes), 3), np.nan)
+        if len(self._graph_nodes):
+            self._positions[self._graph_nodes] = np.array(
+                [pos[self._nodes[index]] for index in self._graph_nodes]
+            )
 
         # Section: Drawing traces
+        self.level_of_detail: LevelOfDetail | None = level_of_detail
+        # what the level of detail left out, None when everything is drawn
+        self.level_of_detail_info: LevelOfDetailInfo | None = None
         self.highlighted_nodes: LinearExtensions = highlighted_poset
-        self._edge_trace: list[go.Scatter3d] = self._compute_edge_traces()
-        self._node_trace: list[go.Scatter3d] = self._compute_node_traces()
-        self._fig_layout: go.Layout = self._make_fig_layout()
+        # traces are plain dicts of plotly attributes, only turned into plotly objects when asked for
+        self._edge_trace: list[TraceDict]
+        self._node_trace: list[TraceDict]
+        self._compute_traces()
 
-        self._fig: go.Figure
+        self._fig: go.Figure | None
         self.update_figure()
 
     @staticmethod
@@ -177,49 +255,63 @@ class PosetVisualizer:
     @staticmethod
     def _generate_colors(n_colors: int):
         """Create a n-color color pallete"""
-        palette = sns.color_palette("hls", n_colors).as_hex()
-        return palette
+        if n_colors < len(SWAP_PALETTES):
+            return list(SWAP_PALETTES[n_colors])
+        return _hls_palette(n_colors)
 
     def _get_graph_and_additional_info(self):
-        """Sets up graph and swap types"""
-        perm_strings = self.selected_nodes
-        graph = nx.Graph()
-        graph.add_nodes_from(perm_strings)
-        edges_by_swap: dict[tuple[str, str], list[tuple[LinearOrder, LinearOrder]]] = (
-            dict()
+        """Sets up graph and swap types
+
+        Edges are found by looking up the adjacent transpositions of every node instead of comparing all pairs, see PermutationTables,
+        and grouped by swap class as arrays of node indices.
+        """
+        nodes: list[LinearOrder] = list(
+            dict.fromkeys(self.selected_nodes + list(self._support_nodes))
+        )
+        n_selected = len(set(self.selected_nodes))
+        firsts, seconds, swapped = LayoutStore.get_default().adjacent_transpositions(
+            PermutationTables.to_digits(nodes)
+        )
+        adjacency = sp.csr_array(
+            (
+                np.ones(2 * len(firsts)),
+                (np.concatenate([firsts, seconds]), np.concatenate([seconds, firsts])),
+            ),
+            shape=(len(nodes), len(nodes)),
         )
 
-        perms_plus_support = perm_strings + list(self._support_nodes)
-        for i in range(len(perms_plus_support)):
-            for j in range(i + 1, len(perms_plus_support)):
-                perm1 = perms_plus_support[i]
-                perm2 = perms_plus_support[j]
-                swapped_nums = self._get_swapped_numbers(perm1, perm2)
-
-                if swapped_nums:
-                    graph.add_edge(
-                        perm1, perm2
-                    )  # this works even if any perm_i is not a node in the nx.Graph yet
-
-                    # update edges by swap
-                    edge_is_not_support = (
-                        not self._support_nodes
-                        or perm1 not in self._support_nodes
-                        and perm2 not in self._support_nodes
-                    )
-                    if edge_is_not_support or self.drawing_method == "Permutahedron":
-                        edge = (perm1, perm2)
-                        if swapped_nums in edges_by_swap.keys():
-                            edges_by_swap[swapped_nums].append(edge)
-                        else:
-                            edges_by_swap[swapped_nums] = [edge]
+        # support nodes come last. They are only part of the graph if they have an edge
+        is_support = np.arange(len(nodes)) >= n_selected
+        has_edge = np.diff(adjacency.indptr) > 0
+        graph_nodes = np.flatnonzero(~is_support | has_edge)
+
+        # edges between support nodes are only drawn in Permutahedron mode
+        if self._support_nodes and self.drawing_method != "Permutahedron":
+            drawn = ~is_support[firsts] & ~is_support[seconds]
+            firsts, seconds, swapped = firsts[drawn], seconds[drawn], swapped[drawn]
+
+        # group by swap class, keeping the order of the edges within a class and ordering classes by their first edge
+        swap_class = swapped[:, 0].astype(np.int64) * 10 + swapped[:, 1]
+        classes, first_edges = np.unique(swap_class, return_index=True)
+        classes = classes[np.argsort(first_edges)]
+        by_class = np.argsort(swap_class, kind="stable")
+        sorted_classes = swap_class[by_class]
+        starts = np.searchsorted(sorted_classes, classes, side="left")
+        stops = np.searchsorted(sorted_classes, classes, side="right")
+        edges = np.stack([firsts, seconds], axis=1)
+        edges_by_swap: dict[tuple[str, str], NDArray[np.int64]] = {
+            (str(swap // 10), str(swap % 10)): edges[by_class[start:stop]]
+            for swap, start, stop in zip(classes, starts, stops)
+        }
 
         number_pairs = edges_by_swap.keys()
         colors = self._generate_colors(len(number_pairs))
         pair_to_color = dict(zip(number_pairs, colors))
 
         return {
-            "graph": graph,
+            "nodes": nodes,
+            "graph_nodes": graph_nodes,
+            "adjacency": adjacency,
             "edges_by_swap": edges_by_swap,
             "pair_to_color": pair_to_color,
         }
@@ -238,9 +330,7 @@ class PosetVisualizer:
             return []
 
         if permutahedron_embed:
-            size = len(upsilon[0])
-            sequence: str = "".join(map(str, range(1, size + 1)))
-            perm_strings = ["".join(p) for p in permutations(sequence)]
+            perm_strings = LayoutStore.get_default().linear_orders(len(upsilon[0]))
             support_nodes = set(perm_strings) - set(upsilon)
             return sorted(support_nodes)
 
@@ -249,126 +339,156 @@ class PosetVisualizer:
             support_nodes |= set(PosetUtils.generate_convex(upsilon))
 
         if include_hexagonal:
-            perm_strings = list(set.union(support_nodes, set(upsilon)))
-
-            for i in range(len(perm_strings)):
-                for j in range(i + 1, len(perm_strings)):
-                    swapped_nums = self._get_swapped_numbers(
-                        perm_strings[i], perm_strings[j]
-                    )
-                    if swapped_nums:
-                        edge = (perm_strings[i], perm_strings[j])
-                        two_hexagons = self._get_hexagonal_support_nodes(
-                            edge, swapped_nums, one_hexagon_only
-                        )
-                        support_nodes |= set(two_hexagons)
+            perm_strings = sorted(set.union(support_nodes, set(upsilon)))
+            support_nodes |= set(
+                self._get_hexagonal_support_nodes(perm_strings, one_hexagon_only)
+            )
 
         support_nodes -= set(upsilon)
         return sorted(support_nodes)
 
     @staticmethod
     def _get_hexagonal_support_nodes(
-        edge: tuple[LinearOrder, LinearOrder],
-        swapped_nums: tuple[str, str],
-        one_hexagon_only=False,
+        linear_orders: list[LinearOrder], one_hexagon_only=False
     ) -> list[LinearOrder]:
-        """Get the linear orders of the two hexagons containing the edge
+        """Get the linear orders of the hexagons containing the ATG edges between the given linear orders
+
+        An edge swapping positions i and i+1 lies on two hexagons, the orderings of the windows i-1..i+1 and i..i+2 with everything else fixed,
+        or on one near the ends. Every hexagon is identified by its window start and the rank of its member with the window sorted,
+        so that each one is enumerated once however many of its edges are found.
 
         Args:
-            edge: A pair of linear orders connected by an edge in the ATG
-            swapped_nums: The swapped numbers in the edge. Required
+            linear_orders: Distinct linear orders of equal length
+            one_hexagon_only: Whether to take only the left hexagon of every edge, or the right one if there is no left one
 
         Returns:
             list[LinearOrder]: (list[str]) the linear orders of the hexagons
         """
-        edge0: LinearOrder = edge[0]
-        smaller_idx = edge0.index(swapped_nums[0])
-        bigger_idx = edge0.index(swapped_nums[1])
+        store = LayoutStore.get_default()
+        digits = PermutationTables.to_digits(linear_orders)
+        n = digits.shape[1]
+        firsts, seconds, _ = store.adjacent_transpositions(digits)
+        if n < 3 or not len(firsts):
+            return []
 
-        if smaller_idx > bigger_idx:
-            temp = smaller_idx
-            smaller_idx = bigger_idx
-            bigger_idx = temp
+        # Section: Window starts of the hexagons of every edge
+        positions = np.argmax(digits[firsts] != digits[seconds], axis=1)
+        has_left = positions > 0
+        has_right = positions + 2 < n
+        if one_hexagon_only:
+            has_right &= ~has_left
+        edges = np.concatenate([firsts[has_left], firsts[has_right]])
+        starts = np.concatenate([positions[has_left] - 1, positions[has_right]])
+
+        # Section: Deduplicate by (start, rank of the member with its window sorted)
+        window = starts[:, None] + np.arange(3)
+        canonical = digits[edges].copy()
+        rows = np.arange(len(edges))[:, None]
+        canonical[rows, window] = np.sort(canonical[rows, window], axis=1)
+        keys = PermutationTables.rank(canonical) * n + starts
+        keys, unique = np.unique(keys, return_index=True)
+        starts = starts[unique]
+
+        # Section: Walk around every hexagon by swapping at the start and the middle of its window in turn
+        neighbors = store.neighbors(n)
+        member = keys // n
+        hexagons = [member]
+        for step in range(5):
+            member = neighbors[member, starts + step % 2]
+            hexagons.append(member)
+        return store.linear_orders(n, np.concatenate(hexagons))
+
+    def _node_mask(self, nodes: list[LinearOrder]) -> NDArray[np.bool_]:
+        """Boolean mask over self._nodes of the given nodes. Nodes that are not drawn are ignored."""
+        mask = np.zeros(len(self._nodes), dtype=bool)
+        indices = [self._node_index[node] for node in nodes if node in self._node_index]
+        mask[indices] = True
+        return mask
+
+    def _compute_edge_traces(self) -> list[tuple[str, NDArray[np.int64], TraceDict]]:
+        """Categorize edges and create the corresponding traces
+
+        An edge is highlighted if both its ends are highlighted, otherwise selected if both its ends are selected or highlighted.
 
-        support_nodes: set[LinearOrder] = set()
+        Returns:
+            list[tuple[str, NDArray[np.int64], TraceDict]]: The key, edges as rows of self._edges, and trace of every edge trace
+        """
+        is_highlighted = self._node_mask(self.highlighted_nodes)
+        is_selected = is_highlighted | self._node_mask(self.selected_nodes)
 
-        one_hex_done = False
-
-        if smaller_idx > 0:
-            # illustration. if edge0 = 23451 and smaller_idx is 2, then to_permute=345
-            to_permute = edge0[smaller_idx - 1 : smaller_idx + 2]
-            perms = permutations(to_permute)
-            left_half = edge0[: smaller_idx - 1]
-            right_half = edge0[smaller_idx + 2 :]
-            hexagon = {f'{left_half}{"".join(perm)}{right_half}' for perm in perms}
-            support_nodes |= hexagon
-            if one_hexagon_only:
-                one_hex_done = True
-
-        if bigger_idx < len(edge0) - 1 and not one_hex_done:
-            # continuing the illustration, bigger_idx should be 3, then to_permute=451
-            to_permute = edge0[bigger_idx - 1 : bigger_idx + 2]
-            perms = permutations(to_permute)
-            left_half = edge0[: bigger_idx - 1]
-            right_half = edge0[bigger_idx + 2 :]
-            hexagon = {f'{left_half}{"".join(perm)}{right_half}' for perm in perms}
-            support_nodes |= hexagon
-
-        return list(support_nodes)
-
-    def _compute_edge_traces(self) -> list[go.Scatter3d]:
-        """Categorize edges and create the corresponding traces"""
-        edge_traces: list[go.Scatter3d] = []
+        groups: list[tuple[tuple[str, str], RenderType, NDArray[np.int64]]] = []
+        offset = 0
         for number_pair, edges in self._edges_by_swap.items():
-            highlighted_edges: list[tuple[LinearOrder, LinearOrder]] = []
-            selected_edges: list[tuple[LinearOrder, LinearOrder]] = []
-            other_edges: list[tuple[LinearOrder, LinearOrder]] = []
-
-            for edge in edges:
-                p1, p2 = edge
+            firsts, seconds = edges[:, 0], edges[:, 1]
+            highlighted = is_highlighted[firsts] & is_highlighted[seconds]
+            selected = ~highlighted & is_selected[firsts] & is_selected[seconds]
+            other = ~highlighted & ~selected
+            for render_type, mask in (
+                ("highlighted", highlighted),
+                ("selected", selected),
+                ("other", other),
+            ):
+                if mask.any():
+                    groups.append(
+                        (number_pair, render_type, offset + np.flatnonzero(mask))
+                    )
+            offset += len(edges)
+
+        if self.level_of_detail is not None:
+            groups = self._decimate_edges(groups, self.level_of_detail["max_edges"])
+
+        return [
+            (
+                f"edges {pair[0]}-{pair[1]} {render_type}",
+                edge_ids,
+                self._make_edge_trace(
+                    self._edges[edge_ids], render_type=render_type, number_pair=pair
+                ),
+            )
+            for pair, render_type, edge_ids in groups
+        ]
 
-                is_highlighted = (
-                    p1 in self.highlighted_nodes and p2 in self.highlighted_nodes
-                )
-                is_selected = (
-                    not is_highlighted
-                    and (p1 in self.selected_nodes or p1 in self.highlighted_nodes)
-                    and (p2 in self.selected_nodes or p2 in self.highlighted_nodes)
-                )
-                if is_highlighted:
-                    highlighted_edges.append(edge)
-                elif is_selected:
-                    selected_edges.append(edge)
-                else:
-                    other_edges.append(edge)
-
-            if highlighted_edges:
-                trace = self._make_edge_trace(
-                    highlighted_edges,
-                    render_type="highlighted",
-                    number_pair=number_pair,
-                )
-                edge_traces.append(trace)
-            if selected_edges:
-                trace = self._make_edge_trace(
-                    selected_edges, render_type="selected", number_pair=number_pair
-                )
-                edge_traces.append(trace)
-            if other_edges:
-                trace = self._make_edge_trace(
-                    other_edges, render_type="other", number_pair=number_pair
-                )
-                edge_traces.append(trace)
+    @staticmethod
+    def _decimate_edges(
+        groups: list[tuple[tuple[str, str], RenderType, NDArray[np.int64]]],
+        max_edges: int,
+    ) -> list[tuple[tuple[str, str], RenderType, NDArray[np.int64]]]:
+        """Keep at most max_edges edges that are not highlighted, every group keeping a share proportional to its size
 
-        return edge_traces
+        Edges are sampled evenly along each group, so every swap class stays visible. Highlighted edges are always kept.
+        """
+        sizes = np.array(
+            [
+                0 if render_type == "highlighted" else len(edges)
+                for _, render_type, edges in groups
+            ]
+        )
+        total = int(sizes.sum())
+        if total <= max_edges:
+            return groups
+
+        # every group keeps at least one edge
+        shares = np.maximum(sizes * max_edges // total, sizes > 0)
+        return [
+            (
+                pair,
+                render_type,
+                (
+                    edges
+                    if render_type == "highlighted"
+                    else edges[np.linspace(0, len(edges) - 1, share).astype(np.int64)]
+                ),
+            )
+            for (pair, render_type, edges), share in zip(groups, shares)
+        ]
 
     def _make_edge_trace(
         self,
-        edges: list[tuple[LinearOrder, LinearOrder]],
+        edges: NDArray[np.int64],
         render_type: RenderType = "selected",
         number_pair: tuple[str, str] = ("1", "2"),
-    ) -> go.Scatter3d:
-        """Create an edge trace"""
+    ) -> TraceDict:
+        """Create an edge trace from a k x 2 array of node indices"""
         # set trace options according to render type
         edge_color_by_swap = self._pair_to_color[number_pair]
         edge_color_highlighted = self.RENDER_TYPE_SPECS["edge"]["highlighted"]["color"]
@@ -384,23 +504,17 @@ class PosetVisualizer:
         trace_opacity = self.RENDER_TYPE_SPECS["edge"][render_type]["opacity"]
         trace_show_legend = render_type == "selected"
 
-        selected_edges_x: list[np.float64 | None] = []
-        selected_edges_y: list[np.float64 | None] = []
-        selected_edges_z: list[np.float64 | None] = []
-
-        for edge in edges:
-            p1, p2 = edge
-            x_coords = [self._pos[p1][0], self._pos[p2][0], None]
-            y_coords = [self._pos[p1][1], self._pos[p2][1], None]
-            z_coords = [self._pos[p1][2], self._pos[p2][2], None]
-            selected_edges_x.extend(x_coords)
-            selected_edges_y.extend(y_coords)
-            selected_edges_z.extend(z_coords)
-
-        return go.Scatter3d(
-            x=selected_edges_x,
-            y=selected_edges_y,
-            z=selected_edges_z,
+        # every edge is a segment of its two ends followed by a NaN, which breaks the line
+        segments = np.full((3, len(edges), 3), np.nan)
+        segments[:, :, 0] = self._positions[edges[:, 0]].T
+        segments[:, :, 1] = self._positions[edges[:, 1]].T
+        edges_x, edges_y, edges_z = segments.reshape(3, -1)
+
+        return dict(
+            type="scatter3d",
+            x=edges_x,
+            y=edges_y,
+            z=edges_z,
             mode="lines",
             line=line_dict,
             opacity=trace_opacity,
@@ -409,39 +523,92 @@ class PosetVisualizer:
             showlegend=trace_show_legend,
         )
 
-    def _compute_node_traces(self) -> list[go.Scatter3d]:
-        """Categorize nodes and create the corresponding traces"""
+    def _compute_node_traces(self) -> list[tuple[str, NDArray[np.int64], TraceDict]]:
+        """Categorize nodes and create the corresponding traces
 
-        def node_is_other(node: LinearOrder) -> bool:
-            return (
-                node not in self.selected_nodes and node not in self.highlighted_nodes
+        Returns:
+            list[tuple[str, NDArray[np.int64], TraceDict]]: The key, nodes as indices of self._nodes, and trace of every node trace
+        """
+        highlighted_set = set(self.highlighted_nodes)
+        selected_nodes: list[LinearOrder] = [
+            node for node in self.selected_nodes if node not in highlighted_set
+        ]
+        other_nodes: list[LinearOrder] = []
+        if self.drawing_method == "Permutahedron":
+            is_other = ~(
+                self._node_mask(self.selected_nodes)
+                | self._node_mask(self.highlighted_nodes)
             )
+            other_nodes = [
+                self._nodes[index]
+                for index in self._graph_nodes[is_other[self._graph_nodes]]
+            ]
+
+        labeled = self._get_labeled_nodes(selected_nodes + other_nodes)
+        node_traces: list[tuple[str, NDArray[np.int64], TraceDict]] = []
+        for render_type, nodes in (
+            ("highlighted", self.highlighted_nodes),
+            ("selected", selected_nodes),
+            ("other", other_nodes),
+        ):
+            if labeled is None or render_type == "highlighted":
+                parts = [(nodes, True)]
+            else:
+                parts = [
+                    ([node for node in nodes if node in labeled], True),
+                    ([node for node in nodes if node not in labeled], False),
+                ]
+            parts = [(part, with_labels) for part, with_labels in parts if part]
+            for i, (part, with_labels) in enumerate(parts):
+                trace = self._make_node_trace(part, render_type, with_labels)
+                # a render type split in two still has one legend entry
+                trace["showlegend"] &= i == 0
+                key = f"nodes {render_type}" + ("" if with_labels else " unlabeled")
+                node_ids = np.array(
+                    [self._node_index[node] for node in part], dtype=np.int64
+                )
+                node_traces.append((key, node_ids, trace))
+        return node_traces
 
-        selected_nodes: list[LinearOrder] = [
-            node for node in self.selected_nodes if node not in self.highlighted_nodes
+    def _get_labeled_nodes(
+        self, unhighlighted_nodes: list[LinearOrder]
+    ) -> set[LinearOrder] | None:
+        """The nodes that keep their labels under the level of detail besides the highlighted ones, None if every node is labeled
+
+        These are the max_labels nodes nearest to the center of the highlighted nodes, or to the center of the graph if nothing is highlighted.
+        """
+        if self.level_of_detail is None:
+            return None
+        n_nodes = len(self.highlighted_nodes) + len(unhighlighted_nodes)
+        if n_nodes >= self.level_of_detail["marker_only_min_nodes"]:
+            return set()
+        max_labels = self.level_of_detail["max_labels"]
+        if len(unhighlighted_nodes) <= max_labels:
+            return set(unhighlighted_nodes)
+
+        highlighted = [
+            self._node_index[node]
+            for node in self.highlighted_nodes
+            if node in self._node_index
         ]
-        other_nodes: list[LinearOrder] = (
-            [node for node in self._graph.nodes() if node_is_other(node)]
-            if self.drawing_method == "Permutahedron"
+        center = (
+            self._positions[highlighted].mean(axis=0) if highlighted else np.zeros(3)
+        )
+        indices = np.array([self._node_index[node] for node in unhighlighted_nodes])
+        distances = np.linalg.norm(self._positions[indices] - center, axis=1)
+        nearest = (
+            np.argpartition(distances, max_labels - 1)[:max_labels]
+            if max_labels
             else []
         )
-
-        node_traces: list[go.Scatter3d] = []
-        if self.highlighted_nodes:
-            node_traces.append(
-                self._make_node_trace(self.highlighted_nodes, render_type="highlighted")
-            )
-        if selected_nodes:
-            node_traces.append(
-                self._make_node_trace(selected_nodes, render_type="selected")
-            )
-        if other_nodes:
-            node_traces.append(self._make_node_trace(other_nodes, render_type="other"))
-        return node_traces
+        return {unhighlighted_nodes[i] for i in nearest}
 
     def _make_node_trace(
-        self, nodes: list[LinearOrder], render_type: RenderType = "selected"
-    ) -> go.Scatter3d:
+        self,
+        nodes: list[LinearOrder],
+        render_type: RenderType = "selected",
+        with_labels: bool = True,
+    ) -> TraceDict:
         """Create a node trace"""
         # set trace options according to render type
         marker_dict = dict(
@@ -451,33 +618,57 @@ class PosetVisualizer:
         trace_opacity = self.RENDER_TYPE_SPECS["node"][render_type]["opacity"]
         trace_show_legend = render_type == "selected"
 
-        selected_nodes_x: list[np.float64] = []
-        selected_nodes_y: list[np.float64] = []
-        selected_nodes_z: list[np.float64] = []
-        selected_nodes_text: list[LinearOrder] = []
-
-        for node in nodes:
-            pos = self._pos[node]
-            selected_nodes_x.append(pos[0])
-            selected_nodes_y.append(pos[1])
-            selected_nodes_z.append(pos[2])
-            selected_nodes_text.append(node)
-
-        return go.Scatter3d(
-            x=selected_nodes_x,
-            y=selected_nodes_y,
-            z=selected_nodes_z,
+        indices = np.array([self._node_index[node] for node in nodes], dtype=np.int64)
+        nodes_x, nodes_y, nodes_z = (
+            self._positions[indices, axis] for axis in range(3)
+        )
+
+        trace = dict(
+            type="scatter3d",
+            x=nodes_x,
+            y=nodes_y,
+            z=nodes_z,
             mode="markers+text",
             marker=marker_dict,
-            text=selected_nodes_text,
+            text=list(nodes),
             textposition="top center",
             opacity=trace_opacity,
             hoverinfo="skip",
             name="Permutations",
             showlegend=trace_show_legend,
         )
+        if not with_labels:
+            trace["mode"] = "markers"
+            del trace["text"], trace["textposition"]
+        return trace
+
+    def _compute_traces(self) -> None:
+        """Compute the edge and node traces, which nodes and edges each one draws, and what the level of detail left out"""
+        edge_traces = self._compute_edge_traces()
+        node_traces = self._compute_node_traces()
+        self._edge_trace = [trace for _, _, trace in edge_traces]
+        self._node_trace = [trace for _, _, trace in node_traces]
+        # trace key to the rows of self._edges or indices of self._nodes it draws, see get_trace_members
+        self._trace_members = {
+            key: members for key, members, _ in [*edge_traces, *node_traces]
+        }
+        if self.level_of_detail is None:
+            self.level_of_detail_info = None
+            return
+
+        total_nodes = sum(len(trace["x"]) for trace in self._node_trace)
+        self.level_of_detail_info = {
+            "labeledNodes": sum(
+                len(trace.get("text", [])) for trace in self._node_trace
+            ),
+            "totalNodes": total_nodes,
+            "drawnEdges": sum(len(trace["x"]) // 3 for trace in self._edge_trace),
+            "totalEdges": sum(len(edges) for edges in self._edges_by_swap.values()),
+            "markerOnly": total_nodes >= self.level_of_detail["marker_only_min_nodes"],
+        }
 
-    def _make_fig_layout(self) -> go.Layout:
+    @staticmethod
+    def _make_fig_layout() -> go.Layout:
         """Create the figure layout"""
         return go.Layout(
             scene=dict(
@@ -497,15 +688,13 @@ class PosetVisualizer:
     def select_nodes(self, select_nodes: list[LinearOrder]) -> None:
         """Selects specified nodes"""
         self.selected_nodes = select_nodes
-        self._node_trace = self._compute_node_traces()
-        self._edge_trace = self._compute_edge_traces()
+        self._compute_traces()
         self.update_figure()
 
     def highlight_nodes(self, select_nodes: list[LinearOrder]) -> None:
         """Highlights specified nodes"""
         self.highlighted_nodes = select_nodes
-        self._node_trace = self._compute_node_traces()
-        self._edge_trace = self._compute_edge_traces()
+        self._compute_traces()
         self.update_figure()
 
     def select_and_highlight_nodes(
@@ -513,23 +702,110 @@ class PosetVisualizer:
     ) -> None:
         self.highlighted_nodes = highlight_nodes
         self.selected_nodes = select_nodes
-        self._node_trace = self._compute_node_traces()
-        self._edge_trace = self._compute_edge_traces()
+        self._compute_traces()
         self.update_figure()
 
     def update_figure(self) -> None:
-        """Updates figure."""
-        self._fig = go.Figure(
-            data=[*self._edge_trace, *self._node_trace], layout=self._fig_layout
-        )
+        """Updates figure. The plotly figure is only built again when it is shown."""
+        self._fig = None
 
     def show_figure(self) -> None:
         """Displays the current visualization."""
+        if self._fig is None:
+            self._fig = go.Figure(**self.get_figure_data())
         self._fig.show()
 
-    def get_figure_data(self) -> dict[str, list[go.Scatter3d] | go.Layout]:
-        """Gets the figure data."""
+    def get_figure_data(self) -> FigureData:
+        """Gets the figure data as plotly objects, validated by plotly."""
+        return {
+            "data": [
+                go.Scatter3d({k: v for k, v in trace.items() if k != "type"})
+                for trace in [*self._edge_trace, *self._node_trace]
+            ],
+            "layout": self._make_fig_layout(),
+        }
+
+    def get_figure_dict(
+        self, coordinate_dtype: CoordinateDtype | None = None
+    ) -> FigureDict:
+        """Gets the figure as plain dicts and NumPy arrays, without plotly validation.
+
+        Equivalent to go.Figure(self.get_figure_data()).to_dict() with NaN for None and plain arrays instead of base64 typed arrays,
+        ready for a NumPy-aware JSON encoder, see FigureJson.
+
+        Args:
+            coordinate_dtype: If given, x, y and z of every trace are encoded as base64 typed arrays of this precision. Defaults to None; plain arrays.
+        """
+        traces = [*self._edge_trace, *self._node_trace]
+        if coordinate_dtype is not None:
+            traces = [
+                {
+                    **trace,
+                    **{
+                        axis: FigureJson.typed_array(trace[axis], coordinate_dtype)
+                        for axis in ("x", "y", "z")
+                    },
+                }
+                for trace in traces
+            ]
+        return {"data": traces, "layout": self._get_layout_dict()}
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the graph, edge classes, positions and traces, for memory-bounded caches"""
+        arrays: list[NDArray] = [
+            self._positions,
+            self._edges,
+            self._graph_nodes,
+            self._adjacency.data,
+            self._adjacency.indices,
+            self._adjacency.indptr,
+            *self._edges_by_swap.values(),
+            *self._trace_members.values(),
+        ]
+        for trace in [*self._edge_trace, *self._node_trace]:
+            arrays += [trace["x"], trace["y"], trace["z"]]
+        labels = sum(len(trace.get("text", [])) for trace in self._node_trace)
+        # the node strings, and the pointers to them in self._nodes, self._node_index and the node lists
+        node_bytes = sys.getsizeof(self._nodes[0]) if self._nodes else 0
+        pointers = 8 * (labels + len(self.selected_nodes) + len(self.highlighted_nodes))
+        return (
+            sum(array.nbytes for array in arrays)
+            + len(self._nodes) * (node_bytes + 8)
+            + sys.getsizeof(self._node_index)
+            + pointers
+        )
+
+    def get_scene(self) -> dict[str, Any]:
+        """The parts of the figure that never change: node labels, their positions and the drawable edges.
+
+        Traces refer to nodes by their index in "nodes" and to edges by their row in "edges", see get_trace_members.
+        Positions of nodes that are not drawn are NaN.
+        """
         return {
-            "data": [*self._edge_trace, *self._node_trace],
-            "layout": self._fig_layout,
+            "nodes": self._nodes,
+            "positions": self._positions,
+            "edges": self._edges,
         }
+
+    def get_trace_members(self) -> dict[str, NDArray[np.int64]]:
+        """The nodes or edges drawn by every trace, by trace key, e.g. "edges 1-2 selected" or "nodes highlighted" """
+        return dict(self._trace_members)
+
+    def get_trace_styles(self) -> dict[str, TraceDict]:
+        """The attributes of every trace except its coordinates and labels, by trace key"""
+        return {
+            key: {
+                attribute: value
+                for attribute, value in trace.items()
+                if attribute not in ("x", "y", "z", "text")
+            }
+            for key, trace in zip(
+                self._trace_members, [*self._edge_trace, *self._node_trace]
+            )
+        }
+
+    @staticmethod
+    @cache
+    def _get_layout_dict() -> dict[str, Any]:
+        """The figure layout with the default template applied, as a dict. It is the same for every figure, so it is built once."""
+        return go.Figure(layout=PosetVisualizer._make_fig_layout()).to_dict()["layout"]
@@ -0,0 +1,68 @@
+from pydantic import BaseModel
+from typing import Literal
+
+import plotly.graph_objects as go
+
+
+class GraphRequest(BaseModel):
+    input_mode: Literal["Linear Orders", "Poset"]
+    drawing_method: Literal[
+        "Default",
+        "Permutahedron",
+        "Supercover",
+        "SuperHex",
+    ]
+    size: int
+    selected_nodes: list[str] = []
+    highlighted_nodes: list[str] = []
+    cover_relation: list[tuple[int, int]] = []
+    layout_engine: (
+        Literal["spring", "permutahedron", "multilevel", "spectral"] | None
+    ) = None
+    # send trace coordinates as base64 typed arrays of this precision instead of lists of numbers
+    coordinate_dtype: Literal["float32", "float64"] | None = None
+    # limit labels and edges of large graphs, see PosetVisualizer.DEFAULT_LEVEL_OF_DETAIL
+    level_of_detail: bool = False
+
+
+class GraphData(BaseModel):
+    data: list[go.Scatter3d]
+    layout: go.Layout
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+# a change to the selection or highlight of a /graph/session. Nodes that are left out stay as they are.
+class SessionUpdate(BaseModel):
+    selected_nodes: list[str] | None = None
+    highlighted_nodes: list[str] | None = None
+
+
+# collapses linear orders into clusters drawn as single nodes, see ClusterView
+class ClusterRequest(BaseModel):
+    size: int
+    selected_nodes: list[str] = []
+    cluster_by: Literal["prefix", "component", "poset"] = "prefix"
+    prefix_length: int = 1
+    posets: list[list[tuple[int, int]]] = []
+
+
+# draws the linear orders of one cluster of a ClusterRequest like a GraphRequest
+class ClusterExpandRequest(ClusterRequest):
+    cluster: int
+    highlighted_nodes: list[str] = []
+    layout_engine: (
+        Literal["spring", "permutahedron", "multilevel", "spectral"] | None
+    ) = None
+    coordinate_dtype: Literal["float32", "float64"] | None = None
+    level_of_detail: bool = True
+
+
+class SolveJobRequest(BaseModel):
+    upsilon: list[str]
+
+
+class VerifyRequest(BaseModel):
+    upsilon: list[str]
+    posets: list[list[tuple[int, int]]]
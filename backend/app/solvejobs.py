@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Literal
+
+from app.classes import *
+
+type SolveJobStatus = Literal["queued", "running", "done", "failed"]
+type SolveJobEventType = Literal["status", "progress", "done", "failed"]
+
+
+# Set in each worker process by _init_worker. Workers report (job_id, event_type, data) through it.
+_progress_queue: Any = None
+
+
+def _init_worker(progress_queue: Any) -> None:
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _run_solve_job(job_id: str, upsilon: list[LinearOrder]) -> None:
+    """Solve a job inside a worker process, reporting everything through the progress queue"""
+    from app.computetasks import solve_poset_cover
+
+    _progress_queue.put((job_id, "status", {"status": "running"}))
+    try:
+        result = solve_poset_cover(
+            upsilon,
+            progress=lambda progress: _progress_queue.put(
+                (job_id, "progress", progress)
+            ),
+        )
+    except Exception as e:
+        _progress_queue.put((job_id, "failed", {"error": str(e)}))
+    else:
+        _progress_queue.put((job_id, "done", {"result": result}))
+
+
+class SolveJob:
+    def __init__(self, job_id: str, key: str, upsilon: list[LinearOrder]):
+        self.id = job_id
+        self.key = key
+        self.upsilon = upsilon
+        self.status: SolveJobStatus = "queued"
+        self.progress: SolveProgress | None = None
+        self.result: dict[str, list] | None = None
+        self.error: str | None = None
+        # append-only, an event's id is its index
+        self.events: list[tuple[SolveJobEventType, dict]] = []
+        self.finished_at: float | None = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "jobId": self.id,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class SolveJobManager:
+    """Runs poset cover solves in the background and keeps their results for a while.
+
+    Jobs run on a local process pool. Progress reported by PosetSolver inside the workers is sent back through a queue and recorded as job events, which clients can poll or stream.
+    Submitting an upsilon that already has a queued, running or finished job returns that job instead of solving it again.
+    Finished jobs are forgotten ttl seconds after they finish.
+    """
+
+    def __init__(self, max_workers: int = 1, ttl: float = 3600):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self._jobs: dict[str, SolveJob] = {}
+        self._job_ids_by_key: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+        self._progress_queue: Any = None
+        self._drain_thread: threading.Thread | None = None
+
+    @classmethod
+    def from_env(cls) -> "SolveJobManager":
+        """Create a manager configured by ATG_SOLVE_JOB_WORKERS and ATG_SOLVE_JOB_TTL"""
+        return cls(
+            max_workers=int(os.environ.get("ATG_SOLVE_JOB_WORKERS", "1")),
+            ttl=float(os.environ.get("ATG_SOLVE_JOB_TTL", "3600")),
+        )
+
+    @staticmethod
+    def _job_key(upsilon: list[LinearOrder]) -> str:
+        return hashlib.sha256(json.dumps(sorted(set(upsilon))).encode()).hexdigest()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                mp_context = multiprocessing.get_context("spawn")
+                self._progress_queue = mp_context.Queue()
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=mp_context,
+                    initializer=_init_worker,
+                    initargs=(self._progress_queue,),
+                )
+                self._drain_thread = threading.Thread(
+                    target=self._drain, args=(self._progress_queue,), daemon=True
+                )
+                self._drain_thread.start()
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Forget a broken pool, e.g. after a worker was killed, so that the next submission starts a fresh one"""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            progress_queue = self._progress_queue
+            self._pool = None
+            self._progress_queue = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        progress_queue.put(None)
+
+    def _drain(self, progress_queue: Any) -> None:
+        """Record the events sent by the workers until shutdown"""
+        while True:
+            item = progress_queue.get()
+            if item is None:
+                return
+            job_id, event_type, data = item
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None and not job.is_finished:
+                    self._record(job, event_type, data)
+
+    def _record(self, job: SolveJob, event_type: SolveJobEventType, data: dict) -> None:
+        """Append an event and update the job accordingly. Must be called with the lock held."""
+        # the event is appended before the status changes so that readers that see a finished job also see its last event
+        job.events.append((event_type, data))
+        if event_type == "status":
+            job.status = data["status"]
+        elif event_type == "progress":
+            job.progress = data
+        elif event_type == "done":
+            job.result = data["result"]
+            job.status = "done"
+            job.finished_at = time.monotonic()
+        elif event_type == "failed":
+            job.error = data["error"]
+            job.status = "failed"
+            job.finished_at = time.monotonic()
+
+    def _on_job_future_done(self, job: SolveJob, future: Future) -> None:
+        # a job normally reports its own outcome; this only catches crashed workers and cancelled jobs
+        if future.cancelled():
+            error = "Job was cancelled."
+        elif future.exception() is not None:
+            error = str(future.exception()) or "Job crashed."
+        else:
+            return
+        with self._lock:
+            if not job.is_finished:
+                self._record(job, "failed", {"error": error})
+
+    def _purge_expired(self) -> None:
+        """Forget finished jobs older than ttl. Must be called with the lock held."""
+        now = time.monotonic()
+        expired = [
+            job
+            for job in self._jobs.values()
+            if job.finished_at is not None and now - job.finished_at >= self.ttl
+        ]
+        for job in expired:
+            del self._jobs[job.id]
+            if self._job_ids_by_key.get(job.key) == job.id:
+                del self._job_ids_by_key[job.key]
+
+    def submit(self, upsilon: list[LinearOrder]) -> SolveJob:
+        """Start solving upsilon in the background, or return the job already solving it"""
+        key = self._job_key(upsilon)
+        with self._lock:
+            self._purge_expired()
+            job_id = self._job_ids_by_key.get(key)
+            if job_id is not None and self._jobs[job_id].status != "failed":
+                return self._jobs[job_id]
+
+            job = SolveJob(uuid.uuid4().hex, key, upsilon)
+            self._record(job, "status", {"status": "queued"})
+            self._jobs[job.id] = job
+            self._job_ids_by_key[key] = job.id
+
+        try:
+            pool = self._get_pool()
+            try:
+                future = pool.submit(_run_solve_job, job.id, upsilon)
+            except BrokenProcessPool:
+                self._discard_pool(pool)
+                future = self._get_pool().submit(_run_solve_job, job.id, upsilon)
+        except Exception as e:
+            # a job that never started must not stay queued, or identical requests would wait on it forever
+            with self._lock:
+                self._record(job, "failed", {"error": str(e) or "Job could not start."})
+            return job
+        future.add_done_callback(lambda f: self._on_job_future_done(job, f))
+        return job
+
+    def get(self, job_id: str) -> SolveJob | None:
+        with self._lock:
+            self._purge_expired()
+            return self._jobs.get(job_id)
+
+    async def stream_events(
+        self,
+        job: SolveJob,
+        last_event_id: int = -1,
+        poll_interval: float = 0.25,
+        keepalive_interval: float = 15,
+    ) -> AsyncIterator[str]:
+        """Yield the events of a job after last_event_id as Server-Sent Events until the job finishes"""
+        next_event_id = last_event_id + 1
+        idle_time = 0.0
+        while True:
+            # read the status first; a finished job already has all of its events
+            is_finished = job.is_finished
+            events = job.events[next_event_id:]
+            for event_type, data in events:
+                yield f"id: {next_event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+                next_event_id += 1
+
+            if is_finished:
+                return
+
+            if events:
+                idle_time = 0.0
+            elif idle_time >= keepalive_interval:
+                yield ": keepalive\n\n"
+                idle_time = 0.0
+
+            await asyncio.sleep(poll_interval)
+            idle_time += poll_interval
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool = self._pool
+            progress_queue = self._progress_queue
+            self._pool = None
+            self._progress_queue = None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+            progress_queue.put(None)
@@ -0,0 +1,126 @@
+import warnings
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components, laplacian
+from scipy.sparse.linalg import eigsh, lobpcg
+
+from numpy.typing import NDArray
+from app.componentpacking import ComponentPacking
+
+
+class SpectralLayout:
+    """Spectral layout: the eigenvectors of the 3 smallest nontrivial eigenvalues of the graph Laplacian as coordinates
+
+    Every connected component is laid out on its own and the components are then packed side by side.
+    Eigenvalues of ATGs are highly degenerate, e.g. the smallest nontrivial eigenvalue of a full ATG has multiplicity n-1,
+    so the eigensolvers used are ones that find every copy: shift-invert Lanczos and the block method LOBPCG.
+    Structurally equivalent nodes, like two leaves attached to the same node, get the same position.
+    """
+
+    # up to this many nodes, a component is solved densely
+    DENSE_MAX_SIZE = 50
+    # up to this many nodes, a component is solved with shift-invert eigsh, above with LOBPCG
+    EIGSH_MAX_SIZE = 2000
+    LOBPCG_TOLERANCE = 1e-3
+    LOBPCG_MAX_ITERATIONS = 200
+
+    @staticmethod
+    def layout(
+        adjacency: sp.sparray | sp.spmatrix,
+        initial: NDArray[np.float64] | None = None,
+        seed: int = 42,
+    ) -> NDArray[np.float64]:
+        """Lay out a graph given its sparse adjacency matrix
+
+        Args:
+            adjacency: The V x V symmetric adjacency matrix
+            initial: V x 3 positions close to the expected eigenvectors, which LOBPCG starts from. Defaults to None; random.
+            seed: Seed of the starting vectors of the eigensolvers
+
+        Returns:
+            NDArray[np.float64]: The V x 3 positions scaled to [-1, 1]
+        """
+        adjacency = sp.csr_array(adjacency, dtype=np.float64)
+        n_nodes = adjacency.shape[0]
+        pos = np.zeros((n_nodes, 3))
+        if n_nodes <= 1:
+            return pos
+
+        rng = np.random.default_rng(seed)
+        n_components, labels = connected_components(adjacency, directed=False)
+        members = np.argsort(labels, kind="stable")
+        boundaries = np.cumsum(np.bincount(labels, minlength=n_components))[:-1]
+        components = np.split(members, boundaries)
+
+        layouts = []
+        for component in components:
+            vectors = SpectralLayout._component_layout(
+                adjacency[component][:, component],
+                None if initial is None else initial[component],
+                rng,
+            )
+            # unit eigenvectors shrink with the component, so give every component a volume proportional to its size instead
+            limit = np.abs(vectors).max()
+            if limit > 0:
+                vectors *= len(component) ** (1 / 3) / limit
+            layouts.append(vectors)
+
+        if n_components == 1:
+            pos = layouts[0]
+        else:
+            for component, layout in zip(components, ComponentPacking.pack(layouts)):
+                pos[component] = layout
+
+        pos -= (pos.max(axis=0) + pos.min(axis=0)) / 2
+        limit = np.abs(pos).max()
+        if limit > 0:
+            pos /= limit
+        return pos
+
+    @staticmethod
+    def _component_layout(
+        adjacency: sp.csr_array,
+        initial: NDArray[np.float64] | None,
+        rng: np.random.Generator,
+    ) -> NDArray[np.float64]:
+        """The eigenvectors of the 3 smallest nontrivial eigenvalues of the Laplacian of a connected graph as a V x 3 array
+
+        Columns are zero when the graph has fewer than 4 nodes.
+        """
+        n_nodes = adjacency.shape[0]
+        vectors = np.zeros((n_nodes, 3))
+        if n_nodes <= 1:
+            return vectors
+
+        matrix = laplacian(adjacency)
+        if n_nodes <= SpectralLayout.DENSE_MAX_SIZE:
+            _, eigenvectors = np.linalg.eigh(matrix.toarray())
+            nontrivial = eigenvectors[:, 1:4]
+        elif n_nodes <= SpectralLayout.EIGSH_MAX_SIZE:
+            # eigenvalues nearest to a small negative shift, i.e. the smallest ones, with a fixed start for determinism
+            eigenvalues, eigenvectors = eigsh(
+                matrix, k=4, sigma=-1e-3, which="LM", v0=rng.random(n_nodes)
+            )
+            nontrivial = eigenvectors[:, np.argsort(eigenvalues)[1:4]]
+        else:
+            start = rng.standard_normal((n_nodes, 3))
+            if initial is not None:
+                start = initial - initial.mean(axis=0) + 1e-3 * start
+            # the constant vector spans the trivial eigenspace, so it is excluded with the constraint Y
+            with warnings.catch_warnings():
+                # LOBPCG warns when it stops at the iteration limit, where the layout is already good enough
+                warnings.simplefilter("ignore", UserWarning)
+                eigenvalues, nontrivial = lobpcg(
+                    matrix,
+                    start,
+                    Y=np.ones((n_nodes, 1)),
+                    M=sp.diags_array(1 / matrix.diagonal()),
+                    tol=SpectralLayout.LOBPCG_TOLERANCE,
+                    maxiter=SpectralLayout.LOBPCG_MAX_ITERATIONS,
+                    largest=False,
+                )
+            nontrivial = nontrivial[:, np.argsort(eigenvalues)]
+
+        vectors[:, : nontrivial.shape[1]] = nontrivial
+        return vectors
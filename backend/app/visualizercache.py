@@ -0,0 +1,123 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, TypedDict
+
+from app.classes import *
+from app.posetvisualizer import PosetVisualizer
+
+
+class VisualizerCacheStats(TypedDict):
+    hits: int
+    misses: int
+    hitRate: float
+    entries: int
+    bytes: int
+    maxBytes: int
+
+
+class VisualizerCache:
+    """A memory-bounded LRU of built PosetVisualizers, so that redrawing the same graph with another highlight only re-highlights
+
+    Support nodes, edges, swap classes and positions only depend on the size, the set of selected nodes, the drawing method,
+    the layout engine and the level of detail, which make up the key. Entries are evicted least recently used first
+    once their PosetVisualizer.memory_usage adds up to more than max_bytes.
+    """
+
+    _default: "VisualizerCache | None" = None
+
+    def __init__(self, max_bytes: int = 512 * 2**20):
+        """
+        Args:
+            max_bytes: The memory the cached visualizers may use. A visualizer larger than this is not cached. 0 disables the cache.
+        """
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative.")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: OrderedDict[str, tuple[PosetVisualizer, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "VisualizerCache":
+        """Create a cache configured by ATG_VISUALIZER_CACHE_MB"""
+        max_megabytes = float(os.environ.get("ATG_VISUALIZER_CACHE_MB", "512"))
+        return cls(max_bytes=int(max_megabytes * 2**20))
+
+    @classmethod
+    def get_default(cls) -> "VisualizerCache":
+        """The cache shared by everything in this process"""
+        if cls._default is None:
+            cls._default = cls.from_env()
+        return cls._default
+
+    @staticmethod
+    def key(
+        size: int,
+        selected_nodes: list[LinearOrder],
+        drawing_method: str,
+        layout_engine: str | None,
+        level_of_detail: dict | None,
+    ) -> str:
+        """The key of a visualizer. The order of the selected nodes does not matter."""
+        digest = hashlib.sha256(
+            repr(
+                (
+                    size,
+                    drawing_method,
+                    layout_engine,
+                    sorted((level_of_detail or {}).items()),
+                )
+            ).encode()
+        )
+        for node in sorted(set(selected_nodes)):
+            digest.update(b"\0" + node.encode())
+        return digest.hexdigest()
+
+    def get_or_build(
+        self, key: str, build: Callable[[], PosetVisualizer]
+    ) -> tuple[PosetVisualizer, bool]:
+        """The cached visualizer for key, else a new one from build, which is then cached
+
+        Returns:
+            tuple[PosetVisualizer, bool]: The visualizer and whether it came from the cache. A cached visualizer keeps the
+                selection and highlight of its last use; callers set their own with select_and_highlight_nodes.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], True
+            self.misses += 1
+
+        visualizer = build()
+        usage = visualizer.memory_usage()
+        if usage > self.max_bytes:
+            return visualizer, False
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (visualizer, usage)
+            self._bytes += usage
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_usage) = self._entries.popitem(last=False)
+                self._bytes -= evicted_usage
+        return visualizer, False
+
+    def stats(self) -> VisualizerCacheStats:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self.max_bytes,
+            }
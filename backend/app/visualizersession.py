@@ -0,0 +1,92 @@
+from typing import Any
+
+import numpy as np
+
+from numpy.typing import NDArray
+from app.classes import *
+from app.computetasks import graph_info
+from app.posetvisualizer import PosetVisualizer
+from app.schemas import SessionUpdate
+
+
+class VisualizerSession:
+    """A PosetVisualizer kept alive between selection and highlight changes, see the /graph/session WebSocket
+
+    Positions and edges are sent once in a snapshot. Every update afterwards only sends, for each trace,
+    the nodes or edges that joined or left it, and the style of traces that did not exist before.
+    Clients rebuild trace coordinates from the positions of the snapshot.
+    """
+
+    def __init__(self, visualizer: PosetVisualizer):
+        self.visualizer = visualizer
+        self._drawable_nodes: set[LinearOrder] = set(visualizer.get_scene()["nodes"])
+        self._members: dict[str, NDArray[np.int64]] = {}
+        self._styles: dict[str, TraceDict] = {}
+
+    def snapshot(self) -> dict[str, Any]:
+        """The whole scene and every trace with its members"""
+        self._members = self.visualizer.get_trace_members()
+        self._styles = self.visualizer.get_trace_styles()
+        return {
+            "type": "snapshot",
+            **self.visualizer.get_scene(),
+            "traces": {
+                key: {"style": self._styles[key], "members": members}
+                for key, members in self._members.items()
+            },
+            "info": graph_info(self.visualizer),
+        }
+
+    def update(self, update: SessionUpdate) -> dict[str, Any]:
+        """Apply a selection or highlight change and return how the traces changed
+
+        Raises:
+            ValueError: If a node is not part of the graph. Nothing changes then.
+
+        Returns:
+            dict[str, Any]: A delta message. "traces" maps every changed trace key to the members "added" and "removed",
+                and to its "style" if the trace is new or its style changed. "removedTraces" lists the keys of traces that are now empty.
+        """
+        visualizer = self.visualizer
+        selected_nodes = (
+            visualizer.selected_nodes
+            if update.selected_nodes is None
+            else update.selected_nodes
+        )
+        highlighted_nodes = (
+            visualizer.highlighted_nodes
+            if update.highlighted_nodes is None
+            else update.highlighted_nodes
+        )
+        unknown = (set(selected_nodes) | set(highlighted_nodes)) - self._drawable_nodes
+        if unknown:
+            raise ValueError(f"Nodes not in the graph: {sorted(unknown)}")
+        # a node sent twice is drawn once
+        selected_nodes = list(dict.fromkeys(selected_nodes))
+        highlighted_nodes = list(dict.fromkeys(highlighted_nodes))
+        visualizer.select_and_highlight_nodes(selected_nodes, highlighted_nodes)
+
+        members = visualizer.get_trace_members()
+        styles = visualizer.get_trace_styles()
+        empty = np.empty(0, dtype=np.int64)
+        traces: dict[str, dict[str, Any]] = {}
+        for key, new in members.items():
+            old = self._members.get(key, empty)
+            # members of the snapshot may repeat nodes sent twice in the GraphRequest
+            added = np.setdiff1d(new, old)
+            removed = np.setdiff1d(old, new)
+            style_changed = styles[key] != self._styles.get(key)
+            if not (len(added) or len(removed) or style_changed):
+                continue
+            traces[key] = {"added": added, "removed": removed}
+            if style_changed:
+                traces[key]["style"] = styles[key]
+        removed_traces = [key for key in self._members if key not in members]
+        self._members, self._styles = members, styles
+
+        return {
+            "type": "delta",
+            "traces": traces,
+            "removedTraces": removed_traces,
+            "info": graph_info(visualizer),
+        }
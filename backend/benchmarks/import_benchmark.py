@@ -0,0 +1,76 @@
+"""Measure how long importing the app takes in a fresh interpreter, as on a cold start
+
+Usage, from the backend directory:
+    python -m benchmarks.import_benchmark [--module app.main] [--repeat 5] [--top 15] [--max-ms 1500]
+
+Every run imports the module in a new interpreter with -X importtime. The fastest run is reported along with the modules
+that took longest to import themselves. With --max-ms, the exit status is 1 if even the fastest run was slower.
+"""
+
+import argparse
+import subprocess
+import sys
+
+# modules that must not be imported when the app starts, only once a graph is drawn or a cover is solved
+DEFERRED_MODULES = (
+    "numpy",
+    "scipy",
+    "networkx",
+    "seaborn",
+    "matplotlib",
+    "pandas",
+    "app.computetasks",
+    "app.posetvisualizer",
+)
+
+
+def import_times(module: str = "app.main") -> dict[str, tuple[int, int]]:
+    """Import a module in a fresh interpreter and return the self and cumulative microseconds of every module it imported"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.repeat)]
+    fastest = min(runs, key=lambda times: times[args.module][1])
+    total_ms = fastest[args.module][1] / 1000
+
+    print(f"{'self ms':>9} {'cumul. ms':>9} module")
+    for name, (self_us, cumulative_us) in sorted(
+        fastest.items(), key=lambda item: item[1][0], reverse=True
+    )[: args.top]:
+        print(f"{self_us / 1000:>9.1f} {cumulative_us / 1000:>9.1f} {name}")
+    print(f"import {args.module}: {total_ms:.1f} ms, fastest of {args.repeat}")
+
+    deferred = [
+        name
+        for name in DEFERRED_MODULES
+        if args.module == "app.main" and name in fastest
+    ]
+    if deferred:
+        print(f"imported at startup: {', '.join(deferred)}")
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"slower than {args.max_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Compare the build time and peak memory of the layout engines on full ATGs
+
+Usage, from the backend directory:
+    python -m benchmarks.layout_benchmark [--sizes 7 8 9] [--engines spring spectral] [--spring-max-size 5040]
+
+Memory is the peak of Python allocations traced by tracemalloc, which includes NumPy and SciPy buffers.
+Spring layout is O(V^2) per iteration, so it is skipped for graphs with more than --spring-max-size nodes.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import networkx as nx
+
+from app.permutationtables import PermutationTables
+from app.posetlayout import PosetLayout
+
+
+def atg(n: int) -> nx.Graph:
+    digits = PermutationTables.all_digits(n)
+    nodes = PermutationTables.to_linear_orders(digits)
+    rows, cols = PermutationTables.adjacency(digits).nonzero()
+    graph = nx.Graph()
+    graph.add_nodes_from(nodes)
+    graph.add_edges_from((nodes[row], nodes[col]) for row, col in zip(rows, cols))
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[7, 8, 9])
+    parser.add_argument(
+        "--engines",
+        nargs="+",
+        default=list(PosetLayout.ENGINES),
+        choices=PosetLayout.ENGINES,
+    )
+    parser.add_argument("--spring-max-size", type=int, default=5040)
+    args = parser.parse_args()
+
+    print(f"{'n':>2} {'nodes':>7} {'engine':>13} {'seconds':>9} {'peak MiB':>9}")
+    for n in args.sizes:
+        graph = atg(n)
+        for engine in args.engines:
+            if engine == "spring" and len(graph) > args.spring_max_size:
+                print(f"{n:>2} {len(graph):>7} {engine:>13} {'skipped':>9}")
+                continue
+
+            tracemalloc.start()
+            started_at = time.perf_counter()
+            PosetLayout.layout(graph, engine)
+            seconds = time.perf_counter() - started_at
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{n:>2} {len(graph):>7} {engine:>13} {seconds:>9.2f} {peak / 2**20:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
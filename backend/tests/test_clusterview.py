@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from app.clusterview import ClusterView
+
+
+def test_prefix_clusters():
+    view = ClusterView(4, prefix_length=1)
+    assert view.names == ["1*", "2*", "3*", "4*"]
+    assert view.sizes.tolist() == [6, 6, 6, 6]
+    assert all(node.startswith("2") for node in view.members(1))
+
+    # every prefix cluster is a permutahedron of size 3, and the 4! * 3 / 2 = 36 ATG edges are either inside or between clusters
+    assert [cluster["internalEdges"] for cluster in view.clusters] == [6, 6, 6, 6]
+    weights = {(a, b): weight for a, b, weight in view.cluster_edges}
+    assert sum(weights.values()) == 36 - 4 * 6
+    # swapping the first two positions of 'ab..' gives 'ba..', which joins every pair of clusters
+    assert weights == {(a, b): 2 for a in range(4) for b in range(a + 1, 4)}
+
+    view = ClusterView(4, prefix_length=2)
+    assert len(view.names) == 12
+    assert view.members(view.names.index("31*")) == ["3124", "3142"]
+
+
+def test_component_clusters():
+    view = ClusterView(4, ["1234", "2134", "4321", "3421"], "component")
+    assert view.names == ["Component 1", "Component 2"]
+    assert view.members(0) == ["1234", "2134"]
+    assert view.members(1) == ["3421", "4321"]
+    assert view.cluster_edges == []
+
+
+def test_poset_clusters():
+    view = ClusterView(3, cluster_by="poset", posets=[[(1, 2)], [(2, 1), (3, 2)]])
+    assert view.names == ["Poset 1", "Poset 2", "Uncovered"]
+    # a linear extension of both posets belongs to the first one
+    assert view.members(0) == ["123", "132", "312"]
+    assert view.members(1) == ["321"]
+    assert view.members(2) == ["213", "231"]
+
+
+def test_positions_are_centroids():
+    view = ClusterView(4, prefix_length=1)
+    positions = view.positions
+    assert positions.shape == (4, 3)
+    # the centroid of all linear orders is the center of the permutahedron
+    assert np.allclose(positions.mean(axis=0), 0)
+    assert not np.allclose(positions[0], positions[1])
+
+
+def test_figure():
+    view = ClusterView(5, prefix_length=2)
+    figure = view.get_figure_dict()
+    node_trace = figure["data"][-1]
+    assert node_trace["text"] == view.names
+    assert len(node_trace["x"]) == len(view.names)
+    edge_points = sum(len(trace["x"]) for trace in figure["data"][:-1])
+    assert edge_points == 3 * len(view.cluster_edges)
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        ClusterView(10)
+    with pytest.raises(ValueError):
+        ClusterView(4, prefix_length=4)
+    with pytest.raises(ValueError):
+        ClusterView(4, cluster_by="poset")
+    with pytest.raises(ValueError):
+        ClusterView(4).members(4)
+
+    view = ClusterView(4)
+    view.MAX_EXPANDED_NODES = 5
+    with pytest.raises(ValueError):
+        view.expand(0)
@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+from itertools import permutations
+
+import numpy as np
+import pytest
+
+from app.componentlayout import ComponentLayout
+from app.posetlayout import PosetLayout
+
+
+def all_linear_orders(n: int) -> list[str]:
+    return ["".join(p) for p in permutations("123456789"[:n])]
+
+
+# two hexagons: the orders of 3 with 4 fixed in front or in back
+COMPONENTS = [
+    ["4" + p for p in all_linear_orders(3)],
+    [p + "4" for p in all_linear_orders(3)],
+]
+
+
+def test_content_hash():
+    nodes = COMPONENTS[0]
+    assert ComponentLayout.content_hash("spring", nodes) == (
+        ComponentLayout.content_hash("spring", nodes[::-1])
+    )
+    assert ComponentLayout.content_hash("spring", nodes) != (
+        ComponentLayout.content_hash("multilevel", nodes)
+    )
+    assert ComponentLayout.content_hash("spring", nodes) != (
+        ComponentLayout.content_hash("spring", nodes[1:])
+    )
+
+
+def test_layout():
+    component_layout = ComponentLayout(max_workers=1)
+    nodes = COMPONENTS[0] + COMPONENTS[1]
+    pos, iterations = component_layout.layout("spring", nodes)
+    assert pos.shape == (12, 3)
+    assert 0 < iterations <= PosetLayout.SPRING_MAX_ITERATIONS
+    assert np.isclose(np.abs(pos).max(), 1)
+
+    # components are packed without overlapping bounding boxes
+    assert np.any(
+        (pos[6:].min(axis=0) > pos[:6].max(axis=0))
+        | (pos[:6].min(axis=0) > pos[6:].max(axis=0))
+    )
+
+    # each component keeps the shape it has on its own
+    alone, _ = component_layout.layout("spring", COMPONENTS[0])
+    together = pos[:6] - pos[:6].mean(axis=0)
+    alone = alone - alone.mean(axis=0)
+    assert np.allclose(together / np.abs(together).max(), alone / np.abs(alone).max())
+
+    with pytest.raises(ValueError, match="Invalid force-directed layout engine"):
+        component_layout.layout("spectral", nodes)
+
+
+def test_cache():
+    component_layout = ComponentLayout(max_workers=1, cache_size=1)
+    nodes = COMPONENTS[0] + COMPONENTS[1]
+    pos, _ = component_layout.layout("multilevel", nodes)
+    assert len(component_layout._cache) == 1
+
+    # the order of the nodes does not matter
+    reordered, _ = component_layout.layout("multilevel", nodes[::-1])
+    assert np.allclose(reordered[::-1], pos)
+
+
+def test_parallel():
+    # two components of 720 nodes: 1 fixed in front or in back of the orders of the other 6 values
+    others = ["".join(p) for p in permutations("234567")]
+    nodes = ["1" + p for p in others] + [p + "1" for p in others]
+    inline = ComponentLayout(max_workers=1)
+    parallel = ComponentLayout(max_workers=2)
+    parallel.PARALLEL_MIN_SIZE = 500
+    try:
+        expected, _ = inline.layout("multilevel", nodes, time_budget=None)
+        pos, _ = parallel.layout("multilevel", nodes, time_budget=None)
+        assert parallel._pool is not None
+        assert np.allclose(pos, expected)
+    finally:
+        parallel.shutdown()
+
+
+def test_default_max_workers(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    assert ComponentLayout.default_max_workers() == 8
+
+    # inside a compute worker, the cores are shared with the other compute workers
+    monkeypatch.setattr(multiprocessing, "parent_process", lambda: object())
+    monkeypatch.delenv("ATG_COMPUTE_WORKERS", raising=False)
+    assert ComponentLayout.default_max_workers() == 1
+    monkeypatch.setenv("ATG_COMPUTE_WORKERS", "2")
+    assert ComponentLayout.default_max_workers() == 4
+    assert ComponentLayout().max_workers == 4
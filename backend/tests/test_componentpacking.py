@@ -0,0 +1,25 @@
+import numpy as np
+
+from app.componentpacking import ComponentPacking
+
+
+def test_pack():
+    rng = np.random.default_rng(0)
+    layouts = [rng.random((size, 3)) * size for size in (1, 2, 5, 10, 3, 1)]
+    packed = ComponentPacking.pack(layouts, gap=0.5)
+    assert len(packed) == len(layouts)
+
+    for layout, moved in zip(layouts, packed):
+        # components are only translated
+        assert np.allclose(moved - moved[0], layout - layout[0])
+
+    # bounding boxes are at least gap apart along some axis
+    boxes = [(moved.min(axis=0), moved.max(axis=0)) for moved in packed]
+    for i, (low1, high1) in enumerate(boxes):
+        for low2, high2 in boxes[i + 1 :]:
+            assert np.any((low2 - high1 >= 0.5 - 1e-9) | (low1 - high2 >= 0.5 - 1e-9))
+
+    everything = np.concatenate(packed)
+    assert np.allclose(everything.max(axis=0), -everything.min(axis=0))
+
+    assert ComponentPacking.pack([]) == []
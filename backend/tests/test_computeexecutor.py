@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+import pytest
+
+from app.computeexecutor import ComputeExecutor, ComputeExecutorSaturated
+
+
+def test_run():
+    executor = ComputeExecutor(max_workers=1, max_queue=0)
+    try:
+        assert asyncio.run(executor.run(pow, 2, 10)) == 1024
+        assert executor.in_flight == 0
+    finally:
+        executor.shutdown()
+
+
+def test_saturated():
+    executor = ComputeExecutor(max_workers=1, max_queue=1, retry_after=3)
+    try:
+        running = executor.submit(time.sleep, 1)
+        queued = executor.submit(time.sleep, 0)
+        assert executor.in_flight == 2
+
+        with pytest.raises(ComputeExecutorSaturated, match="retry in 3 seconds") as e:
+            executor.submit(time.sleep, 0)
+        assert e.value.retry_after == 3
+
+        running.result()
+        queued.result()
+        assert executor.in_flight == 0
+        assert executor.submit(pow, 3, 2).result() == 9
+    finally:
+        executor.shutdown()
+
+
+def test_errors_raised():
+    with pytest.raises(ValueError, match="max_queue"):
+        ComputeExecutor(max_workers=1, max_queue=-1)
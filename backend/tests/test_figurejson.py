@@ -0,0 +1,54 @@
+import base64
+import json
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+import pytest
+
+from app.figurejson import FigureJson
+from app.posetvisualizer import PosetVisualizer
+
+
+def test_dumps():
+    positions = np.arange(6, dtype=np.float64).reshape(2, 3)
+    figure = {
+        "data": [{"x": np.array([1.0, np.nan]), "y": positions.T[0], "n": np.int64(2)}],
+        "layout": {},
+    }
+    assert json.loads(FigureJson.dumps(figure)) == {
+        "data": [{"x": [1.0, None], "y": [0.0, 3.0], "n": 2}],
+        "layout": {},
+    }
+
+
+def test_same_document_as_plotly():
+    visualizer = PosetVisualizer(
+        4, ["1234", "2134", "2143", "1243", "4321"], ["1234", "2134"]
+    )
+    figure_data = visualizer.get_figure_data()
+    expected = pio.to_json(
+        {
+            "data": [trace.to_plotly_json() for trace in figure_data["data"]],
+            "layout": go.Figure(layout=figure_data["layout"]).to_dict()["layout"],
+        },
+        validate=False,
+    )
+    actual = FigureJson.dumps(visualizer.get_figure_dict())
+    assert json.loads(actual) == json.loads(expected)
+
+
+def test_typed_array():
+    values = np.array([0.5, np.nan, -1.0])
+    encoded = FigureJson.typed_array(values, "float32")
+    assert encoded["dtype"] == "f4"
+    decoded = np.frombuffer(base64.b64decode(encoded["bdata"]), dtype="<f4")
+    np.testing.assert_array_equal(decoded, values.astype(np.float32))
+
+    encoded = FigureJson.typed_array(values[::2], "float64")
+    assert encoded["dtype"] == "f8"
+    decoded = np.frombuffer(base64.b64decode(encoded["bdata"]), dtype="<f8")
+    np.testing.assert_array_equal(decoded, [0.5, -1.0])
+
+    with pytest.raises(ValueError):
+        FigureJson.typed_array(values, "int8")
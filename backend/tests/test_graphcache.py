@@ -0,0 +1,69 @@
+import gzip
+
+import orjson
+
+from app.graphcache import GraphCache
+from app.schemas import GraphRequest
+
+
+def make_request(**kwargs) -> GraphRequest:
+    return GraphRequest(
+        **{
+            "input_mode": "Linear Orders",
+            "drawing_method": "Default",
+            "size": 3,
+            "selected_nodes": ["123", "132"],
+            **kwargs,
+        }
+    )
+
+
+def test_etag():
+    etag = GraphCache.etag(make_request())
+    assert etag.startswith('"') and etag.endswith('"')
+    assert GraphCache.etag(make_request()) == etag
+    # cover relations are ignored in Linear Orders mode
+    assert GraphCache.etag(make_request(cover_relation=[(1, 2)])) == etag
+    assert GraphCache.etag(make_request(selected_nodes=["123"])) != etag
+    assert GraphCache.etag(make_request(layout_engine="spectral")) != etag
+
+    assert GraphCache.matches(etag, etag)
+    assert GraphCache.matches(etag, f'"other", W/{etag}')
+    assert GraphCache.matches(etag, "*")
+    assert not GraphCache.matches(etag, '"other"')
+    assert not GraphCache.matches(etag, None)
+
+
+def test_lru():
+    cache = GraphCache(max_entries=2)
+    cache.put('"a"', "{}")
+    cache.put('"b"', "{}")
+    assert cache.get('"a"') is not None
+    cache.put('"c"', "{}")
+    assert cache.get('"b"') is None
+    assert cache.get('"a"') is not None and cache.get('"c"') is not None
+
+    cache = GraphCache(max_entries=0)
+    cache.put('"a"', "{}")
+    assert cache.get('"a"') is None
+
+
+def test_encode():
+    cache = GraphCache()
+    fig_json = '{"data": [' + ", ".join(["1.0"] * 1000) + "]}"
+    entry = cache.put('"a"', fig_json)
+    assert orjson.loads(entry.body) == fig_json
+
+    body, content_encoding = cache.encode(entry, None)
+    assert (body, content_encoding) == (entry.body, None)
+    body, content_encoding = cache.encode(entry, "gzip;q=0, br")
+    assert content_encoding is None
+
+    body, content_encoding = cache.encode(entry, "br, gzip")
+    assert content_encoding == "gzip"
+    assert gzip.decompress(body) == entry.body
+    assert len(body) < len(entry.body)
+    assert cache.encode(entry, "gzip")[0] is body
+
+    small = cache.put('"b"', "{}")
+    assert cache.encode(small, "gzip") == (small.body, None)
@@ -0,0 +1,113 @@
+import os
+from itertools import permutations
+
+import numpy as np
+
+from app.layoutstore import LayoutStore
+from app.permutationtables import PermutationTables
+from app.posetlayout import PosetLayout
+
+
+def test_positions(tmp_path):
+    store = LayoutStore(str(tmp_path))
+    positions = store.positions(4)
+    assert positions.shape == (24, 3)
+    assert isinstance(positions, np.memmap)
+    assert not positions.flags.writeable
+    assert store.positions(4) is positions
+
+    # a second store, e.g. in another worker, maps the same file
+    nodes = ["".join(p) for p in permutations("1234")]
+    assert np.array_equal(LayoutStore(str(tmp_path)).positions(4), positions)
+    assert np.allclose(positions, PosetLayout.permutahedron_coordinates(nodes))
+
+
+def test_gather(tmp_path):
+    store = LayoutStore(str(tmp_path))
+    nodes = ["4321", "1234", "2134"]
+    assert np.allclose(
+        store.gather(nodes), PosetLayout.permutahedron_coordinates(nodes)
+    )
+    assert store.gather([]).shape == (0, 3)
+
+
+def test_digits(tmp_path):
+    store = LayoutStore(str(tmp_path))
+    digits = store.digits(4)
+    assert isinstance(digits, np.memmap)
+    assert np.array_equal(digits, PermutationTables.all_digits(4))
+    assert os.path.exists(store.path(4, "digits"))
+
+
+def test_cleanup(tmp_path):
+    store = LayoutStore(str(tmp_path))
+    store.positions(3)
+    stale = [
+        f"permutahedron-n3-v{LayoutStore.VERSION - 1}.npy",
+        # written by a process that no longer runs
+        f"digits-n4-v{LayoutStore.VERSION}.npy.999999999.1.tmp",
+    ]
+    kept = [
+        os.path.basename(store.path(3)),
+        os.path.basename(store.path(3, "digits")),
+        # still being written by this process
+        f"digits-n5-v{LayoutStore.VERSION}.npy.{os.getpid()}.1.tmp",
+    ]
+    for name in [*stale, kept[2]]:
+        (tmp_path / name).write_bytes(b"")
+
+    assert sorted(store.cleanup()) == sorted(stale)
+    assert sorted(os.listdir(tmp_path)) == sorted(kept)
+    assert LayoutStore(str(tmp_path / "missing")).cleanup() == []
+
+
+def test_cleanup_skips_files_it_cannot_delete(tmp_path, monkeypatch):
+    store = LayoutStore(str(tmp_path))
+    (tmp_path / "digits-n4-v0.npy").write_bytes(b"")
+
+    def remove(path):
+        raise PermissionError(path)
+
+    monkeypatch.setattr(os, "remove", remove)
+    assert store.cleanup() == []
+
+
+def test_neighbors(tmp_path):
+    store = LayoutStore(str(tmp_path))
+    neighbors = store.neighbors(4)
+    assert neighbors.shape == (24, 3)
+    assert neighbors.dtype == np.int32
+    # '1234' (rank 0) swapped at positions 0, 1 and 2
+    assert (
+        neighbors[0].tolist()
+        == PermutationTables.rank_linear_orders(["2134", "1324", "1243"]).tolist()
+    )
+
+
+def test_adjacent_transpositions(tmp_path):
+    store = LayoutStore(str(tmp_path))
+    digits = PermutationTables.to_digits(["1243", "2134", "1234", "4321", "1324"])
+    firsts, seconds, swapped = store.adjacent_transpositions(digits)
+    expected = PermutationTables.ranked_adjacent_transpositions(digits)
+    assert np.array_equal(firsts, expected[0])
+    assert np.array_equal(seconds, expected[1])
+    assert np.array_equal(swapped, expected[2])
+
+
+def test_publish(tmp_path):
+    LayoutStore(str(tmp_path)).publish(4)
+    assert len(os.listdir(tmp_path)) == 3 * len(LayoutStore.TABLES)
+
+
+def test_linear_orders(tmp_path):
+    store = LayoutStore(str(tmp_path))
+    nodes = ["".join(p) for p in permutations("1234")]
+    assert store.linear_orders(4) == nodes
+    assert store.linear_orders(4, np.array([23, 0])) == ["4321", "1234"]
+
+
+def test_swap_and_neighbors_of(tmp_path):
+    store = LayoutStore(str(tmp_path))
+    assert store.swap(["1234", "4321", "2143"], [0, 2, 1]) == ["2134", "4312", "2413"]
+    assert store.swap([], []) == []
+    assert store.neighbors_of("2134") == ["1234", "2314", "2143"]
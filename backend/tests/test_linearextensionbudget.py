@@ -0,0 +1,31 @@
+import pytest
+
+from app.linearextensionbudget import (
+    LinearExtensionBudget,
+    LinearExtensionBudgetExceeded,
+)
+from app.posetutils import PosetUtils
+
+
+def test_check():
+    budget = LinearExtensionBudget(max_full=10, max_count=100)
+    assert budget.check([(1, 2), (2, 3)], 4) == 4
+    assert budget.route(4) == "full"
+    assert budget.check([], 4) == 24
+    assert budget.route(24) == "level_of_detail"
+
+    with pytest.raises(LinearExtensionBudgetExceeded) as excinfo:
+        budget.check([], 5)
+    assert excinfo.value.count == 120
+    assert "120 linear extensions" in str(excinfo.value)
+
+    with pytest.raises(ValueError, match="cycle"):
+        budget.check([(1, 2), (2, 3), (3, 1)], 4)
+
+
+def test_linear_extensions():
+    # both enumerations agree, filtering being used from FILTER_MIN_COUNT extensions
+    for relation in ([], [(1, 2)], [(1, 3), (2, 3), (4, 5)], [(1, 2), (2, 3), (3, 4)]):
+        count = PosetUtils.count_linear_extensions(relation, "1234567")
+        expected = PosetUtils.get_linear_extensions_from_relation(relation, "1234567")
+        assert LinearExtensionBudget.linear_extensions(relation, 7, count) == expected
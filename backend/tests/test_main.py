@@ -0,0 +1,252 @@
+import base64
+import json
+
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from app import main
+from app.main import app
+from benchmarks.import_benchmark import DEFERRED_MODULES, import_times
+
+
+def test_health():
+    with TestClient(app) as client:
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json() == {"message": "good"}
+
+
+def test_startup_defers_heavy_imports():
+    imported = import_times("app.main")
+    assert [name for name in DEFERRED_MODULES if name in imported] == []
+
+
+def test_graph():
+    with TestClient(app) as client:
+        response = client.post(
+            "/graph",
+            json={
+                "input_mode": "Linear Orders",
+                "drawing_method": "Default",
+                "size": 3,
+                "selected_nodes": ["123", "132", "312"],
+                "highlighted_nodes": ["123"],
+            },
+        )
+        assert response.status_code == 200
+        figure = json.loads(response.json())
+        assert set(figure.keys()) == {"data", "layout", "info"}
+        assert figure["info"]["layoutEngine"] == "spring"
+        assert figure["info"]["layoutIterations"] > 0
+        assert any("123" in trace.get("text", []) for trace in figure["data"])
+
+        response = client.post(
+            "/graph",
+            json={
+                "input_mode": "Linear Orders",
+                "drawing_method": "Default",
+                "size": 3,
+                "selected_nodes": ["123", "132", "312"],
+                "coordinate_dtype": "float32",
+            },
+        )
+        assert response.status_code == 200
+        figure = json.loads(response.json())
+        for trace in figure["data"]:
+            assert trace["x"]["dtype"] == "f4"
+            assert len(base64.b64decode(trace["x"]["bdata"])) % 4 == 0
+
+
+def test_graph_etag():
+    request = {
+        "input_mode": "Linear Orders",
+        "drawing_method": "Default",
+        "size": 4,
+        "selected_nodes": ["1234", "2134", "2143"],
+    }
+    with TestClient(app) as client:
+        response = client.post("/graph", json=request)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "misses=" in response.headers["X-Visualizer-Cache"]
+
+        cached = client.post("/graph", json=request)
+        assert cached.headers["ETag"] == etag
+        assert cached.content == response.content
+        # the statistics of the worker are not replayed with the cached figure
+        assert "X-Visualizer-Cache" not in cached.headers
+
+        not_modified = client.post(
+            "/graph", json=request, headers={"If-None-Match": etag}
+        )
+        assert not_modified.status_code == 304
+        assert not_modified.headers["ETag"] == etag
+
+        changed = client.post(
+            "/graph",
+            json={**request, "highlighted_nodes": ["1234"]},
+            headers={"If-None-Match": etag},
+        )
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+
+        response = client.post(
+            "/graph",
+            json={
+                "input_mode": "Linear Orders",
+                "drawing_method": "Default",
+                "size": 1,
+            },
+        )
+        assert response.status_code == 400
+
+
+def test_graph_poset_budget():
+    with TestClient(app) as client:
+        request = {"input_mode": "Poset", "drawing_method": "Default", "size": 4}
+        response = client.post("/graph", json={**request, "cover_relation": [[1, 2]]})
+        assert response.status_code == 200
+        figure = json.loads(response.json())
+        drawn = {node for trace in figure["data"] for node in trace.get("text", [])}
+        assert len(drawn) == 12
+
+        # every linear order of size 9 is more than the default budget
+        response = client.post("/graph", json={**request, "size": 9})
+        assert response.status_code == 400
+        assert "362880 linear extensions" in response.json()["detail"]
+
+        response = client.post(
+            "/graph", json={**request, "cover_relation": [[1, 2], [2, 1]]}
+        )
+        assert response.status_code == 400
+
+
+def test_graph_session():
+    with TestClient(app) as client:
+        with client.websocket_connect("/graph/session") as websocket:
+            websocket.send_json(
+                {
+                    "input_mode": "Linear Orders",
+                    "drawing_method": "Default",
+                    "size": 3,
+                    "selected_nodes": ["123", "132", "312"],
+                }
+            )
+            snapshot = json.loads(websocket.receive_text())
+            assert snapshot["type"] == "snapshot"
+            assert set(snapshot["nodes"]) == {"123", "132", "312"}
+
+            websocket.send_json({"highlighted_nodes": ["123", "132"]})
+            delta = json.loads(websocket.receive_text())
+            assert delta["type"] == "delta"
+            assert "edges 2-3 highlighted" in delta["traces"]
+
+            websocket.send_json({"highlighted_nodes": ["321"]})
+            assert json.loads(websocket.receive_text())["type"] == "error"
+
+        with client.websocket_connect("/graph/session") as websocket:
+            websocket.send_json({"input_mode": "Linear Orders", "size": 3})
+            assert websocket.receive_json()["type"] == "error"
+
+
+def test_graph_session_limit(monkeypatch):
+    monkeypatch.setattr(main, "max_graph_sessions", 0)
+    with TestClient(app) as client:
+        with client.websocket_connect("/graph/session") as websocket:
+            assert websocket.receive_json()["type"] == "error"
+            with pytest.raises(WebSocketDisconnect) as disconnect:
+                websocket.receive_json()
+            assert disconnect.value.code == 1013
+    assert main.graph_sessions == 0
+
+
+def test_graph_clusters():
+    with TestClient(app) as client:
+        response = client.post("/graph/clusters", json={"size": 4, "prefix_length": 1})
+        assert response.status_code == 200
+        figure = response.json()
+        assert set(figure.keys()) == {"data", "layout", "clusters", "clusterEdges"}
+        assert [cluster["label"] for cluster in figure["clusters"]] == [
+            "1*",
+            "2*",
+            "3*",
+            "4*",
+        ]
+
+        response = client.post(
+            "/graph/clusters/expand",
+            json={
+                "size": 4,
+                "prefix_length": 1,
+                "cluster": 2,
+                "highlighted_nodes": ["3124", "1234"],
+            },
+        )
+        assert response.status_code == 200
+        figure = response.json()
+        assert figure["info"]["cluster"]["label"] == "3*"
+        drawn = {node for trace in figure["data"] for node in trace.get("text", [])}
+        assert drawn == {"3124", "3142", "3214", "3241", "3412", "3421"}
+
+        response = client.post("/graph/clusters/expand", json={"size": 4, "cluster": 4})
+        assert response.status_code == 400
+
+
+def test_solve():
+    with TestClient(app) as client:
+        upsilon = ["123", "132", "312"]
+        response = client.get("/solve", params={"k": 2, "upsilon": upsilon})
+        assert response.status_code == 200
+        result = json.loads(response.json())
+        assert len(result["resultLinearOrders"]) == 1
+        assert set(result["resultLinearOrders"][0]) == set(upsilon)
+
+        response = client.get("/solve", params={"upsilon": upsilon})
+        assert len(json.loads(response.json())["resultLinearOrders"]) == 1
+
+        # no cover of at most k posets
+        response = client.get("/solve", params={"k": 1, "upsilon": ["123", "321"]})
+        assert response.status_code == 200
+        assert json.loads(response.json()) == {}
+
+
+def test_solve_jobs():
+    with TestClient(app) as client:
+        upsilon = ["123", "132", "312"]
+        response = client.post("/solve/jobs", json={"upsilon": upsilon})
+        assert response.status_code == 202
+        job_id = response.json()["jobId"]
+        assert response.headers["Location"] == f"/solve/jobs/{job_id}"
+
+        with client.stream("GET", f"/solve/jobs/{job_id}/events") as response:
+            assert response.headers["content-type"].startswith("text/event-stream")
+            body = "".join(response.iter_text())
+        assert "event: done" in body
+
+        response = client.get(f"/solve/jobs/{job_id}")
+        assert response.json()["status"] == "done"
+        assert set(response.json()["result"]["resultLinearOrders"][0]) == set(upsilon)
+
+        assert client.get("/solve/jobs/unknown").status_code == 404
+        assert client.post("/solve/jobs", json={"upsilon": []}).status_code == 400
+
+
+def test_verify():
+    with TestClient(app) as client:
+        upsilon = ["123", "132", "312"]
+        response = client.post(
+            "/verify", json={"upsilon": upsilon, "posets": [[[1, 2]]]}
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "isValid": True,
+            "reason": None,
+            "posetIndex": None,
+            "violatingOrder": None,
+        }
+
+        response = client.post("/verify", json={"upsilon": upsilon, "posets": [[]]})
+        assert response.json()["isValid"] is False
+        assert response.json()["violatingOrder"] not in upsilon
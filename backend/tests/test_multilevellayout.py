@@ -0,0 +1,77 @@
+from itertools import permutations
+
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+from scipy.spatial.distance import pdist
+
+from app.multilevellayout import MultilevelLayout
+from app.posetutils import PosetUtils
+
+
+def atg_adjacency(n: int) -> sp.csr_matrix:
+    graph = PosetUtils.get_atg_from_upsilon(
+        ["".join(p) for p in permutations("123456789"[:n])]
+    )
+    return sp.csr_matrix(nx.to_scipy_sparse_array(graph, format="csr"))
+
+
+def test_repulsion():
+    pos = np.random.default_rng(0).random((3000, 3))
+    delta = pos[:, None, :] - pos[None, :, :]
+    distance_squared = np.sum(delta**2, axis=2)
+    np.fill_diagonal(distance_squared, np.inf)
+    exact = np.einsum("ijk,ij->ik", delta, 1 / distance_squared)
+
+    approximate = MultilevelLayout._repulsion(pos)
+    assert np.linalg.norm(approximate - exact) / np.linalg.norm(exact) < 0.2
+
+    # small graphs are exact
+    assert np.allclose(
+        MultilevelLayout._repulsion(pos[:100]),
+        exact[:100]
+        - np.einsum("ijk,ij->ik", delta[:100, 100:], 1 / distance_squared[:100, 100:]),
+    )
+
+
+def test_coarsen():
+    adjacency = atg_adjacency(6)
+    prolongation = MultilevelLayout._coarsen(adjacency, np.random.default_rng(0))
+    assert prolongation is not None
+    n_fine, n_coarse = prolongation.shape
+    assert n_fine == 720 and n_coarse <= MultilevelLayout.MIN_SHRINK * n_fine
+
+    # every node belongs to one coarse node, which collapses at most two adjacent nodes
+    assert np.all(prolongation.sum(axis=1) == 1)
+    sizes = np.asarray(prolongation.sum(axis=0)).ravel()
+    assert set(sizes) <= {1, 2}
+    for coarse_node in np.flatnonzero(sizes == 2):
+        first, second = prolongation[:, [coarse_node]].nonzero()[0]
+        assert adjacency[first, second]
+
+    # a graph without edges cannot be coarsened
+    empty = sp.csr_matrix((100, 100))
+    assert MultilevelLayout._coarsen(empty, np.random.default_rng(0)) is None
+
+
+def test_layout():
+    adjacency = atg_adjacency(6)
+    pos, iterations = MultilevelLayout.layout(adjacency)
+    assert pos.shape == (720, 3)
+    assert iterations > MultilevelLayout.COARSEST_ITERATIONS // 10
+    assert np.isclose(np.abs(pos).max(), 1)
+    assert pdist(pos).min() > 1e-4
+
+    # edges are short compared to the distances between arbitrary nodes
+    rows, cols = adjacency.nonzero()
+    assert np.linalg.norm(pos[rows] - pos[cols], axis=1).mean() < pdist(pos).mean() / 3
+
+    pos_again, iterations_again = MultilevelLayout.layout(adjacency)
+    assert iterations_again == iterations
+    assert np.allclose(pos, pos_again)
+
+    # out of time, nodes are still placed but not refined
+    pos, iterations = MultilevelLayout.layout(adjacency, time_budget=0)
+    assert pos.shape == (720, 3) and iterations == 0
+
+    assert MultilevelLayout.layout(sp.csr_matrix((1, 1)))[0].shape == (1, 3)
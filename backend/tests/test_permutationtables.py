@@ -0,0 +1,95 @@
+import os
+from itertools import permutations
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from app.layoutstore import LayoutStore
+from app.permutationtables import PermutationTables
+from app.posetutils import PosetUtils
+
+
+def test_to_digits():
+    digits = PermutationTables.to_digits(["2134", "4321"])
+    assert digits.tolist() == [[2, 1, 3, 4], [4, 3, 2, 1]]
+    assert PermutationTables.to_linear_orders(digits) == ["2134", "4321"]
+
+    with pytest.raises(ValueError, match="equal lengths"):
+        PermutationTables.to_digits(["123", "1234"])
+
+
+def test_rank():
+    for n in range(1, 7):
+        linear_orders = ["".join(p) for p in permutations("123456"[:n])]
+        ranks = PermutationTables.rank_linear_orders(linear_orders)
+        assert ranks.tolist() == list(range(len(linear_orders)))
+
+        all_digits = PermutationTables.all_digits(n)
+        assert PermutationTables.to_linear_orders(all_digits) == linear_orders
+
+    assert PermutationTables.rank_linear_orders(["321", "123"]).tolist() == [5, 0]
+    assert PermutationTables.rank_linear_orders(["987654321"]).tolist() == [362879]
+
+
+def test_adjacency():
+    linear_orders = ["".join(p) for p in permutations("12345")]
+    subset = linear_orders[::3] + linear_orders[1::6]
+    adjacency = PermutationTables.adjacency(PermutationTables.to_digits(subset))
+    expected = nx.to_scipy_sparse_array(
+        PosetUtils.get_atg_from_upsilon(subset), nodelist=subset
+    )
+    assert (adjacency != expected).nnz == 0
+
+    full = PermutationTables.adjacency(PermutationTables.all_digits(6))
+    assert full.shape == (720, 720)
+    assert np.all(full.sum(axis=1) == 5)
+    assert PermutationTables.adjacency(PermutationTables.to_digits(["12"])).nnz == 0
+
+
+def test_adjacent_transpositions():
+    linear_orders = ["2143", "1243", "1234", "2134", "4321"]
+    firsts, seconds, swapped = PermutationTables.adjacent_transpositions(
+        PermutationTables.to_digits(linear_orders)
+    )
+    assert firsts.tolist() == [0, 0, 1, 2]
+    assert seconds.tolist() == [1, 3, 2, 3]
+    assert swapped.tolist() == [[1, 2], [3, 4], [3, 4], [1, 2]]
+
+    firsts, _, _ = PermutationTables.adjacent_transpositions(
+        PermutationTables.to_digits(["4321"])
+    )
+    assert len(firsts) == 0
+
+
+def test_adjacent_transpositions_use_the_neighbors_table(tmp_path, monkeypatch):
+    digits = PermutationTables.to_digits(["2143", "1243", "1234", "2134", "4321"])
+    expected = PermutationTables.ranked_adjacent_transpositions(digits)
+    store = LayoutStore(str(tmp_path))
+    monkeypatch.setattr(LayoutStore, "_default", store)
+    for actual, expected_array in zip(
+        PermutationTables.adjacent_transpositions(digits), expected
+    ):
+        assert np.array_equal(actual, expected_array)
+    assert os.path.exists(store.path(4, "neighbors"))
+
+    # ranked instead if the table cannot be saved
+    def neighbors(size):
+        raise PermissionError(store.directory)
+
+    monkeypatch.setattr(store, "neighbors", neighbors)
+    for actual, expected_array in zip(
+        PermutationTables.adjacent_transpositions(digits), expected
+    ):
+        assert np.array_equal(actual, expected_array)
+
+
+def test_extends():
+    digits = PermutationTables.all_digits(4)
+    relation = [(1, 3), (2, 3)]
+    expected = PosetUtils.get_linear_extensions_from_relation(relation, "1234")
+    extensions = PermutationTables.to_linear_orders(
+        digits[PermutationTables.extends(digits, relation)]
+    )
+    assert extensions == expected
+    assert PermutationTables.extends(digits, []).all()
@@ -0,0 +1,119 @@
+from itertools import permutations
+
+import numpy as np
+import pytest
+from scipy.spatial.distance import pdist
+
+from app.posetlayout import PosetLayout
+from app.posetutils import PosetUtils
+
+
+def all_linear_orders(n: int) -> list[str]:
+    return ["".join(p) for p in permutations("123456789"[:n])]
+
+
+def test_default_engine():
+    assert PosetLayout.default_engine(4) == "spring"
+    assert PosetLayout.default_engine(PosetLayout.PERMUTAHEDRON_DEFAULT_MIN_SIZE) == (
+        "permutahedron"
+    )
+
+
+def test_permutahedron():
+    for n in range(2, 8):
+        nodes = all_linear_orders(n)
+        pos = PosetLayout.permutahedron(nodes)
+        assert pos.shape == (len(nodes), 3)
+
+        # distinct vertices within the unit ball
+        assert np.all(np.linalg.norm(pos, axis=1) <= 1 + 1e-9)
+        assert pdist(pos).min() > 1e-6
+
+    # n=4 is exactly 3D, so every edge of the permutahedron has the same length
+    nodes = all_linear_orders(4)
+    pos = dict(zip(nodes, PosetLayout.permutahedron(nodes)))
+    edge_lengths = [
+        np.linalg.norm(pos[p1] - pos[p2])
+        for p1 in nodes
+        for p2 in nodes
+        if p1 < p2 and PosetUtils.edge_label(p1, p2)
+    ]
+    assert len(edge_lengths) == 36
+    assert np.allclose(edge_lengths, edge_lengths[0])
+
+    # positions do not depend on the other nodes
+    subset = ["4321", "1234", "2134"]
+    assert np.allclose(PosetLayout.permutahedron(subset), [pos[p] for p in subset])
+
+
+def test_layout():
+    graph = PosetUtils.get_atg_from_upsilon(all_linear_orders(3))
+    for engine in PosetLayout.ENGINES:
+        pos, info = PosetLayout.layout(graph, engine)
+        assert set(pos) == set(graph.nodes())
+        assert all(len(p) == 3 for p in pos.values())
+        assert info["engine"] == engine
+
+    with pytest.raises(ValueError, match="Invalid layout engine"):
+        PosetLayout.layout(graph, "circular")
+
+
+def test_force_directed_spring(monkeypatch):
+    nodes = all_linear_orders(5)
+    pos, iterations = PosetLayout.force_directed("spring", nodes)
+    assert pos.shape == (120, 3)
+    assert 0 < iterations <= PosetLayout.SPRING_MAX_ITERATIONS
+    assert pdist(pos).min() > 1e-3
+    assert np.isclose(np.abs(pos).max(), 1)
+
+    # warm-started from the same embedding, so the layout is deterministic
+    pos_again, iterations_again = PosetLayout.force_directed("spring", nodes)
+    assert iterations_again == iterations
+    assert np.allclose(pos, pos_again)
+
+    # a layout already at rest stops right away
+    hexagon = all_linear_orders(3)
+    assert (
+        PosetLayout.force_directed("spring", hexagon)[1]
+        < PosetLayout.SPRING_MAX_ITERATIONS
+    )
+
+    monkeypatch.setattr(PosetLayout, "SPRING_MAX_ITERATIONS", 3)
+    _, iterations = PosetLayout.force_directed("spring", nodes)
+    assert iterations == 3
+    pos, iterations = PosetLayout.force_directed("spring", ["123"])
+    assert np.allclose(pos, np.zeros((1, 3)))
+    assert iterations == 0
+
+
+def test_force_directed_multilevel():
+    nodes = all_linear_orders(5)
+    pos, iterations = PosetLayout.force_directed("multilevel", nodes)
+    assert pos.shape == (120, 3)
+    assert iterations > 0
+    assert pdist(pos).min() > 1e-3
+
+    graph = PosetUtils.get_atg_from_upsilon(nodes)
+    _, info = PosetLayout.layout(graph, "multilevel", time_budget=0)
+    assert info == {"engine": "multilevel", "iterations": 0}
+
+    with pytest.raises(ValueError, match="Invalid force-directed layout engine"):
+        PosetLayout.force_directed("spectral", nodes)
+
+
+def test_spectral():
+    nodes = all_linear_orders(6)
+    pos = PosetLayout.spectral(nodes)
+    assert pos.shape == (720, 3)
+    assert np.isclose(np.abs(pos).max(), 1)
+    assert pdist(pos).min() > 1e-6
+
+    # a disconnected selection is packed into separate regions
+    subset = ["1234", "2134", "4321", "4312"]
+    pos = PosetLayout.spectral(subset)
+    assert np.any(
+        (pos[2:].min(axis=0) > pos[:2].max(axis=0))
+        | (pos[:2].min(axis=0) > pos[2:].max(axis=0))
+    )
+
+    assert PosetLayout.spectral([]).shape == (0, 3)
@@ -5,8 +5,10 @@ PosetSolver Class Methods
  - minimum_poset_cover  =>  ✓ for testing
  - _minimum_poset_cover_of_connected_component  =>  ✗ will not be tested; not meant to be called outside
  - exact_k_poset_cover  =>  ✓ for testing
- - maximal_poset    =>  ✓ for testing 
- 
+ - k_poset_cover  =>  ✓ for testing
+ - maximal_poset    =>  ✓ for testing
+ - progress reporting of minimum_poset_cover  =>  ✓ for testing
+
 Approach: hand-crafted tests
 
 Short Description of Chosen Upsilons
@@ -25,6 +27,8 @@ SINGLESIX. Edge case for the single linear order. Optimal Cost: k=1.
 HEX2SUNGAY. A case for 3-poset cover. Optimal Cost: k=3.
 """
 
+import pytest
+
 from app.posetsolver import PosetSolver
 from app.posetutils import PosetUtils
 from app.classes import *
@@ -36,6 +40,8 @@ from .upsilon_constants import (
     CUBELEG,
     SINGLESIX,
     HEX2SUNGAY,
+    FOURCOVER,
+    FOURCOVERPLUSTWO,
 )
 
 
@@ -69,6 +75,33 @@ def test_minimum_poset_cover():
     assert len(poset_cover) == 3
 
 
+def test_minimum_poset_cover_progress():
+    events: list[SolveProgress] = []
+    poset_cover = PosetSolver.minimum_poset_cover(TWOMAXIMAL, progress=events.append)
+
+    assert all(e["component"] == 1 and e["components"] == 1 for e in events)
+    assert [e["k"] for e in events] == sorted(e["k"] for e in events)
+    assert {e["k"] for e in events} == {1, 2, 3}
+    assert any(
+        e["k"] == 3 and e["anchor_sets_done"] == e["anchor_sets_total"] > 0
+        for e in events
+    )
+    assert all(e["best_cover_size"] == len(TWOMAXIMAL) for e in events[:-1])
+    assert events[-1]["best_cover_size"] == 3
+    assert events[-1]["best_cover"] == poset_cover
+
+    # the best cover shrinks as each component is solved
+    events = []
+    poset_cover = PosetSolver.minimum_poset_cover(SQHEXPLUSLINE, progress=events.append)
+    solved = [e for e in events if "best_cover" in e]
+    assert [e["component"] for e in solved] == [1, 2]
+    assert solved[0]["best_cover_size"] > solved[1]["best_cover_size"] == 2
+    assert all(
+        set(SQHEXPLUSLINE) == set.union(*(set(leg) for leg in e["best_cover"]))
+        for e in solved
+    )
+
+
 def test_exact_k_poset_cover():
     """Limitations of the function to be tested
 
@@ -112,6 +145,72 @@ def test_exact_k_poset_cover():
     assert len(k_poset_cover) == 3
 
 
+def test_exact_k_poset_cover_at_most():
+    """Unlike exact_k_poset_cover, at_most=True is defined for every k"""
+    k_poset_cover = PosetSolver.exact_k_poset_cover(TWOMAXIMAL, 2, at_most=True)
+    assert k_poset_cover is None
+    for k in [3, 4, 6]:
+        k_poset_cover = PosetSolver.exact_k_poset_cover(TWOMAXIMAL, k, at_most=True)
+        assert set(TWOMAXIMAL) == set.union(*(set(leg) for leg in k_poset_cover))
+        assert len(k_poset_cover) == 3
+
+    k_poset_cover = PosetSolver.exact_k_poset_cover(LINE295, 3, at_most=True)
+    assert len(k_poset_cover) == 1
+
+
+def test_exact_k_poset_cover_at_most_stops_at_first_cover(monkeypatch):
+    """A k above the minimum does no more work than the minimum k"""
+    maximal_poset = PosetSolver.maximal_poset
+    calls = []
+
+    def counting_maximal_poset(*args):
+        calls.append(args)
+        return maximal_poset(*args)
+
+    monkeypatch.setattr(PosetSolver, "maximal_poset", counting_maximal_poset)
+    assert len(PosetSolver.exact_k_poset_cover(GENMAXIMAL, 2)) == 2
+    calls_for_minimum = len(calls)
+
+    calls.clear()
+    k_poset_cover = PosetSolver.exact_k_poset_cover(GENMAXIMAL, 6, at_most=True)
+    assert set(GENMAXIMAL) == set.union(*(set(leg) for leg in k_poset_cover))
+    assert len(k_poset_cover) == 2
+    assert len(calls) == calls_for_minimum
+
+
+def test_k_poset_cover():
+    assert PosetSolver.k_poset_cover(TWOMAXIMAL, 2) is None
+    for k in [3, 5]:
+        k_poset_cover = PosetSolver.k_poset_cover(TWOMAXIMAL, k)
+        assert set(TWOMAXIMAL) == set.union(*(set(leg) for leg in k_poset_cover))
+        assert len(k_poset_cover) == 3
+
+    # disconnected upsilons need at least one poset per component
+    assert PosetSolver.k_poset_cover(SQHEXPLUSLINE, 1) is None
+    for k in [2, 4]:
+        k_poset_cover = PosetSolver.k_poset_cover(SQHEXPLUSLINE, k)
+        assert set(SQHEXPLUSLINE) == set.union(*(set(leg) for leg in k_poset_cover))
+        assert len(k_poset_cover) == 2
+
+    assert PosetSolver.k_poset_cover(HEX2SUNGAY, 2) is None
+    assert len(PosetSolver.k_poset_cover(HEX2SUNGAY, 3)) == 3
+    assert len(PosetSolver.k_poset_cover(SINGLESIX, 4)) == 1
+
+    # a component must not spend posets another component needs on a cover larger than its minimum
+    k_poset_cover = PosetSolver.exact_k_poset_cover(FOURCOVER, 5, at_most=True)
+    assert set(FOURCOVER) == set.union(*(set(leg) for leg in k_poset_cover))
+    assert len(k_poset_cover) == 4
+    assert len(PosetSolver.minimum_poset_cover(FOURCOVERPLUSTWO)) == 6
+    assert PosetSolver.k_poset_cover(FOURCOVERPLUSTWO, 5) is None
+    for k in [6, 7]:
+        k_poset_cover = PosetSolver.k_poset_cover(FOURCOVERPLUSTWO, k)
+        assert set(FOURCOVERPLUSTWO) == set.union(*(set(leg) for leg in k_poset_cover))
+        assert len(k_poset_cover) == 6
+
+    with pytest.raises(ValueError, match="at least 1"):
+        PosetSolver.k_poset_cover(LINE295, 0)
+
+
 def test_maximal_poset():
     """Limitations of the function to be tested
 
@@ -149,3 +248,38 @@ def test_maximal_poset():
     partial_order: PartialOrder = PosetUtils.get_partial_order_of_convex(seed_poset)
     maximal = PosetSolver.maximal_poset(TWOMAXIMAL, anchor_pairs, partial_order)
     assert set(maximal) == set(_3124_SQHEX)
+
+
+def test_verify_cover():
+    poset_cover = PosetSolver.minimum_poset_cover(TWOMAXIMAL)
+    partial_orders = [
+        PosetUtils.get_partial_order_of_convex(leg) for leg in poset_cover
+    ]
+    verification = PosetSolver.verify_cover(TWOMAXIMAL, partial_orders)
+    assert verification["is_valid"]
+    assert verification["reason"] is None
+
+    # cover relations work as well as partial orders
+    cover_relations = [
+        list(PosetUtils.get_hasse_from_partial_order(po, TWOMAXIMAL[0]).edges())
+        for po in partial_orders
+    ]
+    assert PosetSolver.verify_cover(TWOMAXIMAL, cover_relations)["is_valid"]
+
+    # a poset cover missing one poset leaves some linear order uncovered
+    verification = PosetSolver.verify_cover(TWOMAXIMAL, partial_orders[1:])
+    assert not verification["is_valid"]
+    assert verification["poset_index"] is None
+    assert verification["violating_order"] in set(poset_cover[0]) - set.union(
+        *(set(leg) for leg in poset_cover[1:])
+    )
+
+    # the antichain has linear extensions outside of upsilon
+    verification = PosetSolver.verify_cover(LINE295, [[(1, 2)], []])
+    assert not verification["is_valid"]
+    assert verification["poset_index"] == 0
+    assert verification["violating_order"] not in LINE295
+
+    verification = PosetSolver.verify_cover(LINE295, [[(1, 2), (2, 1)]])
+    assert not verification["is_valid"]
+    assert "cycle" in verification["reason"]
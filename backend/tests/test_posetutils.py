@@ -315,3 +315,34 @@ def test_get_partial_order_of_convex():
     with pytest.raises(ValueError) as excinfo:
         f([])
     assert excinfo.type is ValueError
+
+
+def test_count_linear_extensions():
+    f = PosetUtils.count_linear_extensions
+
+    # antichain, chain, and the square poset of test_get_linear_extensions_from_graph
+    assert f([], "1234") == 24
+    assert f([(1, 2), (2, 3), (3, 4)], "1234") == 1
+    assert f([(1, 3), (1, 4), (2, 3), (2, 4)], "1234") == 4
+
+    # partial orders and cover relations of the same poset agree
+    partial_order = PosetUtils.get_partial_order_of_convex(["12345", "12354", "13245"])
+    cover_relation = list(nx.transitive_reduction(nx.DiGraph(partial_order)).edges())
+    expected = len(
+        PosetUtils.get_linear_extensions_from_relation(partial_order, "12345")
+    )
+    assert f(partial_order, "12345") == expected
+    assert f(cover_relation, "12345") == expected
+
+    # cycles have no linear extensions
+    assert f([(1, 2), (2, 3), (3, 1)], "1234") == 0
+
+    with pytest.raises(ValueError, match="outside of 1 to 4"):
+        f([(1, 5)], "1234")
+
+
+def test_linear_order_satisfies_relation():
+    f = PosetUtils.linear_order_satisfies_relation
+    assert f("1234", [(1, 3), (2, 4)])
+    assert f("2143", [])
+    assert not f("3124", [(1, 3), (2, 4)])
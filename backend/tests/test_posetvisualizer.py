@@ -59,6 +59,7 @@ It should also be noted that there is no test for .get_figure_data as its reliab
     b. edges (selected, highlighted, other, does not exist)
 """
 
+import numpy as np
 import pytest
 
 from app.posetvisualizer import PosetVisualizer, RenderType
@@ -497,3 +498,166 @@ def test_hexsquare_as_selected_nodes():
     verify_edges_have_the_same_color(tester, edge_24)
     verify_edges_have_the_same_color(tester, edge_34)
     verify_edges_have_different_colors(tester, *diff_swap)
+
+
+def test_layout_engines():
+    visualizer = PosetVisualizer(4, layout_engine="permutahedron")
+    assert visualizer.layout_engine == "permutahedron"
+    tester = FigureTester(visualizer.get_figure_data())
+
+    some_selected_nodes = ["1243", "1432", "2134", "2431", "4312", "3214"]
+    verify_render_type_of_nodes(tester, some_selected_nodes, render_type="selected")
+    some_selected_edges = [("1423", "1432"), ("2134", "2143"), ("4312", "4321")]
+    some_edges_that_dont_exist = [("1234", "3124"), ("1423", "3421")]
+    verify_render_type_of_edges(tester, some_selected_edges, render_type="selected")
+    verify_edges_do_not_exist(tester, some_edges_that_dont_exist)
+
+    # large sizes default to permutahedron coordinates
+    upsilon = ["1234567", "1234576", "1234756"]
+    assert PosetVisualizer(7, upsilon).layout_engine == "permutahedron"
+    assert PosetVisualizer(7, upsilon, layout_engine="spring").layout_engine == "spring"
+
+
+def test_edges_by_swap():
+    upsilon = ["1234", "2134", "2143", "1243", "1324", "4321"]
+    visualizer = PosetVisualizer(4, upsilon)
+    expected: dict[tuple[str, str], list[tuple[str, str]]] = {}
+    for i, p1 in enumerate(upsilon):
+        for p2 in upsilon[i + 1 :]:
+            swapped_nums = PosetVisualizer._get_swapped_numbers(p1, p2)
+            if swapped_nums:
+                expected.setdefault(swapped_nums, []).append((p1, p2))
+
+    nodes = visualizer._nodes
+    edges_by_swap = {
+        pair: [(nodes[first], nodes[second]) for first, second in edges]
+        for pair, edges in visualizer._edges_by_swap.items()
+    }
+    assert list(edges_by_swap) == list(expected)
+    assert edges_by_swap == expected
+    graph_nodes = visualizer._graph_nodes
+    assert {nodes[index] for index in graph_nodes} == set(upsilon)
+    assert visualizer._adjacency[graph_nodes][:, graph_nodes].nnz == 2 * 5
+
+
+def test_highlight_all_nodes():
+    visualizer = PosetVisualizer(4)
+    all_nodes = list(visualizer.selected_nodes)
+    visualizer.select_and_highlight_nodes(all_nodes, all_nodes)
+    tester = FigureTester(visualizer.get_figure_data())
+
+    some_edges = [("1234", "2134"), ("1423", "1432"), ("4312", "4321")]
+    verify_render_type_of_nodes(tester, all_nodes, render_type="highlighted")
+    verify_render_type_of_edges(tester, some_edges, render_type="highlighted")
+
+    visualizer.highlight_nodes(["1234", "2134"])
+    tester = FigureTester(visualizer.get_figure_data())
+    verify_render_type_of_edges(tester, [("1234", "2134")], render_type="highlighted")
+    verify_render_type_of_edges(tester, [("1423", "1432")], render_type="selected")
+
+
+def test_trace_coordinates_are_arrays():
+    visualizer = PosetVisualizer(4, layout_engine="permutahedron")
+    for trace in visualizer.get_figure_data()["data"]:
+        x = np.asarray(trace.x, dtype=np.float64)
+        assert not np.isnan(x).all()
+        if trace.mode == "lines":
+            # segments of two ends separated by NaN
+            assert len(x) % 3 == 0
+            assert np.isnan(x[2::3]).all()
+            assert not np.isnan(x[0::3]).any() and not np.isnan(x[1::3]).any()
+
+
+def test_level_of_detail():
+    visualizer = PosetVisualizer(5, highlighted_poset=["12345", "21345"])
+    assert visualizer.level_of_detail_info is None
+
+    level_of_detail = {
+        "max_labels": 10,
+        "max_edges": 100,
+        "marker_only_min_nodes": 1000,
+    }
+    visualizer = PosetVisualizer(
+        5, highlighted_poset=["12345", "21345"], level_of_detail=level_of_detail
+    )
+    info = visualizer.level_of_detail_info
+    assert info == {
+        "labeledNodes": 12,
+        "totalNodes": 120,
+        "drawnEdges": info["drawnEdges"],
+        "totalEdges": 240,
+        "markerOnly": False,
+    }
+    # the highlighted edge is kept, and every swap class keeps some edges
+    assert 1 < info["drawnEdges"] <= 101
+    tester = FigureTester(visualizer.get_figure_data())
+    verify_render_type_of_edges(tester, [("12345", "21345")], render_type="highlighted")
+    edge_trace_names = {
+        trace.name
+        for trace in visualizer.get_figure_data()["data"]
+        if trace.mode == "lines"
+    }
+    assert len(edge_trace_names) == 10
+    legend_entries = [
+        trace.name
+        for trace in visualizer.get_figure_data()["data"]
+        if trace.mode != "lines" and trace.showlegend
+    ]
+    assert legend_entries == ["Permutations"]
+
+    level_of_detail["marker_only_min_nodes"] = 100
+    visualizer.select_nodes(visualizer.selected_nodes)
+    assert visualizer.level_of_detail_info["labeledNodes"] == 2
+    assert visualizer.level_of_detail_info["markerOnly"]
+
+
+def test_hexagonal_support_nodes():
+    hexagon = PosetVisualizer._get_hexagonal_support_nodes(["1234", "2134"])
+    assert sorted(hexagon) == ["1234", "1324", "2134", "2314", "3124", "3214"]
+
+    # the middle edge lies on two hexagons, sharing the edge
+    both = PosetVisualizer._get_hexagonal_support_nodes(["1234", "1324"])
+    assert len(both) == 12
+    assert set(both) == {"1234", "1324", "2134", "2314", "3124", "3214"} | {
+        "1234",
+        "1243",
+        "1324",
+        "1342",
+        "1423",
+        "1432",
+    }
+    left = PosetVisualizer._get_hexagonal_support_nodes(["1234", "1324"], True)
+    assert sorted(left) == ["1234", "1324", "2134", "2314", "3124", "3214"]
+
+    # a hexagon found from several of its edges is listed once
+    assert len(PosetVisualizer._get_hexagonal_support_nodes(["123", "213", "231"])) == 6
+    assert PosetVisualizer._get_hexagonal_support_nodes(["12", "21"]) == []
+
+
+def test_swap_palettes():
+    # the colors of seaborn's color_palette("hls", n_colors).as_hex(), which drew the swap classes before
+    assert PosetVisualizer._generate_colors(0) == []
+    assert PosetVisualizer._generate_colors(1) == ["#db5f57"]
+    assert PosetVisualizer._generate_colors(3) == ["#db5f57", "#57db5f", "#5f57db"]
+    assert PosetVisualizer._generate_colors(6) == [
+        "#db5f57",
+        "#d3db57",
+        "#57db5f",
+        "#57d3db",
+        "#5f57db",
+        "#db57d3",
+    ]
+    assert PosetVisualizer._generate_colors(8) == [
+        "#db5f57",
+        "#dbc257",
+        "#91db57",
+        "#57db80",
+        "#57d3db",
+        "#5770db",
+        "#a157db",
+        "#db57b2",
+    ]
+    # beyond the precomputed palettes
+    colors = PosetVisualizer._generate_colors(40)
+    assert len(set(colors)) == 40
+    assert colors[:2] == ["#db5f57", "#db7357"]
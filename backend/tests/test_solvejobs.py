@@ -0,0 +1,111 @@
+import asyncio
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.solvejobs import SolveJob, SolveJobManager
+
+from .upsilon_constants import TWOMAXIMAL
+
+
+def wait_for(job: SolveJob, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while not job.is_finished:
+        assert time.monotonic() < deadline, f"job {job.id} did not finish in time"
+        time.sleep(0.05)
+
+
+def collect_events(manager: SolveJobManager, job: SolveJob, last_event_id=-1):
+    async def collect() -> list[str]:
+        return [
+            message
+            async for message in manager.stream_events(
+                job, last_event_id=last_event_id, poll_interval=0.01
+            )
+        ]
+
+    return asyncio.run(collect())
+
+
+def test_solve_job():
+    manager = SolveJobManager(max_workers=1)
+    try:
+        job = manager.submit(TWOMAXIMAL)
+        assert manager.submit(list(reversed(TWOMAXIMAL))) is job
+
+        wait_for(job)
+        assert job.status == "done"
+        assert len(job.result["resultLinearOrders"]) == 3
+        assert job.progress["best_cover_size"] == 3
+        assert manager.get(job.id) is job
+
+        # finished jobs are not recomputed
+        assert manager.submit(TWOMAXIMAL) is job
+
+        messages = collect_events(manager, job)
+        assert messages[0].startswith("id: 0\nevent: status\n")
+        assert messages[-1].startswith(f"id: {len(job.events) - 1}\nevent: done\n")
+        assert any("event: progress" in message for message in messages)
+
+        # reconnecting only replays what was missed
+        assert collect_events(manager, job, last_event_id=len(job.events) - 2) == (
+            messages[-1:]
+        )
+    finally:
+        manager.shutdown()
+
+
+def test_failed_job():
+    manager = SolveJobManager(max_workers=1)
+    try:
+        job = manager.submit(["123", "1234"])
+        wait_for(job)
+        assert job.status == "failed"
+        assert "equal lengths" in job.error
+
+        # failed jobs are retried
+        assert manager.submit(["123", "1234"]) is not job
+    finally:
+        manager.shutdown()
+
+
+def test_broken_pool(monkeypatch):
+    manager = SolveJobManager(max_workers=1)
+    try:
+        broken_pool = manager._get_pool()
+
+        def submit(*args):
+            raise BrokenProcessPool("A worker was killed.")
+
+        monkeypatch.setattr(broken_pool, "submit", submit)
+        # the broken pool is replaced and the job runs on a fresh one
+        job = manager.submit(["123"])
+        assert manager._pool is not broken_pool
+        wait_for(job)
+        assert job.status == "done"
+
+        # a job that cannot start at all fails instead of staying queued
+        monkeypatch.setattr(manager, "_get_pool", lambda: broken_pool)
+        job = manager.submit(["132"])
+        assert job.status == "failed"
+        assert "killed" in job.error
+        assert manager.submit(["132"]) is not job
+    finally:
+        manager.shutdown()
+
+
+def test_ttl():
+    manager = SolveJobManager(max_workers=1, ttl=0)
+    try:
+        job = manager.submit(["123"])
+        wait_for(job)
+        assert manager.get(job.id) is None
+        assert manager.submit(["123"]) is not job
+    finally:
+        manager.shutdown()
+
+
+def test_errors_raised():
+    with pytest.raises(ValueError, match="max_workers"):
+        SolveJobManager(max_workers=0)
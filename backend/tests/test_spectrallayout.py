@@ -0,0 +1,46 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import laplacian
+from scipy.spatial.distance import pdist
+
+from app.permutationtables import PermutationTables
+from app.spectrallayout import SpectralLayout
+
+
+def test_component_layout():
+    rng = np.random.default_rng(0)
+    # the smallest nontrivial eigenvalue of a full ATG is 2 - 2cos(pi/n), with multiplicity n-1
+    # n=4, 5 and 7 are solved densely, with eigsh and with LOBPCG
+    for n in (4, 5, 7):
+        adjacency = PermutationTables.adjacency(PermutationTables.all_digits(n))
+        vectors = SpectralLayout._component_layout(adjacency, None, rng)
+        matrix = laplacian(adjacency)
+        eigenvalue = 2 - 2 * np.cos(np.pi / n)
+        residual = matrix @ vectors - eigenvalue * vectors
+        assert np.linalg.norm(residual) / np.linalg.norm(vectors) < 1e-2
+        # three independent directions
+        assert np.linalg.matrix_rank(vectors, tol=1e-3) == 3
+
+    # a path of 3 nodes only has 2 nontrivial eigenvectors
+    path = sp.csr_array(np.array([[0, 1, 0], [1, 0, 1], [0, 1, 0]], dtype=float))
+    vectors = SpectralLayout._component_layout(path, None, rng)
+    assert np.allclose(vectors[:, 2], 0)
+
+
+def test_layout():
+    # two components: a path of 3 nodes and a single edge, plus an isolated node
+    adjacency = sp.csr_array(
+        (np.ones(6), ([0, 1, 1, 2, 3, 4], [1, 0, 2, 1, 4, 3])), shape=(6, 6)
+    )
+    pos = SpectralLayout.layout(adjacency)
+    assert pos.shape == (6, 3)
+    assert np.isclose(np.abs(pos).max(), 1)
+    assert pdist(pos).min() > 1e-3
+    # components do not overlap
+    path, edge = pos[:3], pos[3:5]
+    assert np.any(
+        (edge.min(axis=0) > path.max(axis=0)) | (path.min(axis=0) > edge.max(axis=0))
+    )
+
+    assert np.array_equal(SpectralLayout.layout(adjacency), pos)
+    assert SpectralLayout.layout(sp.csr_array((1, 1))).shape == (1, 3)
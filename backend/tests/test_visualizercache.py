@@ -0,0 +1,71 @@
+from app.computetasks import build_graph_json, build_graph_visualizer
+from app.posetvisualizer import PosetVisualizer
+from app.schemas import GraphRequest
+from app.visualizercache import VisualizerCache
+
+
+def test_key():
+    key = VisualizerCache.key(4, ["1234", "2134"], "Default", None, None)
+    assert VisualizerCache.key(4, ["2134", "1234"], "Default", None, None) == key
+    assert VisualizerCache.key(4, ["1234"], "Default", None, None) != key
+    assert VisualizerCache.key(4, ["1234", "2134"], "SuperHex", None, None) != key
+    assert VisualizerCache.key(4, ["1234", "2134"], "Default", "spectral", None) != key
+    assert (
+        VisualizerCache.key(
+            4,
+            ["1234", "2134"],
+            "Default",
+            None,
+            PosetVisualizer.DEFAULT_LEVEL_OF_DETAIL,
+        )
+        != key
+    )
+
+
+def test_get_or_build():
+    visualizer = PosetVisualizer(4, ["1234", "2134"])
+    usage = visualizer.memory_usage()
+    assert usage > 0
+
+    cache = VisualizerCache(max_bytes=2 * usage)
+    assert cache.get_or_build("a", lambda: visualizer) == (visualizer, False)
+    assert cache.get_or_build("a", lambda: PosetVisualizer(3)) == (visualizer, True)
+    cache.get_or_build("b", lambda: PosetVisualizer(4, ["1234", "1243"]))
+    # over the budget, the least recently used entry is evicted
+    cache.get_or_build("c", lambda: PosetVisualizer(4, ["1234", "1324"]))
+    assert cache.get_or_build("b", lambda: visualizer)[1]
+    assert not cache.get_or_build("a", lambda: visualizer)[1]
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 4)
+    assert stats["hitRate"] == 2 / 6
+    assert stats["bytes"] <= stats["maxBytes"] == 2 * usage
+
+    cache = VisualizerCache(max_bytes=0)
+    cache.get_or_build("a", lambda: visualizer)
+    assert not cache.get_or_build("a", lambda: visualizer)[1]
+    assert cache.stats()["entries"] == 0
+
+
+def test_rehighlight_matches_fresh_build():
+    VisualizerCache._default = VisualizerCache()
+    request = {
+        "input_mode": "Linear Orders",
+        "drawing_method": "SuperHex",
+        "size": 4,
+        "selected_nodes": ["1234", "2134", "2143", "1243"],
+        "layout_engine": "spectral",
+    }
+    _, cache_hit = build_graph_visualizer(GraphRequest(**request))
+    assert not cache_hit
+
+    highlighted = {**request, "highlighted_nodes": ["1234", "2134"]}
+    cached_json, visualizer_cache = build_graph_json(GraphRequest(**highlighted))
+    assert visualizer_cache.startswith("hit; hits=1; misses=1;")
+
+    VisualizerCache._default = VisualizerCache(max_bytes=0)
+    fresh_json, visualizer_cache = build_graph_json(GraphRequest(**highlighted))
+    assert visualizer_cache.startswith("miss;")
+    # the figure does not depend on the cache, so that the GraphCache can replay it
+    assert cached_json == fresh_json
+    VisualizerCache._default = None
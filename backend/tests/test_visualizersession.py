@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from app.posetvisualizer import PosetVisualizer
+from app.schemas import SessionUpdate
+from app.visualizersession import VisualizerSession
+
+
+def test_snapshot():
+    upsilon = ["1234", "2134", "2143", "1243"]
+    session = VisualizerSession(PosetVisualizer(4, upsilon, ["1234"]))
+    snapshot = session.snapshot()
+    nodes = snapshot["nodes"]
+    assert set(upsilon) <= set(nodes)
+    assert snapshot["positions"].shape == (len(nodes), 3)
+
+    members = snapshot["traces"]["nodes highlighted"]["members"]
+    assert [nodes[i] for i in members] == ["1234"]
+    # the cycle 1234 - 2134 - 2143 - 1243 - 1234
+    edges = {
+        frozenset((nodes[first], nodes[second])) for first, second in snapshot["edges"]
+    }
+    assert len(edges) == 4
+    assert snapshot["traces"]["edges 1-2 selected"]["style"]["mode"] == "lines"
+
+
+def test_update():
+    upsilon = ["1234", "2134", "2143", "1243"]
+    session = VisualizerSession(PosetVisualizer(4, upsilon, []))
+    snapshot = session.snapshot()
+    nodes, edges = snapshot["nodes"], snapshot["edges"]
+    assert "edges 1-2 highlighted" not in snapshot["traces"]
+
+    delta = session.update(SessionUpdate(highlighted_nodes=["1234", "2134"]))
+    traces = delta["traces"]
+    highlighted_edge = traces["edges 1-2 highlighted"]["added"]
+    assert traces["edges 1-2 highlighted"]["style"]["line"]["color"] == "red"
+    assert {nodes[i] for i in edges[highlighted_edge[0]]} == {"1234", "2134"}
+    np.testing.assert_array_equal(
+        traces["edges 1-2 selected"]["removed"], highlighted_edge
+    )
+    assert "style" not in traces["edges 1-2 selected"]
+    assert "edges 3-4 selected" not in traces
+    assert delta["removedTraces"] == []
+
+    delta = session.update(SessionUpdate(highlighted_nodes=[]))
+    assert delta["removedTraces"] == ["edges 1-2 highlighted", "nodes highlighted"]
+    assert session.update(SessionUpdate())["traces"] == {}
+
+    with pytest.raises(ValueError):
+        session.update(SessionUpdate(highlighted_nodes=["4321"]))
+    assert session.visualizer.highlighted_nodes == []
+
+
+def test_update_with_repeated_nodes():
+    upsilon = ["1234", "2134", "2143", "1243"]
+    session = VisualizerSession(PosetVisualizer(4, upsilon, []))
+    nodes = session.snapshot()["nodes"]
+
+    delta = session.update(SessionUpdate(highlighted_nodes=["2134", "2134"]))
+    added = delta["traces"]["nodes highlighted"]["added"]
+    assert [nodes[i] for i in added] == ["2134"]
+    assert session.visualizer.highlighted_nodes == ["2134"]
@@ -16,7 +16,8 @@ class FigureTester:
         """Find a node by its text."""
 
         for trace in self._data:
-            is_node_trace = "markers" in trace.get("mode", "")
+            # unlabeled nodes, see PosetVisualizer.level_of_detail, cannot be found by text
+            is_node_trace = "markers" in trace.get("mode", "") and "text" in trace
             if not is_node_trace:
                 continue
 
@@ -81,7 +82,8 @@ class FigureTester:
         """Find a node by its (x, y, z) coordinates."""
 
         for trace in self._data:
-            is_node_trace = "markers" in trace.get("mode", "")
+            # unlabeled nodes, see PosetVisualizer.level_of_detail, cannot be found by text
+            is_node_trace = "markers" in trace.get("mode", "") and "text" in trace
             if not is_node_trace:
                 continue
 
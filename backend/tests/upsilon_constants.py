@@ -70,3 +70,24 @@ HEX2SUNGAY: list[LinearOrder] = [
     "21345",
     "21453",
 ]
+# a connected upsilon needing 4 posets, where anchor sets of 1 pair already find a cover of 5
+FOURCOVER: list[LinearOrder] = [
+    "12354",
+    "12534",
+    "13254",
+    "13425",
+    "13452",
+    "13524",
+    "13542",
+    "14352",
+    "15342",
+    "31245",
+    "31254",
+    "31425",
+    "31452",
+    "31542",
+    "32145",
+    "32154",
+]
+# FOURCOVER plus a component needing 2 posets
+FOURCOVERPLUSTWO: list[LinearOrder] = FOURCOVER + ["42513", "45213", "45231", "54213"]
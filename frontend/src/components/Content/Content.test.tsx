@@ -80,7 +80,7 @@ describe("Content", () => {
     await userEvent.click(solveButton);
 
     await waitFor(() =>
-      expect(posetService.solveOptimalKPosetCover).toHaveBeenCalledWith(2, [
+      expect(posetService.solveOptimalKPosetCover).toHaveBeenCalledWith(null, [
         "1234",
         "4321",
       ]),
@@ -79,7 +79,7 @@ const Content: React.FC = () => {
   const fetchPosetCoverResults = async (
     size: number,
     drawingMethod: DrawingMethod,
-    k: number,
+    k: number | null,
     upsilon: string[],
   ) => {
     try {
@@ -55,7 +55,7 @@ describe("InputForm", () => {
       const solveButton = screen.getByTestId("solve-button");
       await userEvent.click(solveButton);
 
-      expect(mockFetchPosetCover).toHaveBeenCalledWith(4, "Default", 2, [
+      expect(mockFetchPosetCover).toHaveBeenCalledWith(4, "Default", null, [
         "1234",
         "4321",
       ]);
@@ -22,7 +22,7 @@ interface InputFormProps {
   fetchPosetCoverResults: (
     size: number,
     drawingMethod: DrawingMethod,
-    k: number,
+    k: number | null,
     upsilon: string[],
   ) => Promise<void>;
   loading: boolean;
@@ -214,7 +214,7 @@ const InputForm: React.FC<InputFormProps> = ({
             fetchPosetCoverResults(
               size,
               drawingMethod as DrawingMethod,
-              2,
+              null,
               textareaValue
                 .split("\n")
                 .map((line) => line.trim())
@@ -55,7 +55,7 @@ const getAtgGraphDataFromCoverRelation = async (
 };
 
 const solveOptimalKPosetCover = async (
-  k: number,
+  k: number | null,
   upsilon: string[],
 ): Promise<PosetCoverResultData | null> => {
   const response = await api.get(`/solve`, {